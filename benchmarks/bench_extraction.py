@@ -0,0 +1,116 @@
+# benchmarks/bench_extraction.py
+"""Compare the single-pass PatternExtractor with the old per-selector lookup.
+
+Also times the full per-page extraction, parse included, with and without
+the structured-data tier in front of the heuristics.
+
+Usage: python benchmarks/bench_extraction.py [--repeat N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from extraction import PatternExtractor
+from enricher import StartupEnricher
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def legacy_extract_by_patterns(soup, patterns):
+    """The original StartupEnricher._extract_by_patterns."""
+    for pattern in patterns:
+        selectors = [
+            f'[id*="{pattern}"]',
+            f'[class*="{pattern}"]',
+            f'h1:contains("{pattern}")',
+            f'h2:contains("{pattern}")',
+            f'h3:contains("{pattern}")',
+            f'p:contains("{pattern}")'
+        ]
+        for selector in selectors:
+            for element in soup.select(selector):
+                text = element.get_text(strip=True)
+                if text and len(text) > 10:
+                    return text
+    return ""
+
+
+def legacy_extract(soup, patterns):
+    return {field: legacy_extract_by_patterns(soup, field_patterns)
+            for field, field_patterns in patterns.items()}
+
+
+def load_pages(scale):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, 'company_*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages[os.path.basename(path)] = f.read()
+
+    # A large page built from every fixture body repeated, like a long landing page
+    bodies = ''.join(
+        BeautifulSoup(html, 'lxml').body.decode_contents() for html in pages.values()
+    )
+    pages[f'combined_x{scale}'] = f"<html><body>{bodies * scale}</body></html>"
+    return pages
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=20, help="Repetitions in the combined page")
+    args = parser.parse_args(argv)
+
+    # :contains is deprecated in soupsieve; the legacy path still uses it
+    warnings.simplefilter('ignore', FutureWarning)
+
+    patterns = StartupEnricher(search_engine=None).patterns
+    extractor = PatternExtractor(patterns)
+
+    print(f"{'fixture':<24}{'legacy ms':>12}{'single ms':>12}{'speedup':>10}  same")
+    for name, html in load_pages(args.scale).items():
+        soup = BeautifulSoup(html, 'lxml')
+        expected = legacy_extract(soup, patterns)
+        actual = extractor.extract(soup)
+
+        legacy = best_of(lambda: legacy_extract(soup, patterns), args.repeat)
+        single = best_of(lambda: extractor.extract(soup), args.repeat)
+        print(f"{name:<24}{legacy * 1000:>12.2f}{single * 1000:>12.2f}"
+              f"{legacy / single:>9.1f}x  {'yes' if expected == actual else 'NO'}")
+        if expected != actual:
+            for field in patterns:
+                if expected[field] != actual[field]:
+                    print(f"    {field}: {expected[field]!r} != {actual[field]!r}")
+
+    enricher = StartupEnricher(search_engine=None)
+
+    def heuristics_only(html):
+        return extractor.extract_scored(BeautifulSoup(html, 'lxml'))
+
+    print()
+    print(f"{'fixture':<24}{'heuristic ms':>14}{'tiered ms':>12}{'speedup':>10}{'fields':>10}")
+    for name, html in load_pages(args.scale).items():
+        before = sum(1 for text, _ in heuristics_only(html).values() if text)
+        after = sum(1 for text, _ in enricher.extract_scored(html).values() if text)
+        heuristic = best_of(lambda: heuristics_only(html), args.repeat)
+        tiered = best_of(lambda: enricher.extract_scored(html), args.repeat)
+        print(f"{name:<24}{heuristic * 1000:>14.2f}{tiered * 1000:>12.2f}"
+              f"{heuristic / tiered:>9.1f}x{f'{before}->{after}':>10}")
+
+
+if __name__ == '__main__':
+    main()
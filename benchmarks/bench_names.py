@@ -0,0 +1,98 @@
+# benchmarks/bench_names.py
+"""Compare batched and vectorized name cleaning with the old per-name loop.
+
+Parses directory pages from the fixture server at several sizes and times
+cleaning and validating every candidate name on them.
+
+Usage: python benchmarks/bench_names.py [--repeat N] [--sizes 40,1000,10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from names import clean_names
+from scraper import StartupScraper
+from server import FixtureSite
+
+
+def legacy_clean_company_name(name):
+    """The original StartupScraper._clean_company_name."""
+    if not name:
+        return ""
+    name = str(name).strip()
+    prefixes = ['About ', 'The ', 'Company: ', 'Name: ']
+    for prefix in prefixes:
+        if name.lower().startswith(prefix.lower()):
+            name = name[len(prefix):]
+    suffixes = [' Inc', ' LLC', ' Ltd', ' Limited', ' Corp']
+    for suffix in suffixes:
+        if name.lower().endswith(suffix.lower()):
+            name = name[:-len(suffix)]
+    name = ' '.join(name.split())
+    return name.strip()
+
+
+def legacy_validate_company_name(name):
+    """The original StartupScraper._validate_company_name."""
+    if not name or len(name) < 2 or len(name) > 100:
+        return False
+    invalid_patterns = [
+        'login', 'sign in', 'register', 'about', 'contact',
+        'privacy', 'terms', 'cookie', 'menu', 'home'
+    ]
+    if any(pattern in name.lower() for pattern in invalid_patterns):
+        return False
+    if not any(c.isalpha() for c in name):
+        return False
+    if name.replace(' ', '').isdigit() or len(name.split()) < 2:
+        return False
+    return True
+
+
+def legacy_clean_names(texts):
+    companies = set()
+    for text in texts:
+        name = legacy_clean_company_name(text)
+        if legacy_validate_company_name(name):
+            companies.add(name)
+    return companies
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sizes', default='40,1000,10000', help="Companies per directory page")
+    args = parser.parse_args(argv)
+
+    html_parser = StartupScraper(search_engine=None).parser
+    print(f"{'companies':>10}{'texts':>8}{'legacy ms':>12}{'batched ms':>12}{'vector ms':>12}"
+          f"{'batched':>10}{'vector':>9}  same")
+    for size in (int(size) for size in args.sizes.split(',')):
+        html = FixtureSite(sites=1, per_page=size).render('/directory/0', {})
+        texts = html_parser.parse(html).matches()
+        expected = legacy_clean_names(texts)
+        batched_names = clean_names(texts, vectorized=False)
+        vector_names = clean_names(texts, vectorized=True)
+
+        legacy = best_of(lambda: legacy_clean_names(texts), args.repeat)
+        batched = best_of(lambda: clean_names(texts, vectorized=False), args.repeat)
+        vector = best_of(lambda: clean_names(texts, vectorized=True), args.repeat)
+        same = expected == batched_names == vector_names
+        print(f"{size:>10}{len(texts):>8}{legacy * 1000:>12.2f}{batched * 1000:>12.2f}{vector * 1000:>12.2f}"
+              f"{legacy / batched:>9.1f}x{legacy / vector:>8.1f}x  {'yes' if same else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_parsers.py
+"""Compare parser backends for company-name extraction on large directory pages.
+
+Reports parse+extract time and peak memory growth per page for every
+backend, and checks each one finds exactly the names BeautifulSoup finds.
+
+Usage: python benchmarks/bench_parsers.py [--sizes 200 2000 10000] [--repeat N]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers import PARSERS, SelectolaxHTMLParser
+from scraper import StartupScraper
+from server import FixtureSite
+
+
+def _status_kb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _measure(backend, html, repeat, results):
+    """Runs in a fresh child so peak RSS reflects one backend only."""
+    scraper = StartupScraper(None, parser=backend)
+    try:
+        # Writing 5 resets VmHWM to the current RSS (Linux 4.0+)
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+    baseline = _status_kb('VmRSS')
+    companies = scraper._extract_companies(html)
+    peak = _status_kb('VmHWM') - baseline
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scraper._extract_companies(html)
+        timings.append(time.perf_counter() - start)
+    results.put((min(timings), peak, sorted(companies)))
+
+
+def measure(backend, html, repeat):
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    process = context.Process(target=_measure, args=(backend, html, repeat, results))
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 2000, 10000],
+                        help="Companies listed on each generated directory page")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    backends = [name for name in PARSERS if name != 'selectolax' or SelectolaxHTMLParser]
+
+    print(f"{'page':<18}{'KiB':>8}{'backend':>12}{'ms':>10}{'peak MiB':>10}{'names':>8}  same")
+    for size in args.sizes:
+        site = FixtureSite(sites=1, per_page=size)
+        html = site.render('/directory/0', {})
+        expected = None
+        for backend in backends:
+            seconds, peak_kb, names = measure(backend, html, args.repeat)
+            if expected is None:
+                expected = names
+            print(f"{f'directory_{size}':<18}{len(html) // 1024:>8}{backend:>12}{seconds * 1000:>10.1f}"
+                  f"{peak_kb / 1024:>10.1f}{len(names):>8}  {'yes' if names == expected else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+# benchmarks/run_pipeline.py
+"""End-to-end offline pipeline benchmark.
+
+Starts the fixture server, points discovery, scraping and enrichment at it,
+runs the streaming pipeline and reports pages/sec, companies/sec, p50/p95
+latency per stage, peak RSS and DB write rate.
+
+    python benchmarks/run_pipeline.py --sites 5 --workers 8
+    python benchmarks/run_pipeline.py --save-baseline default
+    python benchmarks/run_pipeline.py --compare default
+    python benchmarks/run_pipeline.py --refresh 0.1
+    python benchmarks/run_pipeline.py --profile trace.json --profile-cpu
+
+``--refresh`` edits that fraction of company pages after the run, then
+times a refresh of every enriched company against the full run.
+
+``--profile`` traces the run like ``main.py --profile`` and prints the
+slowest domains and sampled hot functions after the report.
+
+``--compare`` exits non-zero when a metric regresses by more than
+``--tolerance`` relative to the saved baseline.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db1 import EnhancedDatabaseManager
+from search import SearchEngine
+from scraper import StartupScraper
+from enricher import StartupEnricher
+from engine import EnrichmentEngine
+from pipeline import StreamingPipeline
+from cache import PageCache
+from refresh import Refresher
+from tracing import Tracer
+from metrics import metrics
+from server import FixtureServer, FixtureSite
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# Metrics compared against baselines and whether bigger is better
+TRACKED = {
+    'pages_per_second': True,
+    'companies_per_second': True,
+    'db_rows_per_second': True,
+    'peak_rss_mb': False
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class StageTimer:
+    """Wraps methods on live objects and records the latency of every call."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, obj, method: str, stage: str):
+        original = getattr(obj, method)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+
+        setattr(obj, method, timed)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                'calls': len(values),
+                'total_s': round(sum(values), 4),
+                'p50_ms': round(percentile(values, 50) * 1000, 3),
+                'p95_ms': round(percentile(values, 95) * 1000, 3)
+            }
+            for stage, values in sorted(self.samples.items())
+        }
+
+
+def run(args) -> Dict:
+    workdir = tempfile.mkdtemp(prefix='crawl-bench-')
+    site = FixtureSite(args.sites, args.per_page, latency_ms=args.latency_ms)
+    timer = StageTimer()
+
+    try:
+        with FixtureServer(site) as server:
+            db_manager = EnhancedDatabaseManager(os.path.join(workdir, 'startups.db'))
+            db_manager.init_db()
+            cache = PageCache(os.path.join(workdir, 'cache')) if args.cache else None
+
+            search_engine = SearchEngine(
+                pool_size=1,
+                host_interval=0,
+                search_interval=0,
+                cache=cache,
+                search_url=f"{server.base}/bing/search?q=",
+                browser_fallback=False
+            )
+            # The stand-in directories all live on 127.0.0.1
+            search_engine.preferred_domain_terms = ['127.0.0.1']
+            search_engine.discovery.max_per_domain = args.sites
+            scraper = StartupScraper(search_engine, max_pages=args.crawl_pages)
+            enricher = StartupEnricher(search_engine, search_url=f"{server.base}/google/search?q=",
+                                       max_subpages=args.subpages)
+
+            timer.wrap(search_engine, 'find_potential_sites', 'discover')
+            timer.wrap(search_engine.fetcher, 'fetch_http', 'fetch')
+            timer.wrap(scraper, 'scrape_site', 'scrape')
+            timer.wrap(enricher, 'enrich_company_data', 'enrich')
+            timer.wrap(db_manager, 'save_startups', 'db_write')
+            timer.wrap(db_manager, 'flush', 'db_write')
+
+            start = time.perf_counter()
+            db_manager.add_site_jobs(search_engine.find_potential_sites())
+            engine = EnrichmentEngine(enricher, db_manager, workers=args.workers, queue_size=args.queue_size)
+            pipeline = StreamingPipeline(scraper, engine, db_manager, scrape_workers=args.scrape_workers)
+            pipeline.run(db_manager.get_pending_sites(), db_manager.get_companies_to_enrich())
+            db_manager.flush()
+            wall = time.perf_counter() - start
+
+            conn = db_manager._get_connection()
+            startups = conn.execute("SELECT COUNT(*) FROM startups").fetchone()[0]
+            enriched = conn.execute("SELECT COUNT(*) FROM enriched_data").fetchone()[0]
+            filled = conn.execute("""
+                SELECT AVG((employees != '') + (funding != '') + (mission != '') + (vision != '')
+                           + (email != '') + (product != '')) / 6.0
+                FROM enriched_data
+            """).fetchone()[0] or 0.0
+
+            pages = site.requests
+            refresh = refresh_run(args, site, db_manager, enricher, search_engine) if args.refresh else None
+            search_engine.close()
+            db_manager.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    stages = timer.report()
+    db_seconds = stages.get('db_write', {}).get('total_s', 0.0)
+    return {
+        'config': {
+            'sites': args.sites, 'per_page': args.per_page, 'workers': args.workers,
+            'scrape_workers': args.scrape_workers, 'crawl_pages': args.crawl_pages,
+            'subpages': args.subpages,
+            'latency_ms': args.latency_ms, 'cache': args.cache
+        },
+        'wall_seconds': round(wall, 3),
+        'pages': pages,
+        'startups': startups,
+        'enriched': enriched,
+        'fields_filled': round(filled, 3),
+        'pages_per_second': round(pages / wall, 2),
+        'companies_per_second': round(enriched / wall, 2),
+        'db_rows_per_second': round((startups + enriched) / db_seconds, 1) if db_seconds else 0.0,
+        # ru_maxrss is in KiB on Linux; includes the in-process fixture server
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        'stages': stages,
+        'pipeline': pipeline.summary(),
+        'refresh': refresh,
+        'metrics': metrics.summary()
+    }
+
+
+def refresh_run(args, site, db_manager, enricher, search_engine) -> Dict:
+    """Edit some company pages, make every company due and time one refresh pass."""
+    conn = db_manager._get_connection()
+    urls = [row[0] for row in conn.execute("SELECT company_url FROM enriched_data")]
+    slugs = sorted({url.rstrip('/').rsplit('/', 1)[-1] for url in urls})
+    site.revise(slugs[:int(len(slugs) * args.refresh)])
+    with db_manager._lock, conn:
+        conn.execute("UPDATE page_fingerprints SET next_check_at = 0")
+
+    before = site.requests
+    start = time.perf_counter()
+    outcomes = Refresher(enricher, db_manager, search_engine.fetcher, workers=args.workers).run()
+    wall = time.perf_counter() - start
+    return {
+        'wall_seconds': round(wall, 3),
+        'pages': site.requests - before,
+        'outcomes': outcomes
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of report relative to baseline."""
+    regressions = []
+    for metric, higher_is_better in TRACKED.items():
+        old, new = baseline.get(metric), report.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{metric}: {old} -> {new} ({change:+.0%})")
+
+    for stage, stats in report['stages'].items():
+        old = baseline.get('stages', {}).get(stage, {}).get('p95_ms')
+        if old and stats['p95_ms'] > old * (1 + tolerance):
+            regressions.append(f"{stage} p95: {old}ms -> {stats['p95_ms']}ms")
+    return regressions
+
+
+def print_report(report: Dict):
+    print(f"wall {report['wall_seconds']}s  pages {report['pages']}  "
+          f"startups {report['startups']}  enriched {report['enriched']}  "
+          f"fields filled {report['fields_filled']:.0%}")
+    print(f"pages/s {report['pages_per_second']}  companies/s {report['companies_per_second']}  "
+          f"db rows/s {report['db_rows_per_second']}  peak RSS {report['peak_rss_mb']} MB")
+    print(f"{'stage':<12}{'calls':>8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<12}{stats['calls']:>8}{stats['total_s']:>10.3f}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}")
+    refresh = report.get('refresh')
+    if refresh:
+        print(f"refresh: wall {refresh['wall_seconds']}s ({refresh['wall_seconds'] / report['wall_seconds']:.0%} "
+              f"of the full run)  pages {refresh['pages']}  outcomes {refresh['outcomes']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument('--sites', type=int, default=3)
+    parser.add_argument('--per-page', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--scrape-workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=100)
+    parser.add_argument('--subpages', type=int, default=3,
+                        help="Company subpages fetched to fill empty fields (0 disables)")
+    parser.add_argument('--crawl-pages', type=int, default=1,
+                        help="Listing pages crawled per directory site")
+    parser.add_argument('--latency-ms', type=float, default=20,
+                        help="Simulated server latency per request")
+    parser.add_argument('--cache', action='store_true', help="Run with the page cache enabled")
+    parser.add_argument('--refresh', type=float, default=0.0, metavar='FRACTION',
+                        help="After the run, edit this fraction of company pages and time a refresh")
+    parser.add_argument('--profile', metavar='TRACE_FILE', help="Write a Chrome trace of the run here")
+    parser.add_argument('--profile-cpu', action='store_true', help="With --profile, cProfile sampled hot paths")
+    parser.add_argument('--profile-memory', action='store_true', help="With --profile, tracemalloc sampled hot paths")
+    parser.add_argument('--profile-sample', type=float, default=0.1, metavar='FRACTION')
+    parser.add_argument('--json', action='store_true', help="Print the full report as JSON")
+    parser.add_argument('--save-baseline', metavar='NAME')
+    parser.add_argument('--compare', metavar='NAME')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    tracer = Tracer(args.profile_sample, args.profile_cpu, args.profile_memory).start() if args.profile else None
+    report = run(args)
+    print(json.dumps(report, indent=2) if args.json else '', end='')
+    print_report(report)
+    if tracer:
+        tracer.stop()
+        tracer.write(args.profile)
+        print()
+        print(tracer.report(5))
+
+    if args.save_baseline:
+        os.makedirs(BASELINES, exist_ok=True)
+        path = os.path.join(BASELINES, f"{args.save_baseline}.json")
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINES, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against baseline '{args.compare}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+# benchmarks/server.py
+"""Local stand-in for the search engines, directories and company sites.
+
+Serves the HTML fixtures in benchmarks/fixtures from one threaded HTTP
+server, so the whole pipeline can run offline and repeatably:
+
+    /bing/search?q=...      Bing-style results linking to directory pages
+    /directory/<n>          a directory listing ``per_page`` companies
+    /google/search?q=...    Google-style results (div.g div.yuRUbf > a)
+    /company/<slug>         a company homepage picked from company_*.html
+    /company/<slug>/<page>  its about, team, careers or contact subpage
+
+Half of the company pages send an ETag and answer If-None-Match with 304,
+like real sites, where many don't. ``FixtureSite.revise`` changes pages to
+exercise refreshes.
+
+Run it standalone with ``python benchmarks/server.py --port 8800``.
+"""
+import argparse
+import glob
+import os
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import parse_qs, quote, unquote_plus, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+FIRST_WORDS = [
+    'Bright', 'Silver', 'Quantum', 'Blue', 'Crimson', 'Nimbus', 'Vector', 'Polar',
+    'Copper', 'Lumen', 'Granite', 'Velvet', 'Orbit', 'Harbor', 'Cedar', 'Atlas',
+    'Falcon', 'Ember', 'Summit', 'Delta', 'Pixel', 'Aurora', 'Cobalt', 'Zenith'
+]
+SECOND_WORDS = [
+    'Analytics', 'Robotics', 'Labs', 'Health', 'Systems', 'Networks', 'Energy',
+    'Logistics', 'Genomics', 'Payments', 'Security', 'Foods', 'Mobility', 'Data',
+    'Learning', 'Materials', 'Devices', 'Studio', 'Finance', 'Vision'
+]
+
+
+# Company subpages that exist, and the fixture each one serves
+SUBPAGES = {
+    'about': 'company_about.html',
+    'contact': 'company_about.html',
+    'team': 'subpage_team.html',
+    'careers': 'subpage_team.html'
+}
+
+
+def company_name(index: int) -> str:
+    """Deterministic, valid company name for an index."""
+    first = FIRST_WORDS[index % len(FIRST_WORDS)]
+    second = SECOND_WORDS[(index // len(FIRST_WORDS)) % len(SECOND_WORDS)]
+    series = index // (len(FIRST_WORDS) * len(SECOND_WORDS))
+    return f"{first} {second}" + (f" {series + 1}" if series else "")
+
+
+def slugify(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def load_template(name: str) -> Template:
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return Template(f.read())
+
+
+class FixtureSite:
+    """Renders fixture pages for the stand-in hosts."""
+
+    def __init__(self, sites: int = 3, per_page: int = 40, overlap: int = 10, latency_ms: float = 0):
+        self.sites = sites
+        self.per_page = per_page
+        self.overlap = overlap
+        self.latency = latency_ms / 1000.0
+        self.base = ''
+
+        self.bing = load_template('bing_results.html')
+        self.google = load_template('google_results.html')
+        self.directory = load_template('directory.html')
+        self.company_pages = []
+        for path in sorted(glob.glob(os.path.join(FIXTURES, 'company_*.html'))):
+            with open(path, encoding='utf-8') as f:
+                self.company_pages.append(f.read())
+        self.subpages = {name: load_template(name).template for name in set(SUBPAGES.values())}
+
+        # Company slug -> number of times its page was edited
+        self.revisions = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def companies_on(self, site: int):
+        """Company indexes listed by a directory; neighbours share ``overlap`` names."""
+        start = site * (self.per_page - self.overlap)
+        return range(start, start + self.per_page)
+
+    def revise(self, slugs):
+        """Edit the homepages of these companies."""
+        with self._lock:
+            for slug in slugs:
+                self.revisions[slug] = self.revisions.get(slug, 0) + 1
+
+    def sends_etag(self, path: str) -> bool:
+        return path.startswith('/company/') and zlib.crc32(path.encode()) % 2 == 0
+
+    def render(self, path: str, query: dict) -> str:
+        q = query.get('q', [''])[0]
+        if path == '/bing/search':
+            results = '\n'.join(
+                f'      <li class="b_algo"><h2><a href="{self.base}/directory/{i}">'
+                f'Top technology startups list #{i}</a></h2>'
+                f'<div class="b_caption"><p>Directory of {self.per_page} startups.</p></div></li>'
+                for i in range(self.sites)
+            )
+            return self.bing.safe_substitute(query=quote(q), results=results)
+
+        if path == '/google/search':
+            name = q.rsplit(' company about', 1)[0]
+            results = (
+                f'          <div class="g"><div class="yuRUbf"><a href="{self.base}/company/{slugify(name)}">'
+                f'<h3>{name} - Official site</h3></a></div></div>\n'
+                f'          <div class="g"><div class="yuRUbf"><a href="https://www.linkedin.com/company/{slugify(name)}">'
+                f'<h3>{name} | LinkedIn</h3></a></div></div>'
+            )
+            return self.google.safe_substitute(query=q, results=results)
+
+        match = re.fullmatch(r'/directory/(\d+)', path)
+        if match:
+            site = int(match.group(1))
+            listing = '\n'.join(
+                f'      <div class="card"><h3 class="company-name">{company_name(i)}</h3>'
+                f'<p>Building the future of {company_name(i).split()[1].lower()}.</p>'
+                f'<a href="/company/{slugify(company_name(i))}">View profile</a></div>'
+                for i in self.companies_on(site)
+            )
+            return self.directory.safe_substitute(
+                title=f"Top technology startups list #{site}",
+                listing=listing,
+                prev=f"/directory/{max(site - 1, 0)}",
+                next=f"/directory/{site + 1}"
+            )
+
+        match = re.fullmatch(r'/company/([a-z0-9-]+)(?:/([a-z-]+))?', path)
+        if match and self.company_pages:
+            slug, subpage = match.groups()
+            if subpage:
+                if subpage not in SUBPAGES:
+                    return None
+                page = self.subpages[SUBPAGES[subpage]]
+            else:
+                page = self.company_pages[zlib.crc32(slug.encode()) % len(self.company_pages)]
+                revision = self.revisions.get(slug)
+                if revision:
+                    page = page.replace('</body>', f'<p>Company update #{revision}: new funding round.</p></body>')
+            # Every company is its own site under /company/<slug>/
+            return page.replace('href="/', f'href="/company/{slug}/')
+
+        return None
+
+
+def make_handler(site: FixtureSite):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            with site._lock:
+                site.requests += 1
+            if site.latency:
+                time.sleep(site.latency)
+
+            parsed = urlparse(self.path)
+            query = {k: [unquote_plus(v) for v in vs] for k, vs in parse_qs(parsed.query).items()}
+            body = site.render(parsed.path, query)
+            status = 200 if body is not None else 404
+            data = (body or 'Not found').encode('utf-8')
+
+            etag = None
+            if status == 200 and site.sends_etag(parsed.path):
+                etag = f'"{zlib.crc32(data):08x}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+            self.send_response(status)
+            if etag:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class FixtureServer:
+    """Runs a FixtureSite on a background thread; use as a context manager."""
+
+    def __init__(self, site: FixtureSite, port: int = 0):
+        self.site = site
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), make_handler(site))
+        self.httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        site.base = self.base
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve benchmark fixtures locally")
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--sites', type=int, default=3)
+    parser.add_argument('--per-page', type=int, default=40)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    args = parser.parse_args(argv)
+
+    site = FixtureSite(args.sites, args.per_page, latency_ms=args.latency_ms)
+    server = FixtureServer(site, args.port)
+    print(f"Serving fixtures on {server.base}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+# browser_profile.py
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import logging
+from typing import Iterable, List, Optional
+
+from selenium.webdriver.chrome.options import Options
+
+from fetcher import USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+# Files the scraper never reads: images, fonts and media
+BLOCKED_EXTENSIONS = (
+    'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp',
+    'woff', 'woff2', 'ttf', 'otf', 'eot',
+    'mp4', 'webm', 'ogg', 'mp3', 'wav', 'm4a', 'mov'
+)
+
+# Ad, analytics and tag-manager hosts that only add requests and script time
+BLOCKED_HOSTS = (
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com',
+    'google-analytics.com', 'googletagmanager.com', 'googletagservices.com',
+    'adservice.google.com', 'facebook.net', 'connect.facebook.net',
+    'hotjar.com', 'segment.io', 'segment.com', 'mixpanel.com', 'amplitude.com',
+    'fullstory.com', 'intercom.io', 'hs-analytics.net', 'hs-scripts.com',
+    'clarity.ms', 'newrelic.com', 'nr-data.net', 'optimizely.com', 'quantserve.com',
+    'scorecardresearch.com', 'taboola.com', 'outbrain.com', 'criteo.com', 'adnxs.com'
+)
+
+# Browser services a headless scraper has no use for
+DISABLED_FEATURES = (
+    'Translate', 'OptimizationHints', 'MediaRouter', 'DialMediaRouteProvider',
+    'InterestFeedContentSuggestions', 'CalculateNativeWinOcclusion', 'AutofillServerCommunication',
+    'CertificateTransparencyComponentUpdater', 'BackForwardCache', 'HeavyAdIntervention'
+)
+
+LEAN_ARGUMENTS = (
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-client-side-phishing-detection',
+    '--disable-domain-reliability',
+    '--disable-breakpad',
+    '--metrics-recording-only',
+    '--mute-audio',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--blink-settings=imagesEnabled=false'
+)
+
+
+class BrowserProfile:
+    """Chrome options for pooled drivers, lean by default.
+
+    A lean profile skips images, fonts, media and known ad/analytics hosts
+    (blocked per tab through CDP ``Network.setBlockedURLs``) and turns off
+    background services, which cuts bytes per page and memory per browser.
+    Each browser runs as its own multi-process instance on a debugging port
+    chromedriver picks, so several can run side by side.
+
+    With ``user_data_template`` every browser starts from a private copy of a
+    pre-warmed profile directory (first-run work, component downloads and
+    disk cache already done) instead of an empty one.
+    """
+
+    def __init__(self, lean: bool = True, blocked_hosts: Iterable[str] = BLOCKED_HOSTS,
+                 blocked_extensions: Iterable[str] = BLOCKED_EXTENSIONS,
+                 user_data_template: Optional[str] = None, window_size: str = '1920,1080',
+                 user_agent: str = USER_AGENT):
+        self.lean = lean
+        self.blocked_hosts = tuple(blocked_hosts)
+        self.blocked_extensions = tuple(blocked_extensions)
+        self.user_data_template = user_data_template
+        self.window_size = window_size
+        self.user_agent = user_agent
+        # Pooled drivers are created concurrently; only one may warm the template
+        self._template_lock = threading.Lock()
+
+    def options(self) -> Options:
+        """Chrome options for a new browser."""
+        options = Options()
+        options.add_argument('--headless=new')  # Use new headless mode
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+
+        # Required for running in Docker
+        options.add_argument('--disable-software-rasterizer')
+        options.add_argument('--disable-extensions')
+        # No --single-process or fixed debugging port: chromedriver picks a
+        # free port per browser, which lets several pooled drivers run side by side
+
+        options.add_argument(f'--window-size={self.window_size}')
+        options.add_argument(f'--user-agent={self.user_agent}')
+
+        if self.lean:
+            for argument in LEAN_ARGUMENTS:
+                options.add_argument(argument)
+            options.add_argument(f"--disable-features={','.join(DISABLED_FEATURES)}")
+            options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2,
+                'profile.default_content_setting_values.notifications': 2,
+                'profile.default_content_setting_values.geolocation': 2
+            })
+            # Don't wait for subresources we'd block or ignore anyway
+            options.page_load_strategy = 'eager'
+        return options
+
+    def blocked_url_patterns(self) -> List[str]:
+        """CDP URL patterns for every blocked file type and host."""
+        patterns = [f'*.{extension}' for extension in self.blocked_extensions]
+        patterns += [f'*.{extension}?*' for extension in self.blocked_extensions]
+        for host in self.blocked_hosts:
+            patterns += [f'*://{host}/*', f'*://*.{host}/*']
+        return patterns
+
+    def user_data_dir(self) -> Optional[str]:
+        """Fresh copy of the template profile for one browser, or None without a template."""
+        if not self.user_data_template:
+            return None
+        if not os.path.isdir(self.user_data_template):
+            logger.warning(f"Browser profile template {self.user_data_template} not found, "
+                           f"starting with an empty profile")
+            return None
+        directory = tempfile.mkdtemp(prefix='chrome-profile-')
+        shutil.copytree(self.user_data_template, directory, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns('Singleton*', '*.lock', 'lockfile'))
+        return directory
+
+    def warm_template(self, factory, url: str = 'about:blank'):
+        """Build the template profile by running one browser in it and closing it cleanly.
+
+        The profile is built in a sibling directory and moved into place once
+        the browser has quit, so the template only exists when fully warmed.
+        """
+        template = os.path.abspath(self.user_data_template)
+        os.makedirs(os.path.dirname(template), exist_ok=True)
+        building = tempfile.mkdtemp(prefix=f'{os.path.basename(template)}.warming-',
+                                    dir=os.path.dirname(template))
+        try:
+            options = self.options()
+            options.add_argument(f'--user-data-dir={building}')
+            driver = factory(options)
+            try:
+                driver.get(url)
+            finally:
+                driver.quit()
+            os.replace(building, template)
+        except Exception:
+            shutil.rmtree(building, ignore_errors=True)
+            raise
+        logger.info(f"Warmed browser profile template in {self.user_data_template}")
+
+    def create(self, factory):
+        """Start a browser through factory(options) and apply the profile to it."""
+        if self.user_data_template:
+            with self._template_lock:
+                if not os.path.isdir(self.user_data_template):
+                    try:
+                        self.warm_template(factory)
+                    except Exception as e:
+                        logger.warning(f"Could not warm browser profile template: {str(e)}")
+
+        options = self.options()
+        profile_dir = self.user_data_dir()
+        if profile_dir:
+            options.add_argument(f'--user-data-dir={profile_dir}')
+
+        try:
+            driver = factory(options)
+        except Exception:
+            if profile_dir:
+                shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        if profile_dir:
+            # The copy goes away with the driver object
+            weakref.finalize(driver, shutil.rmtree, profile_dir, True)
+
+        if self.lean:
+            self.apply(driver)
+        return driver
+
+    def apply(self, driver):
+        """Block unwanted requests in the driver's current tab."""
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_url_patterns()})
+        except Exception as e:
+            logger.warning(f"Could not enable request blocking: {str(e)}")
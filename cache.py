@@ -0,0 +1,218 @@
+# cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that never change page content: any utm_* campaign tag,
+# plus these exact names (a prefix match would also drop refinementList)
+TRACKING_PREFIX = 'utm_'
+TRACKING_PARAMS = frozenset({'gclid', 'fbclid', 'msclkid', 'ref', 'ref_src'})
+
+# Seconds a page stays fresh, per source
+DEFAULT_TTLS = {
+    'search': 6 * 3600,
+    'directory': 24 * 3600,
+    'company': 7 * 24 * 3600
+}
+
+
+def _is_tracking(key: str) -> bool:
+    key = key.lower()
+    return key.startswith(TRACKING_PREFIX) or key in TRACKING_PARAMS
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL used as the cache key."""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    port = parsed.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+
+    path = parsed.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not _is_tracking(key)
+    )
+    return urlunparse((scheme, host, path, '', urlencode(query), ''))
+
+
+class CacheEntry:
+    """A cached page plus the metadata needed to revalidate it."""
+
+    def __init__(self, cache, url, content_hash, status, via, etag, last_modified, expires_at):
+        self._cache = cache
+        self.url = url
+        self.content_hash = content_hash
+        self.status = status
+        self.via = via
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    @property
+    def html(self) -> str:
+        return self._cache.read_blob(self.content_hash)
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """On-disk page cache keyed by normalized URL.
+
+    Bodies are stored zlib-compressed under the SHA-256 of their content, so
+    identical pages reached through different URLs share one blob. A small
+    SQLite index keeps per-URL TTLs, HTTP validators and access times, and
+    least recently used entries are evicted once blobs exceed ``max_bytes``.
+    """
+
+    def __init__(self, directory: str = "/app/data/cache", max_bytes: int = 512 * 1024 * 1024,
+                 ttls: Optional[Dict[str, int]] = None, default_ttl: int = 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+
+        os.makedirs(os.path.join(directory, 'blobs'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url_key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                status INTEGER,
+                via TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                expires_at REAL,
+                last_access REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+        self._conn.commit()
+
+    def ttl_for(self, source: str) -> int:
+        return self.ttls.get(source, self.default_ttl)
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Look up a URL, fresh or stale; None when it was never cached."""
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT content_hash, status, via, etag, last_modified, expires_at
+                FROM entries WHERE url_key = ?
+            """, (key,)).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(self._blob_path(row[0])):
+                self._conn.execute("DELETE FROM entries WHERE url_key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE url_key = ?", (time.time(), key))
+            self._conn.commit()
+        return CacheEntry(self, url, *row)
+
+    def put(self, url: str, html: str, source: str, status: int = 200, via: str = 'http',
+            headers: Optional[Dict[str, str]] = None):
+        """Store a page body and its validators."""
+        headers = headers or {}
+        data = html.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(content_hash)
+        now = time.time()
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO entries
+                (url_key, content_hash, size, status, via, etag, last_modified,
+                 fetched_at, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                normalize_url(url), content_hash, os.path.getsize(path), status, via,
+                headers.get('ETag'), headers.get('Last-Modified'),
+                now, now + self.ttl_for(source), now
+            ))
+            self._conn.commit()
+            self._evict()
+
+    def refresh(self, url: str, source: str):
+        """Extend an entry's lifetime after a 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                UPDATE entries SET fetched_at = ?, expires_at = ?, last_access = ?
+                WHERE url_key = ?
+            """, (now, now + self.ttl_for(source), now, normalize_url(url)))
+            self._conn.commit()
+
+    def read_blob(self, content_hash: str) -> str:
+        with open(self._blob_path(content_hash), 'rb') as f:
+            return zlib.decompress(f.read()).decode('utf-8')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, 'blobs', content_hash[:2], content_hash + '.z')
+
+    def _evict(self):
+        """Drop least recently used entries until blobs fit the byte budget."""
+        total = self._conn.execute("""
+            SELECT COALESCE(SUM(size), 0) FROM
+            (SELECT content_hash, MAX(size) AS size FROM entries GROUP BY content_hash)
+        """).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        rows = self._conn.execute("SELECT url_key, content_hash, size FROM entries ORDER BY last_access").fetchall()
+        for url_key, content_hash, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE url_key = ?", (url_key,))
+            shared = self._conn.execute(
+                "SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1", (content_hash,)
+            ).fetchone()
+            if not shared:
+                try:
+                    os.remove(self._blob_path(content_hash))
+                except OSError:
+                    pass
+                total -= size
+            evicted += 1
+        self._conn.commit()
+        logger.debug(f"Evicted {evicted} cached pages")
@@ -1,19 +1,107 @@
 # db1.py
 import sqlite3
 import logging
+import threading
+import time
+import zlib
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
+from dedup import NameIndex, normalize_name
+from metrics import COMPANIES, DB_ROWS, DB_WRITE
+from webutil import registered_domain
 
 logger = logging.getLogger(__name__)
 
+ENRICHED_FIELDS = ['company_url', 'employees', 'funding', 'mission', 'vision', 'email', 'product']
+
+# Seconds before a newly enriched company page is first checked for changes
+DEFAULT_REFRESH_INTERVAL = 7 * 86400
+
+# Columns returned by the read API, in order
+EXPORT_COLUMNS = ['startup_id', 'company_name'] + ENRICHED_FIELDS + ['domain', 'last_updated']
+
+# Job states: sites go discovered -> scraped, companies go scraped -> enriched;
+# either can end up failed, and is retried until it runs out of attempts
+JOB_DISCOVERED = 'discovered'
+JOB_SCRAPED = 'scraped'
+JOB_ENRICHED = 'enriched'
+JOB_FAILED = 'failed'
+
+
+class LeaseLostError(Exception):
+    """A write was fenced off because another worker now holds the shard lease."""
+
+
+def shard_for(startup_id: int, shards: int) -> int:
+    """Stable shard number of a startup."""
+    return zlib.crc32(str(startup_id).encode('ascii')) % shards
+
+
+def _url_key(company_name: str) -> str:
+    """Company URL cache key; names made only of symbols fall back to their casefolded text."""
+    return normalize_name(company_name) or (company_name or '').casefold().strip()
+
+
 class EnhancedDatabaseManager:
-    def __init__(self, db_path="/app/data/startups.db"):
+    def __init__(self, db_path="/app/data/startups.db", batch_size=50, flush_interval=5.0,
+                 max_attempts=3, retry_delay=3600, name_index=None):
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        # Resolves near-duplicate names to an existing startup before insert
+        self.name_index = name_index or NameIndex()
+
+        # (shard, token) of the lease a sharded worker writes under; writes are
+        # rejected once another worker has claimed the shard
+        self.write_fence = None
+        # Shards the company backlog is split into; 0 until init_shards
+        self.shard_count = 0
+
+        # Set by init_db when this SQLite build has FTS5
+        self.fts_enabled = False
+
+        # One long-lived connection shared by all threads, guarded by a lock
+        self._conn = None
+        self._lock = threading.RLock()
+        self._pending: List[tuple] = []
+        self._pending_fingerprints: List[tuple] = []
+        self._stop_flusher = threading.Event()
+        self._flusher = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Open the shared WAL-mode connection on first use."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            # WAL lets readers run alongside the writer; NORMAL sync is safe with WAL
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._conn = conn
+        return self._conn
+
+    def _start_flusher(self):
+        """Flush buffered writes at least every flush_interval seconds."""
+        if self._flusher is None and self.flush_interval:
+            self._stop_flusher = threading.Event()
+            self._flusher = threading.Thread(target=self._flush_loop, name="db-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop_flusher.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Already logged; the rows stay buffered for the next attempt
+                pass
 
     def init_db(self):
         """Initialize database with both startup and enriched data tables."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock:
+                conn = self._get_connection()
                 cursor = conn.cursor()
                 
                 # Create startups table (if not exists)
@@ -25,6 +113,11 @@ class EnhancedDatabaseManager:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                self._ensure_column(cursor, 'startups', 'normalized_name', 'TEXT')
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_startups_normalized
+                    ON startups(normalized_name)
+                """)
                 
                 # Create enriched_data table
                 cursor.execute("""
@@ -44,45 +137,663 @@ class EnhancedDatabaseManager:
                     )
                 """)
                 
+                self._ensure_column(cursor, 'enriched_data', 'domain', 'TEXT')
+                missing = cursor.execute(
+                    "SELECT id, company_url FROM enriched_data WHERE domain IS NULL"
+                ).fetchall()
+                cursor.executemany(
+                    "UPDATE enriched_data SET domain = ? WHERE id = ?",
+                    [(registered_domain(url) if url else '', row_id) for row_id, url in missing]
+                )
+                
+                # Indexes for the read API's filters; the partial index covers
+                # "has an email" without indexing the empty majority
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_enriched_last_updated
+                    ON enriched_data(last_updated)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_enriched_domain
+                    ON enriched_data(domain)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_enriched_has_email
+                    ON enriched_data(id) WHERE email != ''
+                """)
+                self.fts_enabled = self._init_fts(cursor)
+                
+                # Create jobs table tracking pipeline progress for resumable runs
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        kind TEXT NOT NULL,
+                        job_key TEXT NOT NULL,
+                        startup_id INTEGER,
+                        state TEXT NOT NULL,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        next_retry_at TIMESTAMP,
+                        last_error TEXT,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (startup_id) REFERENCES startups(id),
+                        UNIQUE(kind, job_key)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_jobs_state
+                    ON jobs(kind, state, next_retry_at)
+                """)
+                # Shard of a company job, set when it's created in a sharded backlog
+                self._ensure_column(cursor, 'jobs', 'shard', 'INTEGER')
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_jobs_shard
+                    ON jobs(kind, shard, state)
+                """)
+                
+                # Create company_urls table caching name -> homepage resolutions;
+                # a NULL company_url records a company nobody could find
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS company_urls (
+                        normalized_name TEXT PRIMARY KEY,
+                        company_url TEXT,
+                        confidence REAL NOT NULL DEFAULT 0,
+                        method TEXT,
+                        resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        expires_at TIMESTAMP
+                    )
+                """)
+                
+                # Create sources table recording how many companies each
+                # directory domain has yielded, used to rank discovery results
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS sources (
+                        domain TEXT PRIMARY KEY,
+                        sites_scraped INTEGER NOT NULL DEFAULT 0,
+                        companies_found INTEGER NOT NULL DEFAULT 0,
+                        last_scraped_at TIMESTAMP
+                    )
+                """)
+                
+                # Create shard_leases table for sharded multi-process runs; the
+                # token is bumped on every claim and fences off stale writers
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS shard_leases (
+                        shard INTEGER PRIMARY KEY,
+                        owner TEXT,
+                        token INTEGER NOT NULL DEFAULT 0,
+                        expires_at REAL NOT NULL DEFAULT 0,
+                        completed_at REAL
+                    )
+                """)
+                self.shard_count = cursor.execute("SELECT COUNT(*) FROM shard_leases").fetchone()[0]
+                
+                # Create page_fingerprints table remembering what each company
+                # page looked like, so refreshes can skip unchanged ones
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS page_fingerprints (
+                        startup_id INTEGER PRIMARY KEY,
+                        url TEXT NOT NULL,
+                        content_hash TEXT,
+                        etag TEXT,
+                        last_modified TEXT,
+                        checks INTEGER NOT NULL DEFAULT 0,
+                        changes INTEGER NOT NULL DEFAULT 0,
+                        interval REAL NOT NULL,
+                        checked_at REAL NOT NULL,
+                        next_check_at REAL NOT NULL,
+                        FOREIGN KEY (startup_id) REFERENCES startups (id)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_fingerprints_next_check
+                    ON page_fingerprints(next_check_at)
+                """)
+                
+                # Backfill company jobs for startups saved before jobs existed
+                cursor.execute("""
+                    INSERT OR IGNORE INTO jobs (kind, job_key, startup_id, state)
+                    SELECT 'company', CAST(s.id AS TEXT), s.id,
+                           CASE WHEN e.id IS NULL THEN ? ELSE ? END
+                    FROM startups s
+                    LEFT JOIN enriched_data e ON s.id = e.startup_id
+                """, (JOB_SCRAPED, JOB_ENRICHED))
+                
+                # Fill in keys for rows saved before names were normalized, and
+                # rekey non-Latin names the first normalizer reduced to nothing
+                missing = cursor.execute(
+                    "SELECT id, company_name FROM startups WHERE normalized_name IS NULL OR normalized_name = ''"
+                ).fetchall()
+                cursor.executemany(
+                    "UPDATE startups SET normalized_name = ? WHERE id = ?",
+                    [(normalize_name(name), startup_id) for startup_id, name in missing]
+                )
+                
                 conn.commit()
+                
+                # Load every known name into the dedup index
+                for startup_id, name in cursor.execute("SELECT id, company_name FROM startups"):
+                    self.name_index.add(startup_id, name)
             logger.info("Enhanced database initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize enhanced database: {str(e)}")
             raise
 
+    def save_startups(self, companies: List[str], source_url: str) -> List[tuple]:
+        """Insert many startup names in one transaction; return (id, name) of the new ones.
+
+        Names that resolve to a startup already in the name index (same
+        normalized key or a near-duplicate) are skipped, so they never cost
+        a second enrichment.
+        """
+        try:
+            new_startups = []
+            duplicates = 0
+            with self._lock:
+                conn = self._get_connection()
+                with conn, DB_WRITE.time(op='save_startups'):
+                    for name in dict.fromkeys(companies):
+                        if self.name_index.resolve(name) is not None:
+                            duplicates += 1
+                            continue
+                        
+                        cursor = conn.execute("""
+                            INSERT OR IGNORE INTO startups (company_name, source_url, normalized_name)
+                            VALUES (?, ?, ?)
+                        """, (name, source_url, normalize_name(name)))
+                        if cursor.rowcount:
+                            self.name_index.add(cursor.lastrowid, name)
+                            new_startups.append((cursor.lastrowid, name))
+                    
+                    # Every new company starts out waiting for enrichment
+                    conn.executemany("""
+                        INSERT OR IGNORE INTO jobs (kind, job_key, startup_id, state, shard)
+                        VALUES ('company', CAST(? AS TEXT), ?, ?, ?)
+                    """, [(startup_id, startup_id, JOB_SCRAPED, self._shard_of(startup_id))
+                          for startup_id, _ in new_startups])
+            DB_ROWS.inc(len(new_startups), table='startups')
+            COMPANIES.inc(len(new_startups), outcome='saved')
+            COMPANIES.inc(duplicates, outcome='duplicate')
+            logger.info(f"Saved {len(new_startups)} new startups from {source_url} "
+                        f"({duplicates} duplicates skipped)")
+            return new_startups
+        except Exception as e:
+            logger.error(f"Database error while saving startups: {str(e)}")
+            raise
+
     def save_enriched_data(self, startup_id: int, data: Dict[str, str]):
-        """Save enriched data for a startup."""
+        """Buffer enriched data for a startup; written in batches by flush()."""
+        row = (startup_id,) + tuple(data[field] for field in ENRICHED_FIELDS)
+        row += (registered_domain(data['company_url']) if data['company_url'] else '',)
+        if data.get('fingerprint') is not None:
+            # A fresh enrichment restarts the page's refresh schedule
+            self.save_page_fingerprint(startup_id, data['company_url'], data['fingerprint'],
+                                       False, DEFAULT_REFRESH_INTERVAL)
+        with self._lock:
+            self._pending.append(row)
+            pending = len(self._pending)
+            self._start_flusher()
+        if pending >= self.batch_size:
+            self.flush()
+
+    def save_page_fingerprint(self, startup_id: int, url: str, fingerprint, changed: bool,
+                              interval: float):
+        """Buffer the outcome of checking a company page; the next check is due after interval seconds.
+
+        fingerprint has content_hash, etag and last_modified attributes
+        (see refresh.PageFingerprint). Written by flush() with enriched rows.
+        """
+        now = time.time()
+        row = (startup_id, url, fingerprint.content_hash, fingerprint.etag, fingerprint.last_modified,
+               int(changed), interval, now, now + interval)
+        with self._lock:
+            self._pending_fingerprints.append(row)
+            pending = len(self._pending_fingerprints)
+            self._start_flusher()
+        if pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered enriched rows and page fingerprints in a single transaction."""
+        with self._lock:
+            if not self._pending and not self._pending_fingerprints:
+                return
+            rows, self._pending = self._pending, []
+            fingerprints, self._pending_fingerprints = self._pending_fingerprints, []
+            try:
+                conn = self._get_connection()
+                with conn, DB_WRITE.time(op='flush'):
+                    self._check_fence(conn)
+                    # An upsert keeps row ids stable and fires the FTS update trigger
+                    conn.executemany("""
+                        INSERT INTO enriched_data 
+                        (startup_id, company_url, employees, funding, mission, 
+                         vision, email, product, domain, last_updated)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT(startup_id) DO UPDATE SET
+                            company_url = excluded.company_url,
+                            employees = excluded.employees,
+                            funding = excluded.funding,
+                            mission = excluded.mission,
+                            vision = excluded.vision,
+                            email = excluded.email,
+                            product = excluded.product,
+                            domain = excluded.domain,
+                            last_updated = excluded.last_updated
+                    """, rows)
+                    # Mark jobs done in the same transaction as their data
+                    conn.executemany("""
+                        UPDATE jobs SET state = ?, last_error = NULL, next_retry_at = NULL,
+                                        updated_at = CURRENT_TIMESTAMP
+                        WHERE kind = 'company' AND job_key = ?
+                    """, [(JOB_ENRICHED, str(row[0])) for row in rows])
+                    conn.executemany("""
+                        INSERT INTO page_fingerprints
+                        (startup_id, url, content_hash, etag, last_modified, changes,
+                         interval, checked_at, next_check_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(startup_id) DO UPDATE SET
+                            url = excluded.url,
+                            content_hash = excluded.content_hash,
+                            etag = excluded.etag,
+                            last_modified = excluded.last_modified,
+                            checks = checks + 1,
+                            changes = changes + excluded.changes,
+                            interval = excluded.interval,
+                            checked_at = excluded.checked_at,
+                            next_check_at = excluded.next_check_at
+                    """, fingerprints)
+                if rows:
+                    DB_ROWS.inc(len(rows), table='enriched_data')
+                    logger.info(f"Saved enriched data for {len(rows)} startups")
+                if fingerprints:
+                    DB_ROWS.inc(len(fingerprints), table='page_fingerprints')
+            except LeaseLostError:
+                # The shard's new owner will enrich these companies itself
+                logger.warning(f"Shard lease lost, discarding {len(rows)} enriched rows")
+                raise
+            except Exception as e:
+                # Put the rows back so a later flush can retry them
+                self._pending = rows + self._pending
+                self._pending_fingerprints = fingerprints + self._pending_fingerprints
+                logger.error(f"Database error while saving enriched data: {str(e)}")
+                raise
+
+    def add_site_jobs(self, urls: List[str]) -> int:
+        """Record discovered sites; sites seen in earlier runs are left as they are."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
+            with self._lock:
+                conn = self._get_connection()
+                before = conn.total_changes
+                with conn:
+                    conn.executemany("""
+                        INSERT OR IGNORE INTO jobs (kind, job_key, state)
+                        VALUES ('site', ?, ?)
+                    """, [(url, JOB_DISCOVERED) for url in urls])
+                return conn.total_changes - before
+        except Exception as e:
+            logger.error(f"Database error while saving site jobs: {str(e)}")
+            raise
+
+    def get_pending_sites(self) -> List[str]:
+        """Sites still to scrape: newly discovered or failed and due for a retry."""
+        return [row[1] for row in self._get_due_jobs('site', JOB_DISCOVERED)]
+
+    def get_companies_to_enrich(self, shard: Optional[int] = None) -> List[tuple]:
+        """(startup_id, company_name) for companies waiting for or due a retry of enrichment.
+
+        With shard, only the companies in that shard of a sharded backlog.
+        """
+        try:
+            self.flush()
+            with self._lock:
+                cursor = self._get_connection().cursor()
+                cursor.execute(f"""
+                    SELECT s.id, s.company_name
+                    FROM jobs j
+                    JOIN startups s ON s.id = j.startup_id
+                    WHERE j.kind = 'company'
+                      {'AND j.shard = ?' if shard is not None else ''}
+                      AND (j.state = ?
+                           OR (j.state = ? AND j.attempts < ?
+                               AND (j.next_retry_at IS NULL OR j.next_retry_at <= CURRENT_TIMESTAMP)))
+                    ORDER BY j.attempts, j.id
+                """, (*([shard] if shard is not None else []), JOB_SCRAPED, JOB_FAILED, self.max_attempts))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error getting companies to enrich: {str(e)}")
+            return []
+
+    def get_companies_to_refresh(self, limit: Optional[int] = None) -> List[tuple]:
+        """Enriched companies due a check, most overdue first.
+
+        Rows are (startup_id, company_name, company_url, content_hash, etag,
+        last_modified, interval); the last four are None for companies never
+        fingerprinted, which come first, oldest enrichment first. The rest
+        are ordered by time since their last check measured in their own
+        interval, so volatile pages (short intervals) and long-unchecked
+        ones lead.
+        """
+        try:
+            self.flush()
+            now = time.time()
+            with self._lock:
+                return self._get_connection().execute("""
+                    SELECT s.id, s.company_name, e.company_url,
+                           f.content_hash, f.etag, f.last_modified, f.interval
+                    FROM enriched_data e
+                    JOIN startups s ON s.id = e.startup_id
+                    LEFT JOIN page_fingerprints f ON f.startup_id = e.startup_id
+                    WHERE e.company_url != '' AND (f.startup_id IS NULL OR f.next_check_at <= ?)
+                    ORDER BY f.startup_id IS NOT NULL,
+                             (? - COALESCE(f.checked_at, 0)) / COALESCE(f.interval, 1) DESC,
+                             e.last_updated
+                    LIMIT ?
+                """, (now, now, limit if limit else -1)).fetchall()
+        except Exception as e:
+            logger.error(f"Error getting companies to refresh: {str(e)}")
+            return []
+
+    def mark_site_scraped(self, url: str):
+        """Record that a site has been scraped."""
+        self._set_job_state('site', url, JOB_SCRAPED)
+
+    def mark_job_failed(self, kind: str, job_key, error: str):
+        """Count a failed attempt and schedule the next retry with exponential backoff."""
+        try:
+            with self._lock:
+                conn = self._get_connection()
+                with conn:
+                    self._check_fence(conn)
+                    conn.execute("""
+                        UPDATE jobs SET
+                            state = ?,
+                            attempts = attempts + 1,
+                            last_error = ?,
+                            next_retry_at = datetime('now', '+' || (? * (1 << attempts)) || ' seconds'),
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE kind = ? AND job_key = ?
+                    """, (JOB_FAILED, error[:500], self.retry_delay, kind, str(job_key)))
+        except LeaseLostError:
+            logger.warning(f"Shard lease lost, not recording failure of {kind} job {job_key}")
+        except Exception as e:
+            logger.error(f"Database error while marking {kind} job failed: {str(e)}")
+
+    def get_job_counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of jobs per kind and state."""
+        try:
+            self.flush()
+            with self._lock:
+                rows = self._get_connection().execute("""
+                    SELECT kind, state, COUNT(*) FROM jobs GROUP BY kind, state
+                """).fetchall()
+            counts: Dict[str, Dict[str, int]] = {}
+            for kind, state, count in rows:
+                counts.setdefault(kind, {})[state] = count
+            return counts
+        except Exception as e:
+            logger.error(f"Error counting jobs: {str(e)}")
+            return {}
+
+    def record_source_yield(self, domain: str, companies: int):
+        """Add one scraped site and the companies it listed to its domain's totals."""
+        try:
+            with self._lock:
+                conn = self._get_connection()
+                with conn:
+                    conn.execute("""
+                        INSERT INTO sources (domain, sites_scraped, companies_found, last_scraped_at)
+                        VALUES (?, 1, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT(domain) DO UPDATE SET
+                            sites_scraped = sites_scraped + 1,
+                            companies_found = companies_found + excluded.companies_found,
+                            last_scraped_at = CURRENT_TIMESTAMP
+                    """, (domain, companies))
+        except Exception as e:
+            logger.error(f"Database error while recording yield of {domain}: {str(e)}")
+
+    def get_source_yields(self) -> Dict[str, float]:
+        """Average companies found per scraped site, by domain."""
+        try:
+            with self._lock:
+                rows = self._get_connection().execute("""
+                    SELECT domain, CAST(companies_found AS REAL) / sites_scraped
+                    FROM sources WHERE sites_scraped > 0
+                """).fetchall()
+            return dict(rows)
+        except Exception as e:
+            logger.error(f"Error reading source yields: {str(e)}")
+            return {}
+
+    def get_company_url(self, company_name: str) -> Optional[Tuple[Optional[str], float, str]]:
+        """Unexpired cached homepage as (url, confidence, method); url is None for a cached miss."""
+        key = _url_key(company_name)
+        if not key:
+            return None
+        try:
+            with self._lock:
+                return self._get_connection().execute("""
+                    SELECT company_url, confidence, method FROM company_urls
+                    WHERE normalized_name = ? AND expires_at > CURRENT_TIMESTAMP
+                """, (key,)).fetchone()
+        except Exception as e:
+            logger.error(f"Error reading cached URL for {company_name}: {str(e)}")
+            return None
+
+    def save_company_url(self, company_name: str, url: Optional[str], confidence: float,
+                         method: str, ttl: int):
+        """Cache how a company's homepage was resolved for ttl seconds."""
+        key = _url_key(company_name)
+        if not key:
+            return
+        try:
+            with self._lock:
+                conn = self._get_connection()
+                with conn:
+                    conn.execute("""
+                        INSERT OR REPLACE INTO company_urls
+                        (normalized_name, company_url, confidence, method, resolved_at, expires_at)
+                        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, datetime('now', '+' || ? || ' seconds'))
+                    """, (key, url, confidence, method, int(ttl)))
+        except Exception as e:
+            logger.error(f"Database error while caching URL for {company_name}: {str(e)}")
+
+    def forget_company_url(self, company_name: str):
+        """Drop a cached resolution."""
+        try:
+            with self._lock:
+                conn = self._get_connection()
+                with conn:
+                    conn.execute("DELETE FROM company_urls WHERE normalized_name = ?",
+                                 (_url_key(company_name),))
+        except Exception as e:
+            logger.error(f"Database error while forgetting URL for {company_name}: {str(e)}")
+
+    def init_shards(self, count: int):
+        """Create the lease rows for a backlog split into count shards."""
+        with self._lock:
+            conn = self._get_connection()
+            with conn:
+                existing = conn.execute("SELECT COUNT(*) FROM shard_leases").fetchone()[0]
+                if existing and existing != count:
+                    raise ValueError(f"Backlog is already split into {existing} shards, not {count}")
+                conn.executemany("INSERT OR IGNORE INTO shard_leases (shard) VALUES (?)",
+                                 [(shard,) for shard in range(count)])
+                self.shard_count = count
+                self._assign_shards(conn)
+
+    def count_due_by_shard(self) -> Dict[int, int]:
+        """Number of companies due for enrichment in each shard that has any."""
+        try:
+            self.flush()
+            with self._lock:
+                conn = self._get_connection()
+                with conn:
+                    self._assign_shards(conn)
+                    rows = conn.execute("""
+                        SELECT shard, COUNT(*)
+                        FROM jobs
+                        WHERE kind = 'company' AND shard IS NOT NULL
+                          AND (state = ?
+                               OR (state = ? AND attempts < ?
+                                   AND (next_retry_at IS NULL OR next_retry_at <= CURRENT_TIMESTAMP)))
+                        GROUP BY shard
+                    """, (JOB_SCRAPED, JOB_FAILED, self.max_attempts)).fetchall()
+            return dict(rows)
+        except Exception as e:
+            logger.error(f"Error counting companies due per shard: {str(e)}")
+            return {}
+
+    def claim_shard(self, owner: str, shards, lease_seconds: float):
+        """Lease a free or expired shard among shards; returns (shard, fencing token) or None.
+
+        Shards finished longest ago are preferred so every shard gets turns.
+        """
+        wanted = set(shards)
+        if not wanted:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._get_connection()
+            with conn:
+                free = conn.execute("""
+                    SELECT shard FROM shard_leases
+                    WHERE owner IS NULL OR expires_at < ?
+                    ORDER BY completed_at IS NOT NULL, completed_at, shard
+                """, (now,)).fetchall()
+                for (shard,) in free:
+                    if shard not in wanted:
+                        continue
+                    # Re-checks the lease inside the write so two claimers can't both win
+                    cursor = conn.execute("""
+                        UPDATE shard_leases SET owner = ?, token = token + 1, expires_at = ?
+                        WHERE shard = ? AND (owner IS NULL OR expires_at < ?)
+                    """, (owner, now + lease_seconds, shard, now))
+                    if cursor.rowcount:
+                        token = conn.execute(
+                            "SELECT token FROM shard_leases WHERE shard = ?", (shard,)
+                        ).fetchone()[0]
+                        return shard, token
+        return None
+
+    def renew_shard(self, shard: int, token: int, lease_seconds: float) -> bool:
+        """Extend a lease; False once another worker has claimed the shard."""
+        with self._lock:
+            conn = self._get_connection()
+            with conn:
+                cursor = conn.execute("""
+                    UPDATE shard_leases SET expires_at = ?
+                    WHERE shard = ? AND token = ? AND owner IS NOT NULL
+                """, (time.time() + lease_seconds, shard, token))
+                return cursor.rowcount == 1
+
+    def release_shard(self, shard: int, token: int):
+        """Give a shard back once its due companies have been processed."""
+        with self._lock:
+            conn = self._get_connection()
+            with conn:
+                conn.execute("""
+                    UPDATE shard_leases SET owner = NULL, expires_at = 0, completed_at = ?
+                    WHERE shard = ? AND token = ?
+                """, (time.time(), shard, token))
+
+    def get_shard_status(self) -> List[Dict]:
+        """Owner, token and lease expiry of every shard."""
+        with self._lock:
+            rows = self._get_connection().execute("""
+                SELECT shard, owner, token, expires_at, completed_at
+                FROM shard_leases ORDER BY shard
+            """).fetchall()
+        columns = ['shard', 'owner', 'token', 'expires_at', 'completed_at']
+        return [dict(zip(columns, row)) for row in rows]
+
+    def _shard_of(self, startup_id: int) -> Optional[int]:
+        return shard_for(startup_id, self.shard_count) if self.shard_count else None
+
+    def _assign_shards(self, conn: sqlite3.Connection):
+        """Set the shard of company jobs created before the backlog was sharded.
+
+        Also picks up jobs another process inserted without knowing the
+        shard count; finding none is a single index lookup.
+        """
+        if not self.shard_count:
+            return
+        unassigned = conn.execute(
+            "SELECT id, startup_id FROM jobs WHERE kind = 'company' AND shard IS NULL"
+        ).fetchall()
+        conn.executemany("UPDATE jobs SET shard = ? WHERE id = ?",
+                         [(self._shard_of(startup_id), job_id) for job_id, startup_id in unassigned])
+
+    def _check_fence(self, conn: sqlite3.Connection):
+        """Reject the current transaction if the write fence's lease was taken over.
+
+        Runs as an UPDATE so the write lock is held from the check until commit.
+        """
+        if self.write_fence is None:
+            return
+        shard, token = self.write_fence
+        cursor = conn.execute(
+            "UPDATE shard_leases SET owner = owner WHERE shard = ? AND token = ?", (shard, token)
+        )
+        if cursor.rowcount != 1:
+            raise LeaseLostError(f"Lease on shard {shard} with token {token} is no longer held")
+
+    def _ensure_column(self, cursor, table: str, column: str, declaration: str):
+        """Add a column to an existing table if an older schema lacks it."""
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+    def _get_due_jobs(self, kind: str, initial_state: str) -> List[tuple]:
+        try:
+            with self._lock:
+                cursor = self._get_connection().cursor()
                 cursor.execute("""
-                    INSERT OR REPLACE INTO enriched_data 
-                    (startup_id, company_url, employees, funding, mission, 
-                     vision, email, product, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    startup_id,
-                    data['company_url'],
-                    data['employees'],
-                    data['funding'],
-                    data['mission'],
-                    data['vision'],
-                    data['email'],
-                    data['product']
-                ))
-                
-                conn.commit()
-            logger.info(f"Saved enriched data for startup ID {startup_id}")
+                    SELECT startup_id, job_key
+                    FROM jobs
+                    WHERE kind = ?
+                      AND (state = ?
+                           OR (state = ? AND attempts < ?
+                               AND (next_retry_at IS NULL OR next_retry_at <= CURRENT_TIMESTAMP)))
+                    ORDER BY attempts, id
+                """, (kind, initial_state, JOB_FAILED, self.max_attempts))
+                return cursor.fetchall()
         except Exception as e:
-            logger.error(f"Database error while saving enriched data: {str(e)}")
+            logger.error(f"Error getting pending {kind} jobs: {str(e)}")
+            return []
+
+    def _set_job_state(self, kind: str, job_key, state: str):
+        try:
+            with self._lock:
+                conn = self._get_connection()
+                with conn:
+                    conn.execute("""
+                        UPDATE jobs SET state = ?, last_error = NULL, next_retry_at = NULL,
+                                        updated_at = CURRENT_TIMESTAMP
+                        WHERE kind = ? AND job_key = ?
+                    """, (state, kind, str(job_key)))
+        except Exception as e:
+            logger.error(f"Database error while updating {kind} job: {str(e)}")
             raise
 
+    def close(self):
+        """Flush buffered writes and close the shared connection."""
+        self._stop_flusher.set()
+        if self._flusher:
+            self._flusher.join()
+            self._flusher = None
+        with self._lock:
+            try:
+                self.flush()
+            finally:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
     def get_startups_without_enrichment(self) -> List[tuple]:
         """Get startups that haven't been enriched yet."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            self.flush()
+            with self._lock:
+                cursor = self._get_connection().cursor()
                 
                 cursor.execute("""
                     SELECT s.id, s.company_name 
@@ -97,28 +808,151 @@ class EnhancedDatabaseManager:
             return []
 
     def get_all_enriched_data(self) -> List[Dict]:
-        """Get all startups with their enriched data."""
+        """Get all startups with their enriched data.
+
+        Loads everything into memory; use iter_enriched_data for large tables.
+        """
+        columns = ['company_name'] + ENRICHED_FIELDS
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT 
-                        s.company_name,
-                        e.company_url,
-                        e.employees,
-                        e.funding,
-                        e.mission,
-                        e.vision,
-                        e.email,
-                        e.product
-                    FROM startups s
-                    JOIN enriched_data e ON s.id = e.startup_id
-                """)
-                
-                columns = ['company_name', 'company_url', 'employees', 'funding',
-                          'mission', 'vision', 'email', 'product']
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return [{column: row[column] for column in columns} for row in self.iter_enriched_data()]
         except Exception as e:
             logger.error(f"Error getting enriched data: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def get_enriched_page(self, cursor: Optional[int] = None, limit: int = 100,
+                          **filters) -> Tuple[List[Dict], Optional[int]]:
+        """One page of enriched rows after cursor, plus the cursor of the next page.
+
+        Pagination is keyed on the row id rather than OFFSET, so every page
+        costs the same however deep into the table it is. Filters are those
+        of iter_enriched_data. The next cursor is None on the last page.
+        """
+        where, params = self._enriched_filters(**filters)
+        where.append("e.id > ?")
+        params.append(cursor or 0)
+        try:
+            self.flush()
+            with self._lock:
+                rows = self._get_connection().execute(f"""
+                    SELECT e.id, s.id, s.company_name, e.company_url, e.employees, e.funding,
+                           e.mission, e.vision, e.email, e.product, e.domain, e.last_updated
+                    FROM enriched_data e
+                    JOIN startups s ON s.id = e.startup_id
+                    WHERE {' AND '.join(where)}
+                    ORDER BY e.id
+                    LIMIT ?
+                """, params + [limit]).fetchall()
+        except Exception as e:
+            logger.error(f"Error reading enriched data: {str(e)}")
+            raise
+        page = [dict(zip(EXPORT_COLUMNS, row[1:])) for row in rows]
+        next_cursor = rows[-1][0] if len(rows) == limit else None
+        return page, next_cursor
+
+    def iter_enriched_data(self, batch_size: int = 1000, **filters) -> Iterator[Dict]:
+        """Stream enriched rows in constant memory, one page at a time.
+
+        Filters: since (last_updated >= timestamp), domain, has_email (bool),
+        ids (iterable of startup ids) and match (FTS query over mission,
+        vision and product). The lock is only held while a page is read, so
+        writers keep going while a consumer works through millions of rows.
+        """
+        cursor = None
+        while True:
+            page, cursor = self.get_enriched_page(cursor, batch_size, **filters)
+            yield from page
+            if cursor is None:
+                return
+
+    def search_enriched(self, query: str, limit: int = 50) -> List[Dict]:
+        """Rows whose mission, vision or product best match a full-text query."""
+        try:
+            self.flush()
+            with self._lock:
+                if self.fts_enabled:
+                    rows = self._get_connection().execute("""
+                        SELECT s.id, s.company_name, e.company_url, e.employees, e.funding,
+                               e.mission, e.vision, e.email, e.product, e.domain, e.last_updated
+                        FROM enriched_fts f
+                        JOIN enriched_data e ON e.id = f.rowid
+                        JOIN startups s ON s.id = e.startup_id
+                        WHERE enriched_fts MATCH ?
+                        ORDER BY bm25(enriched_fts)
+                        LIMIT ?
+                    """, (query, limit)).fetchall()
+                else:
+                    like = f"%{query}%"
+                    rows = self._get_connection().execute("""
+                        SELECT s.id, s.company_name, e.company_url, e.employees, e.funding,
+                               e.mission, e.vision, e.email, e.product, e.domain, e.last_updated
+                        FROM enriched_data e
+                        JOIN startups s ON s.id = e.startup_id
+                        WHERE e.mission LIKE ? OR e.vision LIKE ? OR e.product LIKE ?
+                        LIMIT ?
+                    """, (like, like, like, limit)).fetchall()
+            return [dict(zip(EXPORT_COLUMNS, row)) for row in rows]
+        except Exception as e:
+            logger.error(f"Error searching enriched data: {str(e)}")
+            return []
+
+    def _enriched_filters(self, since: Optional[str] = None, domain: Optional[str] = None,
+                          has_email: Optional[bool] = None, ids=None,
+                          match: Optional[str] = None) -> Tuple[List[str], List]:
+        where, params = ["1 = 1"], []
+        if since:
+            where.append("e.last_updated >= ?")
+            params.append(since)
+        if domain:
+            where.append("e.domain = ?")
+            params.append(domain.lower())
+        if has_email is not None:
+            where.append("e.email != ''" if has_email else "e.email = ''")
+        if ids is not None:
+            ids = list(ids)
+            where.append(f"e.startup_id IN ({','.join('?' * len(ids)) or 'NULL'})")
+            params.extend(ids)
+        if match:
+            if not self.fts_enabled:
+                raise ValueError("Full-text search needs an SQLite build with FTS5")
+            where.append("e.id IN (SELECT rowid FROM enriched_fts WHERE enriched_fts MATCH ?)")
+            params.append(match)
+        return where, params
+
+    def _init_fts(self, cursor) -> bool:
+        """Create the FTS5 index over mission/vision/product, kept current by triggers."""
+        try:
+            exists = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'enriched_fts'"
+            ).fetchone()
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS enriched_fts
+                USING fts5(mission, vision, product, content='enriched_data', content_rowid='id')
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, text search falls back to LIKE: {str(e)}")
+            return False
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS enriched_fts_insert AFTER INSERT ON enriched_data BEGIN
+                INSERT INTO enriched_fts(rowid, mission, vision, product)
+                VALUES (new.id, new.mission, new.vision, new.product);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS enriched_fts_delete AFTER DELETE ON enriched_data BEGIN
+                INSERT INTO enriched_fts(enriched_fts, rowid, mission, vision, product)
+                VALUES ('delete', old.id, old.mission, old.vision, old.product);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS enriched_fts_update AFTER UPDATE ON enriched_data BEGIN
+                INSERT INTO enriched_fts(enriched_fts, rowid, mission, vision, product)
+                VALUES ('delete', old.id, old.mission, old.vision, old.product);
+                INSERT INTO enriched_fts(rowid, mission, vision, product)
+                VALUES (new.id, new.mission, new.vision, new.product);
+            END
+        """)
+        if not exists:
+            # Index rows written before the FTS table existed
+            cursor.execute("INSERT INTO enriched_fts(enriched_fts) VALUES ('rebuild')")
+        return True
@@ -0,0 +1,120 @@
+# dedup.py
+import re
+import threading
+import unicodedata
+import zlib
+import random
+import logging
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Legal-form and filler words that don't distinguish one company from another
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'llp', 'lp', 'ltd', 'limited', 'corp', 'corporation',
+    'co', 'company', 'gmbh', 'ag', 'sa', 'sas', 'srl', 'plc', 'pty', 'bv', 'nv', 'oy', 'ab'
+}
+# Anything but letters and digits, in any script
+NON_ALNUM = re.compile(r'[\W_]+')
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_name(name: str) -> str:
+    """Canonical key for a company name: accent-, case- and legal-form-insensitive."""
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = text.replace('&', ' and ')
+    tokens = NON_ALNUM.sub(' ', text).split()
+
+    if tokens and tokens[0] == 'the':
+        tokens = tokens[1:]
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def shingles(key: str, size: int = 3) -> Set[str]:
+    """Character n-grams of a normalized key, padded so short names still have some."""
+    padded = f" {key} "
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+class NameIndex:
+    """Near-duplicate company name index using MinHash LSH.
+
+    Names are first compared by their normalized key, which catches case,
+    punctuation and legal-suffix variants in O(1). Otherwise the key's
+    character 3-grams are MinHashed into ``bands`` buckets, and only names
+    sharing a bucket are compared by exact Jaccard similarity, so a lookup
+    touches a handful of candidates rather than every known name.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 32, bands: int = 8, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._keys: Dict[str, int] = {}
+        self._shingles: Dict[int, Set[str]] = {}
+        self._buckets: List[Dict[tuple, List[int]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._shingles)
+
+    def add(self, entity_id: int, name: str) -> str:
+        """Index a name under an entity id; returns its normalized key."""
+        key = normalize_name(name)
+        if not key:
+            return key
+        grams = shingles(key)
+        signature = self._signature(grams)
+        with self._lock:
+            self._keys.setdefault(key, entity_id)
+            self._shingles[entity_id] = grams
+            for band, bucket in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(bucket, []).append(entity_id)
+        return key
+
+    def resolve(self, name: str) -> Optional[int]:
+        """Entity id of an already indexed near-duplicate of name, if any."""
+        key = normalize_name(name)
+        if not key:
+            return None
+
+        with self._lock:
+            exact = self._keys.get(key)
+        if exact is not None:
+            return exact
+
+        grams = shingles(key)
+        signature = self._signature(grams)
+        best_id, best_score = None, self.threshold
+        with self._lock:
+            candidates = set()
+            for band, bucket in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(bucket, ()))
+            for candidate in candidates:
+                other = self._shingles[candidate]
+                score = len(grams & other) / len(grams | other)
+                if score >= best_score:
+                    best_id, best_score = candidate, score
+        return best_id
+
+    def _signature(self, grams: Set[str]) -> List[int]:
+        hashes = [zlib.crc32(gram.encode('utf-8')) for gram in grams]
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, signature: List[int]):
+        for band in range(self.bands):
+            yield tuple(signature[band * self.rows:(band + 1) * self.rows])
@@ -0,0 +1,138 @@
+# discovery.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, quote_plus, urlparse
+
+from metrics import PARSE
+from parsers import LxmlParser
+from webutil import registered_domain
+
+logger = logging.getLogger(__name__)
+
+class SearchBackend:
+    """One search engine: how to build a result page URL and read its links."""
+
+    def __init__(self, name: str, search_url: str, page_param: Optional[str] = None,
+                 page_size: int = 10, first_result: int = 0, result_selector: Optional[str] = None):
+        self.name = name
+        self.search_url = search_url
+        self.page_param = page_param
+        self.page_size = page_size
+        self.first_result = first_result
+        self.result_selector = result_selector
+
+    def url(self, query: str, page: int = 0) -> str:
+        url = self.search_url + quote_plus(query)
+        if page and self.page_param:
+            url += f"&{self.page_param}={self.first_result + page * self.page_size}"
+        return url
+
+    def links(self, html: str, parser: LxmlParser) -> List[str]:
+        """Absolute result URLs in page order."""
+        hrefs = parser.hrefs(html, self.result_selector) if self.result_selector else []
+        if not hrefs:
+            # Markup changes often; fall back to every absolute link on the page
+            hrefs = parser.hrefs(html, 'a[href]')
+        links = []
+        for href in hrefs:
+            href = self.unwrap(href or '')
+            if href.startswith('http'):
+                links.append(href)
+        return links
+
+    def unwrap(self, href: str) -> str:
+        """Target of a redirect link (/url?q=..., /l/?uddg=...), else the link itself."""
+        parsed = urlparse(href)
+        if parsed.path in ('/url', '/l/'):
+            query = parse_qs(parsed.query)
+            for key in ('q', 'url', 'uddg'):
+                if query.get(key):
+                    return query[key][0]
+        return href
+
+
+def make_backend(name: str, search_url: Optional[str] = None) -> SearchBackend:
+    """Search backend by name; search_url overrides its default endpoint."""
+    if name == 'bing':
+        return SearchBackend('bing', search_url or "https://www.bing.com/search?q=",
+                             page_param='first', first_result=1, result_selector='li.b_algo h2 a')
+    if name == 'google':
+        return SearchBackend('google', search_url or "https://www.google.com/search?q=",
+                             page_param='start', result_selector='div.g div.yuRUbf > a')
+    if name == 'duckduckgo':
+        return SearchBackend('duckduckgo', search_url or "https://html.duckduckgo.com/html/?q=",
+                             page_param='s', result_selector='a.result__a')
+    raise ValueError(f"Unknown search backend {name!r}; choose from bing, google, duckduckgo")
+
+
+class SiteDiscovery:
+    """Finds directory sites by running every query on every backend at once.
+
+    Each (backend, query, page) search runs on a small thread pool over the
+    fetcher's pooled HTTP session; the per-host throttle still spaces out
+    requests to any one engine. Results are deduplicated by registered
+    domain, then ranked by how many companies sites on that domain yielded
+    in earlier runs. Unknown domains rank at the median known yield, so new
+    sources still get tried.
+    """
+
+    def __init__(self, search_engine, backends: Sequence[SearchBackend], pages: int = 2,
+                 workers: int = 4, max_per_domain: int = 1):
+        self.search_engine = search_engine
+        self.backends = list(backends)
+        self.pages = max(1, pages)
+        self.workers = max(1, workers)
+        self.max_per_domain = max(1, max_per_domain)
+        self.parser = LxmlParser([])
+
+    def discover(self, queries: Iterable[str], max_sites: int = 20,
+                 source_yields: Optional[Dict[str, float]] = None) -> List[str]:
+        """Up to max_sites candidate directory URLs, best sources first."""
+        searches = [
+            (query_index, page, backend_index, backend, query)
+            for query_index, query in enumerate(queries)
+            for page in range(self.pages)
+            for backend_index, backend in enumerate(self.backends)
+        ]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='discovery') as pool:
+            pages = list(pool.map(lambda search: self._search(search[3], search[4], search[1]), searches))
+
+        # Order of first appearance, independent of which search finished first
+        found: Dict[str, Tuple[tuple, str]] = {}
+        for (query_index, page, backend_index, _, _), links in zip(searches, pages):
+            for rank, url in enumerate(links):
+                position = (page, rank, query_index, backend_index)
+                if url not in found or position < found[url][0]:
+                    found[url] = (position, url)
+
+        return self.rank([url for _, url in sorted(found.values())], max_sites, source_yields or {})
+
+    def rank(self, urls: List[str], max_sites: int, source_yields: Dict[str, float]) -> List[str]:
+        """Keep max_per_domain URLs per registered domain and order by past yield."""
+        known = sorted(source_yields.values())
+        prior = known[len(known) // 2] if known else 0.0
+
+        per_domain: Dict[str, int] = {}
+        kept = []
+        for order, url in enumerate(urls):
+            domain = registered_domain(url)
+            if per_domain.get(domain, 0) >= self.max_per_domain:
+                continue
+            per_domain[domain] = per_domain.get(domain, 0) + 1
+            kept.append((-source_yields.get(domain, prior), order, url))
+
+        kept.sort()
+        return [url for _, _, url in kept[:max_sites]]
+
+    def _search(self, backend: SearchBackend, query: str, page: int = 0) -> List[str]:
+        url = backend.url(query, page)
+        logger.info(f"Searching {backend.name} for: {query} (page {page + 1})")
+        try:
+            result = self.search_engine.fetcher.fetch(url, source='search')
+            with PARSE.time(stage='search'):
+                links = backend.links(result.html, self.parser)
+        except Exception as e:
+            logger.error(f"Error searching {backend.name} for {query}: {str(e)}")
+            return []
+        return [link for link in links if self.search_engine.is_valid_source(link)]
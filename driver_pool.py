@@ -0,0 +1,206 @@
+# driver_pool.py
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from metrics import DRIVER_LEASE
+
+logger = logging.getLogger(__name__)
+
+
+class PooledDriver:
+    """Bookkeeping for a single Chrome driver owned by the pool."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """Fixed-size pool of reusable Chrome drivers.
+
+    Drivers are created lazily up to ``size``, leased to one caller at a time
+    and returned afterwards. A driver is health-checked before it is handed
+    out, reset between leases, and recycled after ``max_uses`` leases or once
+    its browser process tree grows past ``max_memory_mb``.
+    """
+
+    def __init__(self, factory: Callable, size: int = 1, max_uses: int = 50,
+                 max_memory_mb: int = 1024, acquire_timeout: float = 300):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: List[PooledDriver] = []
+        self._leased: Dict[int, PooledDriver] = {}
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Lease a driver for the duration of a ``with`` block."""
+        with DRIVER_LEASE.time():
+            driver = self.acquire(timeout)
+        discard = False
+        try:
+            yield driver
+        except Exception:
+            # A failing page may leave the browser in a bad state
+            discard = not self._is_healthy(driver)
+            raise
+        finally:
+            self.release(driver, discard=discard)
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Take a healthy driver from the pool, creating one if allowed."""
+        deadline = time.time() + (timeout if timeout is not None else self.acquire_timeout)
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+
+                pooled = self._idle.pop() if self._idle else None
+                create = pooled is None and self._created < self.size
+                if create:
+                    # Reserve the slot before releasing the lock to spawn
+                    self._created += 1
+
+                if pooled is None and not create:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a Chrome driver")
+                    self._cond.wait(remaining)
+                    continue
+
+            if create:
+                try:
+                    pooled = PooledDriver(self.factory())
+                except Exception:
+                    with self._cond:
+                        self._created -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(pooled.driver):
+                logger.warning("Discarding unhealthy Chrome driver")
+                self._destroy(pooled)
+                continue
+
+            pooled.uses += 1
+            with self._cond:
+                self._leased[id(pooled.driver)] = pooled
+            return pooled.driver
+
+    def release(self, driver, discard: bool = False):
+        """Return a leased driver, recycling it when it is worn out."""
+        with self._cond:
+            pooled = self._leased.pop(id(driver), None)
+        if pooled is None:
+            return
+
+        if not discard and not self._closed:
+            if pooled.uses >= self.max_uses:
+                logger.info(f"Recycling Chrome driver after {pooled.uses} uses")
+                discard = True
+            elif self.max_memory_mb and self._memory_mb(driver) > self.max_memory_mb:
+                logger.info("Recycling Chrome driver over memory limit")
+                discard = True
+            else:
+                discard = not self._reset(driver)
+
+        if discard or self._closed:
+            self._destroy(pooled)
+            return
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def close(self):
+        """Quit every driver; leased drivers are quit when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._destroy(pooled)
+
+    def _destroy(self, pooled: PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _is_healthy(self, driver) -> bool:
+        """Cheap round-trip to make sure the browser still responds."""
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _reset(self, driver) -> bool:
+        """Close extra tabs and clear cookies so leases don't leak state."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            # delete_all_cookies only covers the current origin, CDP clears all
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to reset Chrome driver: {str(e)}")
+            return False
+
+    def _memory_mb(self, driver) -> float:
+        """Resident memory of chromedriver and its browser processes."""
+        try:
+            root_pid = driver.service.process.pid
+        except Exception:
+            return 0.0
+        return _process_tree_rss_kb(root_pid) / 1024.0
+
+
+def _process_tree_rss_kb(root_pid: int) -> int:
+    """Sum VmRSS over a process and its descendants using /proc (Linux only)."""
+    children: Dict[int, List[int]] = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # The command name may contain spaces, so split after it
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                children.setdefault(ppid, []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        return 0
+
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total
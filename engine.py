@@ -0,0 +1,189 @@
+# engine.py
+import queue
+import threading
+import time
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from metrics import COMPANIES, FAILURES, QUEUE_WAIT
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling a worker to exit
+_STOP = object()
+
+
+class StageMetrics:
+    """Counters and timings for one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.time()
+        self.first_output_at = None
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+
+    def record_input(self, queue_depth: int = 0, blocked: float = 0.0):
+        """An item entered the stage; blocked is time the producer waited for room."""
+        with self._lock:
+            self.items_in += 1
+            self.blocked_seconds += blocked
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def record_output(self, busy: float, produced: int = 1):
+        with self._lock:
+            self.items_out += produced
+            self.busy_seconds += busy
+            if produced and self.first_output_at is None:
+                self.first_output_at = time.time()
+
+    def record_error(self, busy: float):
+        with self._lock:
+            self.errors += 1
+            self.busy_seconds += busy
+
+    def summary(self, since: Optional[float] = None) -> Dict[str, float]:
+        """Snapshot of the stage; times to first output are relative to ``since``."""
+        with self._lock:
+            elapsed = max(time.time() - self.started_at, 1e-9)
+            origin = since if since is not None else self.started_at
+            return {
+                'in': self.items_in,
+                'out': self.items_out,
+                'errors': self.errors,
+                'per_second': round(self.items_out / elapsed, 3),
+                'busy_seconds': round(self.busy_seconds, 3),
+                'blocked_seconds': round(self.blocked_seconds, 3),
+                'max_queue_depth': self.max_queue_depth,
+                'first_output_seconds': (
+                    round(self.first_output_at - origin, 3) if self.first_output_at else None
+                )
+            }
+
+
+class EnrichmentEngine:
+    """Runs company enrichment on a fixed set of worker threads.
+
+    Work is fed through a bounded queue so producers block instead of
+    buffering the whole backlog in memory. Politeness is enforced per host by
+    the search engine's throttle, not by sleeping between companies.
+    """
+
+    def __init__(self, enricher, db_manager, workers: int = 4, queue_size: int = 100):
+        self.enricher = enricher
+        self.db_manager = db_manager
+        self.workers = max(1, workers)
+
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.enriched = 0
+        self.failed = 0
+        self.metrics = StageMetrics('enrich')
+
+    def start(self):
+        """Spawn the worker threads."""
+        self.metrics.started_at = time.time()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"enricher-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, startup_id: int, company_name: str, timeout: Optional[float] = None) -> bool:
+        """Queue a company, blocking while the queue is full; False once stopping."""
+        start = time.time()
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put((startup_id, company_name, time.time()), timeout=timeout or 1.0)
+                self.metrics.record_input(self._queue.qsize(), time.time() - start)
+                return True
+            except queue.Full:
+                if timeout is not None:
+                    return False
+        return False
+
+    def run(self, startups: Iterable[Tuple[int, str]]):
+        """Enrich every startup and wait for the workers to finish."""
+        self.start()
+        for startup_id, company_name in startups:
+            if not self.submit(startup_id, company_name):
+                break
+        self.join()
+
+    def join(self):
+        """Signal end of input and wait for queued work to drain."""
+        for _ in self._threads:
+            self._put_stop()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def stop(self):
+        """Request a clean shutdown; in-flight companies are allowed to finish."""
+        if self._stop_event.is_set():
+            return
+        logger.info("Stopping enrichment workers")
+        # Workers skip any queued companies and exit once the queue drains
+        self._stop_event.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop_event.is_set()
+
+    def _put_stop(self):
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(_STOP, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+
+    def _worker(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    return
+                continue
+            if item is _STOP:
+                return
+            if self._stop_event.is_set():
+                continue
+
+            startup_id, company_name, queued_at = item
+            start = time.time()
+            QUEUE_WAIT.observe(start - queued_at, stage='enrich')
+            try:
+                logger.info(f"Enriching data for: {company_name}")
+                with span(company_name, 'company', startup_id=startup_id):
+                    enriched_data = self.enricher.enrich_company_data(company_name)
+
+                # Without a company URL nothing was found; retry later instead of
+                # saving an empty row that would hide the company for good
+                if enriched_data and enriched_data.get('company_url'):
+                    self.db_manager.save_enriched_data(startup_id, enriched_data)
+                    with self._lock:
+                        self.enriched += 1
+                    COMPANIES.inc(outcome='enriched')
+                    self.metrics.record_output(time.time() - start)
+                else:
+                    self._record_failure(startup_id, "No company URL found", start)
+
+            except Exception as e:
+                logger.error(f"Error enriching {company_name}: {str(e)}")
+                self._record_failure(startup_id, str(e), start)
+
+    def _record_failure(self, startup_id: int, error: str, start: float):
+        self.db_manager.mark_job_failed('company', startup_id, error)
+        with self._lock:
+            self.failed += 1
+        FAILURES.inc(stage='enrich')
+        self.metrics.record_error(time.time() - start)
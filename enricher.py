@@ -1,20 +1,37 @@
 # enricher.py
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import logging
-import time
-import random
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
 from urllib.parse import quote
+from extraction import PatternExtractor
+from parsers import make_parser
+from metrics import EXTRACT, PARSE
+from refresh import PageFingerprint
+from structured import TRUSTED_CONFIDENCE, extract_structured
+from tracing import hot_path, page_scope
+from subpages import SUBPAGE_KINDS, FieldMerger, adjust_confidence, find_subpages, plan_subpages
 
 logger = logging.getLogger(__name__)
 
 class StartupEnricher:
-    def __init__(self, search_engine):
+    def __init__(self, search_engine, search_url="https://www.google.com/search?q=", parser='lxml',
+                 resolver=None, max_subpages=3, subpage_workers=3):
         self.search_engine = search_engine
+        self.search_url = search_url
+
+        # About/team/contact/careers pages fetched when the homepage leaves
+        # fields empty, several at a time over the fetcher's pooled session
+        self.max_subpages = max_subpages
+        self.subpage_workers = max(1, subpage_workers)
+
+        # Optional CompanyResolver; without one every company is searched for
+        self.resolver = resolver
+        self.result_selector = 'div.g div.yuRUbf > a'
+
+        # Search result links only need a compiled selector, not a full soup;
+        # company pages still get BeautifulSoup for the pattern extractor
+        self.parser = make_parser(parser, [self.result_selector])
         
         # Common patterns for company information
         self.patterns = {
@@ -54,58 +71,154 @@ class StartupEnricher:
             ]
         }
 
+        # Matches every field's patterns in a single walk of the page
+        self.extractor = PatternExtractor(self.patterns)
+        # Extractors for just the fields structured data left open, by field set
+        self._extractors = {tuple(self.patterns): self.extractor}
+
     def enrich_company_data(self, company_name: str) -> Dict[str, str]:
         """Search for and extract enriched data for a given company."""
-        driver = None
         try:
-            driver = self.search_engine.get_chrome_driver()
+            fetcher = self.search_engine.fetcher
             
-            # Search for company
-            search_query = f"{company_name} company about"
-            driver.get(f"https://www.google.com/search?q={quote(search_query)}")
-            time.sleep(random.uniform(2, 4))
-            
-            # Get the first relevant result
-            company_url = self._get_company_url(driver)
+            if self.resolver:
+                company_url = self.resolver.resolve(company_name)
+            else:
+                company_url = self._search_company_url(company_name)
             if not company_url:
                 return self._empty_result()
             
             # Visit company website
-            driver.get(company_url)
-            time.sleep(random.uniform(3, 5))
-            
-            # Extract information
-            soup = BeautifulSoup(driver.page_source, 'lxml')
+            try:
+                page = fetcher.fetch(company_url, source='company')
+            except Exception:
+                # A cached homepage that no longer loads shouldn't be reused
+                if self.resolver:
+                    self.resolver.forget(company_name)
+                raise
             
             return {
                 'company_url': company_url,
-                'employees': self._extract_employees(soup),
-                'funding': self._extract_funding(soup),
-                'mission': self._extract_mission(soup),
-                'vision': self._extract_vision(soup),
-                'email': self._extract_email(soup),
-                'product': self._extract_product(soup)
+                **self.extract_company(company_url, page),
+                # Lets a later refresh tell whether the page changed
+                'fingerprint': PageFingerprint.from_result(page)
             }
             
         except Exception as e:
             logger.error(f"Error enriching data for {company_name}: {str(e)}")
             return self._empty_result()
-        finally:
-            if driver:
-                driver.quit()
 
-    def _get_company_url(self, driver) -> Optional[str]:
+    def extract_company(self, company_url: str, page) -> Dict[str, str]:
+        """Fields from a company's homepage, completed from its subpages.
+
+        Subpages are fetched in waves: each wave takes the fewest pages
+        that between them could fill every still-empty field and fetches
+        them concurrently. Each field keeps its most confident value across
+        pages, and fetching stops once every field is filled or
+        ``max_subpages`` pages were read.
+        """
+        merger = FieldMerger(self.patterns)
+        with page_scope(page.url or company_url):
+            merger.merge(self.extract_scored(page.html))
+        if not merger.missing() or not self.max_subpages:
+            return merger.values()
+
+        subpages = find_subpages(page.html, page.url or company_url)
+        candidates = plan_subpages(subpages, merger.missing(), len(subpages))
+        fetcher = self.search_engine.fetcher
+        fetched = 0
+
+        def fetch(subpage):
+            try:
+                return fetcher.fetch(subpage[1], source='company', render_failures=False)
+            except Exception as e:
+                logger.debug(f"Error fetching {subpage[1]}: {str(e)}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.subpage_workers, thread_name_prefix='subpage') as pool:
+            while candidates and fetched < self.max_subpages and merger.missing():
+                wave, uncovered = [], merger.missing()
+                for kind, url in candidates:
+                    if SUBPAGE_KINDS[kind][1] & uncovered and fetched + len(wave) < self.max_subpages:
+                        wave.append((kind, url))
+                        uncovered -= SUBPAGE_KINDS[kind][1]
+                if not wave:
+                    break
+                candidates = [candidate for candidate in candidates if candidate not in wave]
+                fetched += len(wave)
+                for (kind, url), result in zip(wave, pool.map(fetch, wave)):
+                    if result is not None:
+                        with page_scope(result.url or url):
+                            merger.merge(adjust_confidence(self.extract_scored(result.html), kind))
+        return merger.values()
+
+    def extract_fields(self, page_source: str) -> Dict[str, str]:
+        """Extract the enrichment fields from a company page's HTML."""
+        return {field: text for field, (text, _) in self.extract_scored(page_source).items()}
+
+    @hot_path
+    def extract_scored(self, page_source: str) -> Dict[str, Tuple[str, float]]:
+        """(text, confidence) of every enrichment field on a page.
+
+        JSON-LD, microdata, mailto links and meta descriptions are read
+        first with cheap scans. The page is only parsed for the pattern
+        heuristics when some field has no trusted structured value, and
+        then only those fields are looked for.
+        """
+        with EXTRACT.time(stage='structured'):
+            structured = extract_structured(page_source)
+        missing = tuple(
+            field for field in self.patterns
+            if structured.get(field, ('', 0.0))[1] < TRUSTED_CONFIDENCE
+        )
+        scored = {field: structured.get(field, ('', 0.0)) for field in self.patterns}
+        if not missing:
+            return scored
+
+        extractor = self._extractors.get(missing)
+        if extractor is None:
+            extractor = self._extractors[missing] = PatternExtractor(
+                {field: self.patterns[field] for field in missing}
+            )
+
+        with PARSE.time(stage='enrich'):
+            soup = BeautifulSoup(page_source, 'lxml')
+        
+        with EXTRACT.time(stage='enrich'):
+            for field, (text, confidence) in extractor.extract_scored(soup).items():
+                # Heuristics beat a page description, but not nothing
+                if text and confidence > scored[field][1]:
+                    scored[field] = (text, confidence)
+        return scored
+
+    def _search_company_url(self, company_name: str) -> Optional[str]:
+        """Find a company's homepage through the search engine."""
+        fetcher = self.search_engine.fetcher
+        
+        # Search for company
+        search_query = f"{company_name} company about"
+        search_url = f"{self.search_url}{quote(search_query)}"
+        result = fetcher.fetch(search_url, source='search')
+        
+        # Get the first relevant result
+        company_url = self._get_company_url(result.html)
+        if not company_url and result.via == 'http':
+            result = fetcher.render(search_url, source='search')
+            company_url = self._get_company_url(result.html)
+        return company_url
+
+    def _get_company_url(self, html: str) -> Optional[str]:
         """Extract the first relevant company URL from search results."""
         try:
             # Get all search result links
-            links = driver.find_elements(By.CSS_SELECTOR, 'div.g div.yuRUbf > a')
+            with PARSE.time(stage='search'):
+                hrefs = self.parser.hrefs(html, self.result_selector)
             
             # Filter out unwanted domains
             blacklist = {'linkedin.com', 'facebook.com', 'twitter.com', 'crunchbase.com'}
             
-            for link in links:
-                url = link.get_attribute('href')
-                if not any(domain in url for domain in blacklist):
+            for url in hrefs:
+                if url and not any(domain in url for domain in blacklist):
                     return url
             
             return None
@@ -114,50 +227,8 @@ class StartupEnricher:
             return None
 
     def _extract_by_patterns(self, soup: BeautifulSoup, patterns: list) -> str:
-        """Extract text based on common patterns."""
-        for pattern in patterns:
-            # Try different selectors
-            selectors = [
-                f'[id*="{pattern}"]',
-                f'[class*="{pattern}"]',
-                f'h1:contains("{pattern}")',
-                f'h2:contains("{pattern}")',
-                f'h3:contains("{pattern}")',
-                f'p:contains("{pattern}")'
-            ]
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                for element in elements:
-                    text = element.get_text(strip=True)
-                    if text and len(text) > 10:  # Avoid very short snippets
-                        return text
-        
-        return ""
-
-    def _extract_employees(self, soup: BeautifulSoup) -> str:
-        """Extract employee count information."""
-        return self._extract_by_patterns(soup, self.patterns['employees'])
-
-    def _extract_funding(self, soup: BeautifulSoup) -> str:
-        """Extract funding information."""
-        return self._extract_by_patterns(soup, self.patterns['funding'])
-
-    def _extract_mission(self, soup: BeautifulSoup) -> str:
-        """Extract company mission."""
-        return self._extract_by_patterns(soup, self.patterns['mission'])
-
-    def _extract_vision(self, soup: BeautifulSoup) -> str:
-        """Extract company vision."""
-        return self._extract_by_patterns(soup, self.patterns['vision'])
-
-    def _extract_email(self, soup: BeautifulSoup) -> str:
-        """Extract contact email."""
-        return self._extract_by_patterns(soup, self.patterns['email'])
-
-    def _extract_product(self, soup: BeautifulSoup) -> str:
-        """Extract product information."""
-        return self._extract_by_patterns(soup, self.patterns['product'])
+        """Extract text for a single field based on common patterns."""
+        return PatternExtractor({'field': patterns}).extract(soup)['field']
 
     def _empty_result(self) -> Dict[str, str]:
         """Return empty result structure."""
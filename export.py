@@ -0,0 +1,121 @@
+# export.py
+import os
+import csv
+import json
+import argparse
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from db1 import EXPORT_COLUMNS, EnhancedDatabaseManager
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for Parquet
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+
+def _batches(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_csv(rows: Iterable[Dict], path: str) -> int:
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_jsonl(rows: Iterable[Dict], path: str) -> int:
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def write_parquet(rows: Iterable[Dict], path: str, batch_size: int = 10000) -> int:
+    """One row group per batch, so only one batch is ever held in memory."""
+    if pq is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    schema = pa.schema(
+        [(column, pa.int64() if column == 'startup_id' else pa.string()) for column in EXPORT_COLUMNS]
+    )
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in _batches(rows, batch_size):
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def export(db_manager, path: str, fmt: Optional[str] = None, batch_size: int = 1000, **filters) -> int:
+    """Stream enriched rows matching filters to path; returns the number written.
+
+    The format comes from the file extension unless given. Rows are read a
+    page at a time through iter_enriched_data, so memory stays flat however
+    large the table is.
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt == 'json':
+        fmt = 'jsonl'
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {', '.join(FORMATS)}")
+
+    rows = db_manager.iter_enriched_data(batch_size=batch_size, **filters)
+    if fmt == 'csv':
+        count = write_csv(rows, path)
+    elif fmt == 'jsonl':
+        count = write_jsonl(rows, path)
+    else:
+        count = write_parquet(rows, path, batch_size=max(batch_size, 10000))
+    logger.info(f"Exported {count} rows to {path}")
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export enriched startup data")
+    parser.add_argument('output', help="Output file (.csv, .jsonl or .parquet)")
+    parser.add_argument('--db-path', default="/app/data/startups.db")
+    parser.add_argument('--format', choices=FORMATS, default=None,
+                        help="Output format (defaults to the file extension)")
+    parser.add_argument('--since', default=None,
+                        help="Only rows updated at or after this timestamp (YYYY-MM-DD[ HH:MM:SS])")
+    parser.add_argument('--domain', default=None, help="Only companies on this registered domain")
+    parser.add_argument('--has-email', action='store_true', help="Only companies with an email")
+    parser.add_argument('--match', default=None,
+                        help="Full-text query over mission, vision and product")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    db_manager = EnhancedDatabaseManager(args.db_path)
+    try:
+        # Adds any missing indexes and the FTS table to older databases
+        db_manager.init_db()
+        export(db_manager, args.output, fmt=args.format, batch_size=args.batch_size,
+               since=args.since, domain=args.domain, has_email=True if args.has_email else None,
+               match=args.match)
+    finally:
+        db_manager.close()
+
+
+if __name__ == '__main__':
+    main()
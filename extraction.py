@@ -0,0 +1,126 @@
+# extraction.py
+import re
+import logging
+from typing import Dict, List, Tuple
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import CData, Comment, Declaration, Doctype, ProcessingInstruction
+
+logger = logging.getLogger(__name__)
+
+# Strings that don't count as element text, matching soupsieve's :contains
+SPECIAL_STRINGS = (Comment, Declaration, CData, ProcessingInstruction, Doctype)
+
+# Selector kinds in the order the original per-pattern selectors were tried:
+# [id*=p], [class*=p], h1:contains(p), h2:contains(p), h3:contains(p), p:contains(p)
+ID, CLASS = 0, 1
+TEXT_TAGS = {'h1': 2, 'h2': 3, 'h3': 4, 'p': 5}
+
+MIN_TEXT_LENGTH = 10
+
+# How much a match is trusted, by selector kind: an element named after the
+# field beats a heading mentioning it, which beats a paragraph that does.
+# Each later pattern in a field's list is trusted a little less.
+KIND_CONFIDENCE = {ID: 0.9, CLASS: 0.85, 2: 0.8, 3: 0.75, 4: 0.7, 5: 0.6}
+RANK_DECAY = 0.9
+
+
+class PatternIndex:
+    """Substring index over all field patterns.
+
+    A single compiled alternation rejects the vast majority of attribute
+    values and texts; only values it hits are checked pattern by pattern.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self.owners: Dict[str, List[Tuple[str, int]]] = {}
+        for field, field_patterns in patterns.items():
+            for rank, pattern in enumerate(field_patterns):
+                self.owners.setdefault(pattern, []).append((field, rank))
+
+        # Longest first so overlapping patterns don't shadow each other
+        ordered = sorted(self.owners, key=len, reverse=True)
+        self.any_pattern = re.compile('|'.join(re.escape(p) for p in ordered)) if ordered else None
+        self.ordered = ordered
+
+    def matches(self, value: str) -> List[Tuple[str, int]]:
+        """(field, pattern rank) pairs for every pattern contained in value."""
+        if not value or self.any_pattern is None or not self.any_pattern.search(value):
+            return []
+        found = []
+        for pattern in self.ordered:
+            if pattern in value:
+                found.extend(self.owners[pattern])
+        return found
+
+
+class PatternExtractor:
+    """Fill every enrichment field in one walk over a parsed page.
+
+    Produces the same result as trying, per field, each pattern with the
+    ``[id*=]``, ``[class*=]``, ``h1-h3:contains`` and ``p:contains`` selectors
+    in turn and taking the first element whose text is longer than ten
+    characters, but visits each element once instead of ~150 ``select`` calls.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self.fields = list(patterns)
+        self.index = PatternIndex(patterns)
+
+    def extract(self, soup: BeautifulSoup) -> Dict[str, str]:
+        """Return the best text for every field ('' when nothing matched)."""
+        return {field: text for field, (text, _) in self.extract_scored(soup).items()}
+
+    def extract_scored(self, soup: BeautifulSoup) -> Dict[str, Tuple[str, float]]:
+        """Best (text, confidence) for every field; ('', 0.0) when nothing matched."""
+        # (field, pattern rank, selector kind) -> first qualifying text
+        found: Dict[Tuple[str, int, int], str] = {}
+
+        for element in soup.descendants:
+            if not isinstance(element, Tag):
+                continue
+
+            candidates = []
+            element_id = element.get('id')
+            if element_id:
+                if not isinstance(element_id, str):
+                    element_id = ' '.join(element_id)
+                candidates.extend((field, rank, ID) for field, rank in self.index.matches(element_id))
+
+            classes = element.get('class')
+            if classes:
+                if not isinstance(classes, str):
+                    classes = ' '.join(classes)
+                candidates.extend((field, rank, CLASS) for field, rank in self.index.matches(classes))
+
+            kind = TEXT_TAGS.get(element.name)
+            if kind is not None:
+                candidates.extend(
+                    (field, rank, kind)
+                    for field, rank in self.index.matches(self._content_text(element))
+                )
+
+            text = None
+            for key in candidates:
+                if key in found:
+                    continue
+                if text is None:
+                    text = element.get_text(strip=True)
+                if text and len(text) > MIN_TEXT_LENGTH:
+                    found[key] = text
+
+        results = {field: ('', 0.0) for field in self.fields}
+        best: Dict[str, Tuple[int, int]] = {}
+        for (field, rank, kind), text in found.items():
+            if field not in best or (rank, kind) < best[field]:
+                best[field] = (rank, kind)
+                results[field] = (text, round(KIND_CONFIDENCE[kind] * RANK_DECAY ** rank, 3))
+        return results
+
+    @staticmethod
+    def _content_text(element: Tag) -> str:
+        """Concatenated descendant text, as soupsieve's :contains sees it."""
+        return ''.join(
+            node for node in element.descendants
+            if isinstance(node, NavigableString) and not isinstance(node, SPECIAL_STRINGS)
+        )
@@ -0,0 +1,222 @@
+# fetcher.py
+import re
+import logging
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import CACHE_LOOKUPS, FAILURES, NAVIGATION, PAGES
+from tracing import traced_page
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Phrases pages show when they need JavaScript to render their content
+NOSCRIPT_MARKERS = (
+    'enable javascript',
+    'javascript is disabled',
+    'javascript is required',
+    'requires javascript',
+    'turn on javascript',
+    'please enable js'
+)
+
+# Empty single-page-app mount points
+EMPTY_APP_ROOT = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>', re.IGNORECASE
+)
+# Phrases on pages served instead of content when a host suspects a bot
+BLOCK_MARKERS = (
+    'captcha',
+    'unusual traffic',
+    'are you a robot',
+    'verify you are human',
+    'automated queries'
+)
+
+SCRIPT_OR_STYLE = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+TAG = re.compile(r'<[^>]+>')
+
+
+class FetchResult:
+    """A fetched page and how it was obtained."""
+
+    def __init__(self, url: str, html: str, status: int = 200, via: str = 'http',
+                 headers: Optional[Dict[str, str]] = None, from_cache: bool = False):
+        self.url = url
+        self.html = html
+        self.status = status
+        self.via = via
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+
+class PageFetcher:
+    """HTTP-first page loader that escalates to a pooled Chrome driver.
+
+    Static pages are fetched over a keep-alive ``requests.Session``. Only
+    responses that fail, aren't HTML, or look JavaScript-rendered are loaded
+    again in a browser leased from the search engine's driver pool. When a
+    ``PageCache`` is given, fresh pages are served from it and stale ones
+    are revalidated with conditional requests.
+    """
+
+    def __init__(self, search_engine, timeout: float = 10, pool_maxsize: int = 20,
+                 min_text_length: int = 200, cache=None, browser_fallback: bool = True):
+        self.search_engine = search_engine
+        self.cache = cache
+        self.browser_fallback = browser_fallback
+        self.timeout = timeout
+        self.min_text_length = min_text_length
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate'
+        })
+
+    @traced_page
+    def fetch(self, url: str, source: str = 'page', scroll: bool = False,
+              timeout: Optional[float] = None, render_failures: bool = True) -> Optional[FetchResult]:
+        """Fetch a page over HTTP, rendering it in Chrome only when needed.
+
+        With render_failures=False a failed HTTP fetch (error status, not
+        HTML, bot check) returns None instead of trying the browser; for
+        optional pages that are as likely missing as JavaScript-rendered.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry.fresh:
+            CACHE_LOOKUPS.inc(result='hit')
+            PAGES.inc(source='cache')
+            return FetchResult(url, entry.html, entry.status, entry.via, from_cache=True)
+        if self.cache:
+            CACHE_LOOKUPS.inc(result='stale' if entry else 'miss')
+
+        # A stale browser-rendered entry can still be revalidated over HTTP
+        result = self.fetch_http(url, source=source, timeout=timeout, entry=entry)
+        if result and (result.from_cache or not self.looks_js_rendered(result.html)):
+            return result
+        if result and not self.browser_fallback:
+            return result
+        if result is None and not render_failures:
+            return None
+
+        logger.info(f"Escalating {url} to browser rendering")
+        return self.render(url, source=source, scroll=scroll, timeout=timeout)
+
+    @traced_page
+    def fetch_http(self, url: str, source: str = 'page', timeout: Optional[float] = None,
+                   entry=None, validators: Optional[Dict[str, str]] = None) -> Optional[FetchResult]:
+        """Plain HTTP GET; None when the response isn't usable HTML.
+
+        With validators (conditional request headers) and no cache entry, a
+        304 comes back as a FetchResult with status 304 and no HTML.
+        """
+        headers = entry.validators() if entry else dict(validators or {})
+        try:
+            self.search_engine.throttle.wait(url)
+            with NAVIGATION.time(via='http'):
+                response = self.session.get(url, timeout=timeout or self.timeout, headers=headers)
+        except requests.RequestException as e:
+            logger.debug(f"HTTP fetch failed for {url}: {str(e)}")
+            FAILURES.inc(stage='fetch')
+            return None
+
+        blocked = response.status_code == 200 and self.looks_blocked(response.text)
+        self.search_engine.throttle.report(
+            url, response.status_code, blocked=blocked,
+            retry_after=response.headers.get('Retry-After')
+        )
+
+        if response.status_code == 304 and entry:
+            self.cache.refresh(url, source)
+            CACHE_LOOKUPS.inc(result='revalidated')
+            PAGES.inc(source='cache')
+            return FetchResult(url, entry.html, entry.status, entry.via, from_cache=True)
+        if response.status_code == 304 and headers:
+            PAGES.inc(source='not_modified')
+            return FetchResult(url, '', 304, 'http', dict(response.headers))
+
+        content_type = response.headers.get('Content-Type', '')
+        if response.status_code != 200 or 'html' not in content_type.lower():
+            logger.debug(f"HTTP fetch unusable for {url}: {response.status_code} {content_type}")
+            return None
+        if blocked:
+            logger.info(f"HTTP fetch of {url} hit a bot check")
+            return None
+
+        result = FetchResult(response.url, response.text, response.status_code, 'http',
+                             dict(response.headers))
+        PAGES.inc(source='http')
+        if self.cache and not self.looks_js_rendered(result.html):
+            self.cache.put(url, result.html, source, result.status, 'http', result.headers)
+        return result
+
+    @traced_page
+    def render(self, url: str, source: str = 'page', scroll: bool = False,
+               timeout: Optional[float] = None) -> FetchResult:
+        """Load a page in a pooled Chrome driver and return the rendered HTML."""
+        if not self.browser_fallback:
+            raise RuntimeError(f"Browser rendering is disabled, cannot render {url}")
+        readiness = self.search_engine.readiness
+        with self.search_engine.lease_driver() as driver:
+            driver.set_page_load_timeout(timeout or self.timeout)
+            self.search_engine.navigate(driver, url)
+
+            # Wait for dynamic content to settle rather than a fixed delay
+            readiness.wait_until_ready(driver)
+
+            if scroll:
+                # Keep scrolling while lazy loading adds content
+                readiness.scroll_until_stable(driver)
+
+            result = FetchResult(driver.current_url, driver.page_source, via='browser')
+        PAGES.inc(source='browser')
+        blocked = self.looks_blocked(result.html)
+        self.search_engine.throttle.report(url, blocked=blocked)
+
+        if self.cache and not blocked:
+            self.cache.put(url, result.html, source, via='browser')
+        return result
+
+    def looks_js_rendered(self, html: str) -> bool:
+        """Guess whether a static response still needs JavaScript to show content."""
+        if not html or len(html) < 512:
+            return True
+
+        lowered = html.lower()
+        if EMPTY_APP_ROOT.search(html):
+            return True
+
+        text = TAG.sub(' ', SCRIPT_OR_STYLE.sub(' ', html))
+        text_length = len(' '.join(text.split()))
+        if text_length < self.min_text_length:
+            return True
+
+        # Short pages that mostly ask for JavaScript
+        if text_length < self.min_text_length * 5 and any(marker in lowered for marker in NOSCRIPT_MARKERS):
+            return True
+
+        return False
+
+    def looks_blocked(self, html: str) -> bool:
+        """Guess whether a page is a CAPTCHA or bot check rather than real content."""
+        if not html:
+            return False
+        # Real pages may mention these words; interstitials are short
+        head = html[:20000].lower()
+        word_count = len(TAG.sub(' ', SCRIPT_OR_STYLE.sub(' ', head)).split())
+        return word_count < 400 and any(marker in head for marker in BLOCK_MARKERS)
+
+    def close(self):
+        """Close pooled HTTP connections and the page cache."""
+        self.session.close()
+        if self.cache:
+            self.cache.close()
@@ -0,0 +1,230 @@
+# frontier.py
+import re
+import math
+import heapq
+import hashlib
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urljoin, urlparse
+
+from lxml import etree
+
+from cache import normalize_url
+from parsers import element_text
+from webutil import parse_html, registered_domain
+
+logger = logging.getLogger(__name__)
+
+# Link kinds, in the order the frontier follows them
+PAGINATION = 'pagination'
+LOAD_MORE = 'load_more'
+CATEGORY = 'category'
+LINK_PRIORITY = {PAGINATION: 0, LOAD_MORE: 1, CATEGORY: 2}
+
+PAGE_PARAMS = {'page', 'p', 'pg', 'paged', 'offset', 'start', 'from', 'after', 'cursor'}
+PAGE_PATH = re.compile(r'/(?:page|p)/\d+/?$', re.IGNORECASE)
+PAGER_CONTAINER = re.compile(r'paginat|pager|paging|page-numbers|page-nav', re.IGNORECASE)
+NEXT_TEXT = re.compile(r'^(?:next(?: page)?|older(?: posts)?|more results|[›»>→]+|next\s*[›»>→]+)$', re.IGNORECASE)
+LOAD_MORE_TEXT = re.compile(r'^(?:load|show|view|see)\s+more\b', re.IGNORECASE)
+LOAD_MORE_CLASS = re.compile(r'load-?more|show-?more|loadmore', re.IGNORECASE)
+CATEGORY_PATH = re.compile(
+    r'/(?:categor(?:y|ies)|tags?|industr(?:y|ies)|sectors?|topics?|collections?|lists?|markets?|verticals?)(?:/|$)',
+    re.IGNORECASE
+)
+# Attributes "load more" buttons keep their next URL in
+LOAD_MORE_ATTRIBUTES = ('data-href', 'data-url', 'data-next', 'data-next-url', 'data-next-page')
+
+LINKS = etree.XPath('//a[@href] | //link[@rel and @href] | //button | //*[@data-next or @data-next-url]')
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set of strings.
+
+    Uses about 1.8 bytes per item at a 0.1% false-positive rate, against
+    ~100 bytes for a URL in a Python set, so a crawl can remember millions
+    of URLs. A false positive only means a page is skipped.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add item; False if it was (probably) there already."""
+        positions = list(self._positions(item))
+        with self._lock:
+            new = False
+            for position in positions:
+                mask = 1 << (position & 7)
+                if not self._bits[position >> 3] & mask:
+                    self._bits[position >> 3] |= mask
+                    new = True
+            return new
+
+
+def _is_page_url(url: str) -> bool:
+    parsed = urlparse(url)
+    return bool(PAGE_PATH.search(parsed.path)) or any(
+        key.lower() in PAGE_PARAMS for key in parse_qs(parsed.query)
+    )
+
+
+def _in_pager(element) -> bool:
+    for ancestor in element.iterancestors():
+        marker = f"{ancestor.get('class', '')} {ancestor.get('id', '')} {ancestor.get('aria-label', '')}"
+        if PAGER_CONTAINER.search(marker):
+            return True
+        if ancestor.tag in ('body', 'main'):
+            return False
+    return False
+
+
+def crawl_links(html: str, base_url: str) -> List[Tuple[str, str]]:
+    """Same-site (url, kind) links worth crawling from a directory page.
+
+    Pagination is ``rel=next``, links inside a pager, "Next"-style links and
+    page-number URLs; load-more is "Load/Show more" links and buttons that
+    carry their URL in a data attribute; category links are in-site paths
+    like ``/category/``, ``/industries/`` or ``/tags/``.
+    """
+    root = parse_html(html)
+    if root is None:
+        return []
+    site = registered_domain(base_url)
+    found = []
+    for element in LINKS(root):
+        if not isinstance(element.tag, str):
+            continue
+        href = element.get('href')
+        if element.tag not in ('a', 'link'):
+            href = next((element.get(name) for name in LOAD_MORE_ATTRIBUTES if element.get(name)), None)
+        if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+            continue
+        url = urljoin(base_url, href.strip())
+        if not url.startswith('http') or registered_domain(url) != site:
+            continue
+
+        rel = (element.get('rel') or '').lower().split()
+        text = ' '.join(element_text(element).split()) if element.tag != 'link' else ''
+        marker = f"{element.get('class', '')} {element.get('id', '')}"
+
+        if 'next' in rel or NEXT_TEXT.match(text) or (_in_pager(element) and _is_page_url(url)):
+            found.append((url, PAGINATION))
+        elif element.tag != 'link' and (LOAD_MORE_TEXT.match(text) or LOAD_MORE_CLASS.search(marker)):
+            found.append((url, LOAD_MORE))
+        elif element.tag == 'a' and _is_page_url(url) and text.isdigit():
+            found.append((url, PAGINATION))
+        elif element.tag == 'a' and CATEGORY_PATH.search(urlparse(url).path):
+            found.append((url, CATEGORY))
+    return found
+
+
+class CrawlFrontier:
+    """Bounded queue of pages to crawl on one site.
+
+    Pagination and load-more links continue the listing they were found on
+    and keep its depth; category links open a new listing one level deeper
+    and are only followed up to ``max_depth``. At most ``max_pages`` pages
+    are handed out. URLs are deduplicated in normalized form through
+    ``seen``, which can be shared between sites.
+    """
+
+    def __init__(self, start_url: str, max_depth: int = 2, max_pages: int = 20,
+                 seen: Optional[BloomFilter] = None):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.seen = seen if seen is not None else BloomFilter(capacity=max(1000, max_pages * 50))
+        self.issued = 0
+        self._heap: List[Tuple[int, int, int, str]] = []
+        self._counter = 0
+        # The start page is always crawled, even if another site linked to it
+        self.seen.add(normalize_url(start_url))
+        self._push(start_url, 0, PAGINATION)
+
+    def _push(self, url: str, depth: int, kind: str):
+        heapq.heappush(self._heap, (depth, LINK_PRIORITY[kind], self._counter, url))
+        self._counter += 1
+
+    def add(self, url: str, depth: int, kind: str) -> bool:
+        """Queue a link found on a page at depth; False if it is out of bounds or seen."""
+        depth = depth + 1 if kind == CATEGORY else depth
+        if depth > self.max_depth:
+            return False
+        if not self.seen.add(normalize_url(url)):
+            return False
+        self._push(url, depth, kind)
+        return True
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Next (url, depth) to crawl, or None when empty or out of budget."""
+        if not self._heap or self.issued >= self.max_pages:
+            return None
+        depth, _, _, url = heapq.heappop(self._heap)
+        self.issued += 1
+        return url, depth
+
+    def __bool__(self) -> bool:
+        return bool(self._heap) and self.issued < self.max_pages
+
+
+class SiteCrawler:
+    """Crawls a directory site's listing pages concurrently within a budget.
+
+    Pages come from a CrawlFrontier and are fetched ``workers`` at a time;
+    the host throttle still spaces requests to the site. Every page's
+    companies are merged and its pagination, load-more and category links
+    fed back into the frontier.
+    """
+
+    def __init__(self, scraper, max_depth: int = 2, max_pages: int = 20, workers: int = 4,
+                 seen: Optional[BloomFilter] = None):
+        self.scraper = scraper
+        self.max_depth = max_depth
+        self.max_pages = max(1, max_pages)
+        self.workers = max(1, workers)
+        self.seen = seen
+
+    def crawl(self, start_url: str) -> Set[str]:
+        """Companies found on start_url and the listing pages it leads to."""
+        frontier = CrawlFrontier(start_url, self.max_depth, self.max_pages, self.seen)
+        companies: Set[str] = set()
+        pages = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='crawl') as pool:
+            running = {}
+            while frontier or running:
+                while frontier and len(running) < self.workers:
+                    url, depth = frontier.pop()
+                    running[pool.submit(self._crawl_page, url, start_url == url)] = (url, depth)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = running.pop(future)
+                    found, links = future.result()
+                    companies.update(found)
+                    pages += 1
+                    for link, kind in links:
+                        frontier.add(link, depth, kind)
+        logger.info(f"Crawled {pages} pages of {start_url}, {len(companies)} companies")
+        return companies
+
+    def _crawl_page(self, url: str, first: bool) -> Tuple[Set[str], List[Tuple[str, str]]]:
+        try:
+            companies, result = self.scraper.scrape_page(url)
+        except Exception as e:
+            if first:
+                raise
+            logger.warning(f"Error crawling {url}: {str(e)}")
+            return set(), []
+        return companies, crawl_links(result.html, result.url or url)
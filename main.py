@@ -1,11 +1,21 @@
 # main.py
+import argparse
 import logging
-import time
-import random
+import signal
 from db1 import EnhancedDatabaseManager
 from search import SearchEngine
 from scraper import StartupScraper
 from enricher import StartupEnricher
+from engine import EnrichmentEngine
+from pipeline import StreamingPipeline
+from shards import ShardCoordinator, ShardWorker
+from cache import PageCache
+from browser_profile import BrowserProfile
+from resolver import CompanyResolver
+from refresh import Refresher, RefreshPolicy
+from discovery import make_backend
+from metrics import metrics
+from tracing import Tracer
 
 # Configure logging
 logging.basicConfig(
@@ -14,57 +24,292 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options for a crawl run."""
+    parser = argparse.ArgumentParser(description="Discover, scrape and enrich startup data")
+    parser.add_argument('--mode', choices=['single', 'coordinator', 'worker', 'refresh'], default='single',
+                        help="single: scrape and enrich in one process; coordinator: scrape and split "
+                             "the backlog into shards; worker: enrich leased shards; refresh: "
+                             "re-enrich companies whose pages changed")
+    parser.add_argument('--shards', type=int, default=8,
+                        help="Number of shards the company backlog is split into (sharded modes)")
+    parser.add_argument('--worker-id', default=None,
+                        help="Name this worker leases shards under (defaults to host-pid)")
+    parser.add_argument('--lease-seconds', type=float, default=300.0,
+                        help="How long a shard lease lasts without a heartbeat")
+    parser.add_argument('--idle-timeout', type=float, default=60.0,
+                        help="Seconds a worker waits for a claimable shard before exiting")
+    parser.add_argument('--db-path', default="/app/data/startups.db",
+                        help="SQLite database shared by the coordinator and workers")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Number of concurrent enrichment workers")
+    parser.add_argument('--scrape-workers', type=int, default=2,
+                        help="Number of sites scraped concurrently")
+    parser.add_argument('--queue-size', type=int, default=100,
+                        help="Maximum number of companies waiting for a worker")
+    parser.add_argument('--pool-size', type=int, default=None,
+                        help="Number of Chrome drivers kept in the pool (defaults to --workers)")
+    parser.add_argument('--max-driver-uses', type=int, default=50,
+                        help="Recycle a driver after this many leases")
+    parser.add_argument('--max-driver-memory-mb', type=int, default=1024,
+                        help="Recycle a driver once its browser uses more memory than this")
+    parser.add_argument('--host-interval', type=float, default=2.0,
+                        help="Starting seconds between requests to the same host; adapts to how the host responds")
+    parser.add_argument('--search-interval', type=float, default=8.0,
+                        help="Minimum seconds between requests to a search engine; grows on 429s and CAPTCHAs")
+    parser.add_argument('--max-render-wait', type=float, default=10.0,
+                        help="Upper bound in seconds on waiting for a rendered page to settle")
+    parser.add_argument('--full-browser', action='store_true',
+                        help="Load images, fonts, media and ad/analytics scripts in Chrome")
+    parser.add_argument('--browser-template', default=None,
+                        help="Pre-warmed Chrome user-data-dir copied for each browser; built on first use")
+    parser.add_argument('--no-browser', action='store_true',
+                        help="Never fall back to Chrome; use plain HTTP responses only")
+    parser.add_argument('--max-sites', type=int, default=20,
+                        help="Maximum number of directory sites discovery returns")
+    parser.add_argument('--search-backends', nargs='+', default=['bing'],
+                        choices=['bing', 'google', 'duckduckgo'],
+                        help="Search engines queried during discovery")
+    parser.add_argument('--search-pages', type=int, default=2,
+                        help="Result pages fetched per query and search engine")
+    parser.add_argument('--discovery-workers', type=int, default=4,
+                        help="Searches run concurrently during discovery")
+    parser.add_argument('--crawl-pages', type=int, default=20,
+                        help="Maximum listing pages crawled per directory site (1 scrapes only the page found)")
+    parser.add_argument('--crawl-depth', type=int, default=2,
+                        help="How many levels of category links to follow from a directory site")
+    parser.add_argument('--crawl-workers', type=int, default=4,
+                        help="Pages of one site fetched concurrently")
+    parser.add_argument('--parser', choices=['soup', 'lxml', 'streaming', 'selectolax'], default='lxml',
+                        help="HTML parser backend for company names and search results")
+    parser.add_argument('--max-subpages', type=int, default=3,
+                        help="About/team/contact/careers pages fetched per company to fill empty fields")
+    parser.add_argument('--no-url-cache', action='store_true',
+                        help="Search for every company's homepage instead of using the resolution cache")
+    parser.add_argument('--url-ttl-days', type=float, default=30,
+                        help="How long a resolved company homepage is trusted")
+    parser.add_argument('--no-domain-guess', action='store_true',
+                        help="Don't try domains guessed from the company name before searching")
+    parser.add_argument('--refresh-limit', type=int, default=None,
+                        help="Maximum number of companies checked in one refresh run (default: all due)")
+    parser.add_argument('--refresh-min-days', type=float, default=1,
+                        help="Shortest interval between checks of a frequently changing page")
+    parser.add_argument('--refresh-max-days', type=float, default=90,
+                        help="Longest interval between checks of a page that never changes")
+    parser.add_argument('--cache-dir', default="/app/data/cache",
+                        help="Directory of the on-disk page cache")
+    parser.add_argument('--cache-max-mb', type=int, default=512,
+                        help="Byte budget of the page cache before LRU eviction")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Fetch every page fresh without the page cache")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve Prometheus metrics on this port while running")
+    parser.add_argument('--metrics-file', default=None,
+                        help="Write Prometheus-format metrics to this file at the end of the run")
+    parser.add_argument('--metrics-summary', default="/app/data/metrics.json",
+                        help="Write a JSON metrics summary to this file at the end of the run")
+    parser.add_argument('--profile', nargs='?', const="/app/data/trace.json", default=None, metavar='TRACE_FILE',
+                        help="Trace every fetch, parse, extract and DB write per URL to this Chrome "
+                             "trace-event JSON file and print the slowest domains at the end")
+    parser.add_argument('--profile-cpu', action='store_true',
+                        help="With --profile, run sampled parse/extract calls under cProfile")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="With --profile, measure peak memory of sampled parse/extract calls with tracemalloc")
+    parser.add_argument('--profile-sample', type=float, default=0.1, metavar='FRACTION',
+                        help="Fraction of parse/extract calls sampled by --profile-cpu/--profile-memory")
+    parser.add_argument('--profile-top', type=int, default=10,
+                        help="Number of domains, functions and allocation sites in the profile report")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    search_engine = None
+    db_manager = None
+    stopping = {'requested': False}
+    pipeline = None
+
+    runner = None
+
+    def handle_sigterm(signum, frame):
+        logger.info("Received SIGTERM, shutting down")
+        stopping['requested'] = True
+        if pipeline:
+            pipeline.stop()
+        if runner:
+            runner.stop()
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    tracer = None
+    if args.profile:
+        tracer = Tracer(sample=args.profile_sample, cpu=args.profile_cpu, memory=args.profile_memory).start()
+
     try:
         # Initialize components
-        db_manager = EnhancedDatabaseManager()
+        db_manager = EnhancedDatabaseManager(args.db_path)
         db_manager.init_db()
         
-        search_engine = SearchEngine()
-        scraper = StartupScraper(search_engine)
-        enricher = StartupEnricher(search_engine)
+        cache = None
+        if not args.no_cache:
+            cache = PageCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
         
-        # First phase: Find and scrape startup names
-        sites = search_engine.find_potential_sites()
-        logger.info(f"Found {len(sites)} potential sites to scrape")
+        search_engine = SearchEngine(
+            pool_size=args.pool_size or args.workers,
+            max_driver_uses=args.max_driver_uses,
+            max_driver_memory_mb=args.max_driver_memory_mb,
+            host_interval=args.host_interval,
+            search_interval=args.search_interval,
+            max_render_wait=args.max_render_wait,
+            cache=cache,
+            browser_fallback=not args.no_browser,
+            search_backends=[make_backend(name) for name in args.search_backends],
+            discovery_pages=args.search_pages,
+            discovery_workers=args.discovery_workers,
+            browser_profile=BrowserProfile(
+                lean=not args.full_browser,
+                user_data_template=args.browser_template
+            )
+        )
+        scraper = StartupScraper(
+            search_engine,
+            parser=args.parser,
+            max_pages=args.crawl_pages,
+            max_depth=args.crawl_depth,
+            crawl_workers=args.crawl_workers
+        )
+        enricher = StartupEnricher(search_engine, parser=args.parser, max_subpages=args.max_subpages)
+        if not args.no_url_cache:
+            # Cached and guessed homepages spare most search-engine round-trips
+            enricher.resolver = CompanyResolver(
+                db_manager,
+                search_engine.fetcher,
+                enricher._search_company_url,
+                ttl=int(args.url_ttl_days * 86400),
+                guess_domains=not args.no_domain_guess
+            )
+        
+        if args.mode == 'worker':
+            # Enrich shards leased from the shared backlog with this process's drivers
+            runner = ShardWorker(
+                enricher,
+                db_manager,
+                shards=args.shards,
+                worker_id=args.worker_id,
+                lease_seconds=args.lease_seconds,
+                idle_timeout=args.idle_timeout,
+                engine_factory=lambda: EnrichmentEngine(
+                    enricher, db_manager, workers=args.workers, queue_size=args.queue_size
+                )
+            )
+            if not stopping['requested']:
+                runner.run()
+            logger.info(f"Job states: {db_manager.get_job_counts()}")
+            return
         
-        total_companies = 0
-        for url in sites:
-            try:
-                time.sleep(random.uniform(5, 10))
-                companies = scraper.scrape_site(url)
-                if companies:
-                    db_manager.save_startups(companies, url)
-                    total_companies += len(companies)
-            except Exception as e:
-                logger.error(f"Error processing {url}: {str(e)}")
-                continue
+        if args.mode == 'refresh':
+            # Recheck stored homepages; only changed pages are re-extracted
+            runner = Refresher(
+                enricher,
+                db_manager,
+                search_engine.fetcher,
+                policy=RefreshPolicy(
+                    min_interval=args.refresh_min_days * 86400,
+                    max_interval=args.refresh_max_days * 86400
+                ),
+                workers=args.workers
+            )
+            if not stopping['requested']:
+                runner.run(limit=args.refresh_limit)
+            return
         
-        logger.info(f"Initial scraping completed. Total companies collected: {total_companies}")
+        if args.mode == 'coordinator':
+            runner = ShardCoordinator(db_manager, shards=args.shards)
+            runner.prepare()
         
-        # Second phase: Enrich startup data
-        startups_to_enrich = db_manager.get_startups_without_enrichment()
-        logger.info(f"Found {len(startups_to_enrich)} startups to enrich")
+        # Sites left over from an interrupted run are scraped before
+        # searching for new ones
+        sites = db_manager.get_pending_sites()
+        if sites:
+            logger.info(f"Resuming with {len(sites)} sites left from a previous run")
+        else:
+            discovered = search_engine.find_potential_sites(
+                max_sites=args.max_sites,
+                source_yields=db_manager.get_source_yields()
+            )
+            db_manager.add_site_jobs(discovered)
+            sites = db_manager.get_pending_sites()
+        logger.info(f"Found {len(sites)} potential sites to scrape")
+        
+        if args.mode == 'coordinator':
+            logger.info(f"Found {sum(db_manager.count_due_by_shard().values())} startups "
+                        f"waiting for enrichment")
+            # Scrape only; workers pick new companies up from their shards
+            pipeline = StreamingPipeline(scraper, None, db_manager, scrape_workers=args.scrape_workers)
+            if stopping['requested']:
+                pipeline.stop()
+            pipeline.run(sites)
+            if not stopping['requested']:
+                runner.wait()
+            logger.info(f"Job states: {db_manager.get_job_counts()}")
+            return
+        
+        # Companies waiting from earlier runs, including failures due a retry
+        startups_to_enrich = db_manager.get_companies_to_enrich()
+        logger.info(f"Found {len(startups_to_enrich)} startups waiting for enrichment")
         
-        for startup_id, company_name in startups_to_enrich:
-            try:
-                # Add random delay between requests
-                time.sleep(random.uniform(10, 15))
-                
-                logger.info(f"Enriching data for: {company_name}")
-                enriched_data = enricher.enrich_company_data(company_name)
-                
-                if enriched_data:
-                    db_manager.save_enriched_data(startup_id, enriched_data)
-                
-            except Exception as e:
-                logger.error(f"Error enriching {company_name}: {str(e)}")
-                continue
+        # Scrape and enrich concurrently: new names stream straight to the enrichers
+        engine = EnrichmentEngine(
+            enricher,
+            db_manager,
+            workers=args.workers,
+            queue_size=args.queue_size
+        )
+        pipeline = StreamingPipeline(scraper, engine, db_manager, scrape_workers=args.scrape_workers)
+        if stopping['requested']:
+            pipeline.stop()
+        pipeline.run(sites, startups_to_enrich)
+        logger.info(f"Enriched {engine.enriched} companies, {engine.failed} failed")
         
         logger.info("Data enrichment completed")
+        logger.info(f"Job states: {db_manager.get_job_counts()}")
         
     except Exception as e:
         logger.error(f"Process failed: {str(e)}")
+    finally:
+        if search_engine:
+            logger.info(f"Browser wait time: {search_engine.readiness.stats.summary()}")
+            logger.info(f"Per-host request intervals: {search_engine.throttle.stats()}")
+            search_engine.close()
+        if db_manager:
+            db_manager.close()
+        write_metrics(args)
+        if tracer:
+            write_profile(args, tracer)
+
+def write_metrics(args):
+    """Export the run's metrics to the configured files."""
+    try:
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
+        if args.metrics_summary:
+            metrics.write_summary(args.metrics_summary)
+            logger.info(f"Wrote metrics summary to {args.metrics_summary}")
+    except Exception as e:
+        logger.error(f"Failed to write metrics: {str(e)}")
+    finally:
+        metrics.stop()
+
+def write_profile(args, tracer):
+    """Save the run's trace and print where the time went."""
+    tracer.stop()
+    try:
+        tracer.write(args.profile)
+    except Exception as e:
+        logger.error(f"Failed to write trace: {str(e)}")
+    print(tracer.report(args.profile_top))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
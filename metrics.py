@@ -0,0 +1,247 @@
+# metrics.py
+import json
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from sub-millisecond parsing up to slow page loads
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Called with (histogram, seconds, labels) for every observation while set;
+# the profiler uses it to turn timings into trace spans
+_observer: Optional[Callable[['Histogram', float, Dict[str, str]], None]] = None
+
+
+def set_observer(observer: Optional[Callable[['Histogram', float, Dict[str, str]], None]]):
+    global _observer
+    _observer = observer
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            return {_format_labels(key) or 'total': value for key, value in sorted(self._values.items())}
+
+
+class _HistogramSeries:
+    def __init__(self, buckets):
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with optional labels."""
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series.counts[i] += 1
+                    break
+            series.count += 1
+            series.sum += value
+            series.max = max(series.max, value)
+        if _observer is not None:
+            _observer(self, value, labels)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series.counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, {'le': f'{bound:g}'})} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {series.count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series.sum:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series.count}")
+        return lines
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                _format_labels(key) or 'all': {
+                    'count': series.count,
+                    'sum': round(series.sum, 4),
+                    'mean': round(series.sum / series.count, 4) if series.count else 0.0,
+                    'p50': round(self._quantile(series, 0.5), 4),
+                    'p95': round(self._quantile(series, 0.95), 4),
+                    'max': round(series.max, 4)
+                }
+                for key, series in sorted(self._series.items())
+            }
+
+    def _quantile(self, series: _HistogramSeries, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket."""
+        if not series.count:
+            return 0.0
+        rank = q * series.count
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, series.counts):
+            if count and cumulative + count >= rank:
+                return min(lower + (bound - lower) * (rank - cumulative) / count, series.max)
+            cumulative += count
+            lower = bound
+        return series.max
+
+
+class MetricsRegistry:
+    """Named counters and histograms shared by every crawl component."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def counter(self, name: str, help_text: str = '') -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str = '', buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    def _get_or_create(self, name, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def to_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in sorted(metrics, key=lambda m: m.name):
+            lines.extend(metric.prometheus())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.summary() for metric in sorted(metrics, key=lambda m: m.name)}
+
+    def write_prometheus(self, path: str):
+        with open(path, 'w') as f:
+            f.write(self.to_prometheus())
+
+    def write_summary(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def serve(self, port: int, host: str = '0.0.0.0'):
+        """Expose /metrics over HTTP from a background thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Process-wide registry used by all modules
+metrics = MetricsRegistry()
+
+DRIVER_SPAWN = metrics.histogram('crawler_driver_spawn_seconds', 'Time to start a Chrome driver')
+NAVIGATION = metrics.histogram('crawler_navigation_seconds', 'Time to load a page, by transport')
+WAIT = metrics.histogram('crawler_wait_seconds', 'Time spent waiting for rendered pages to settle')
+PARSE = metrics.histogram('crawler_parse_seconds', 'Time to parse page HTML, by stage')
+EXTRACT = metrics.histogram('crawler_extract_seconds', 'Time to extract data from a parsed page, by stage')
+DRIVER_LEASE = metrics.histogram('crawler_driver_lease_seconds', 'Time callers waited to lease a pooled Chrome driver')
+QUEUE_WAIT = metrics.histogram('crawler_queue_wait_seconds', 'Time work items waited in a stage\'s queue, by stage')
+DB_WRITE = metrics.histogram('crawler_db_write_seconds', 'Time spent in database write transactions')
+THROTTLE_WAIT = metrics.histogram('crawler_throttle_wait_seconds', 'Time requests waited for their host\'s rate limit')
+
+PAGES = metrics.counter('crawler_pages_total', 'Pages obtained, by source (http, browser, cache)')
+COMPANIES = metrics.counter('crawler_companies_total', 'Companies by outcome (found, saved, duplicate, enriched)')
+CACHE_LOOKUPS = metrics.counter('crawler_cache_lookups_total', 'Page cache lookups by result')
+FAILURES = metrics.counter('crawler_failures_total', 'Failures by stage')
+DB_ROWS = metrics.counter('crawler_db_rows_total', 'Rows written by table')
+RESOLUTIONS = metrics.counter('crawler_url_resolutions_total', 'Company URL lookups by method (cache, guess, search, miss)')
+HOST_BACKOFFS = metrics.counter('crawler_host_backoffs_total', 'Rate-limit backoffs by reason (429, 503, captcha)')
+REFRESHES = metrics.counter('crawler_refreshes_total', 'Company page refresh checks by outcome (not_modified, unchanged, changed, failed)')
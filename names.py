@@ -0,0 +1,139 @@
+# names.py
+import re
+import logging
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Stripped in this order, so "About The Acme" loses both
+PREFIXES = ('About ', 'The ', 'Company: ', 'Name: ')
+# Stripped in this order from the end, so "Acme Corp Inc" loses both
+SUFFIXES = (' Inc', ' LLC', ' Ltd', ' Limited', ' Corp')
+INVALID_PATTERNS = (
+    'login', 'sign in', 'register', 'about', 'contact',
+    'privacy', 'terms', 'cookie', 'menu', 'home'
+)
+
+# Below this many distinct texts a page is cleaned name by name
+VECTORIZE_MIN = 16
+
+SEPARATOR = '\x00'
+
+
+def _caseless(literal: str) -> str:
+    """Regex matching literal wherever ``text.lower()`` would contain it.
+
+    Spelled out as character classes rather than IGNORECASE, which also
+    folds e.g. dotless i into i where str.lower() doesn't. The Kelvin sign
+    is the one non-ASCII character lower() turns into a plain ASCII letter.
+    """
+    parts = []
+    for char in literal.lower():
+        if 'a' <= char <= 'z':
+            parts.append(f"[{char}{char.upper()}{chr(0x212A) if char == 'k' else ''}]")
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+
+_PREFIX_GROUPS = ''.join(f"(?:{_caseless(prefix)})?" for prefix in PREFIXES)
+_SUFFIX_GROUPS = ''.join(f"(?:{_caseless(suffix)})?" for suffix in reversed(SUFFIXES))
+
+PREFIX = re.compile(_PREFIX_GROUPS)
+SUFFIX = re.compile(_SUFFIX_GROUPS + r'\Z')
+# One alternation over every invalid pattern, scanned once per name or page
+STOPWORDS = re.compile('|'.join(_caseless(pattern) for pattern in sorted(INVALID_PATTERNS, key=len, reverse=True)))
+
+# The same steps over a whole page of names, each preceded by SEPARATOR.
+# Every pattern either starts with the separator or only matches where
+# there is something to remove, so the scans skip through most of the page.
+_ANY_PREFIX = '|'.join(_caseless(prefix) for prefix in PREFIXES)
+_ANY_SUFFIX = '|'.join(_caseless(suffix) for suffix in SUFFIXES)
+JOINED_STRIP = re.compile(r'\s*\x00\s*')
+JOINED_PREFIX = re.compile(r'\x00(?=' + _ANY_PREFIX + ')' + _PREFIX_GROUPS)
+JOINED_SUFFIX = re.compile('(?=' + _ANY_SUFFIX + ')' + _SUFFIX_GROUPS + r'(?=\x00|\Z)')
+JOINED_WHITESPACE = re.compile(r' \s+|[^\S ]\s*')
+JOINED_SPACE = re.compile(r' ?\x00 ?')
+# Plain-text STOPWORDS for pages that are all ASCII, scanned lowercased
+ASCII_STOPWORDS = re.compile('|'.join(re.escape(pattern) for pattern in sorted(INVALID_PATTERNS, key=len, reverse=True)))
+
+
+def clean_name(name: str) -> str:
+    """Strip common prefixes, legal suffixes and extra whitespace from a name."""
+    if not name:
+        return ""
+    name = str(name).strip()
+    end = PREFIX.match(name).end()
+    if end:
+        name = name[end:]
+    start = SUFFIX.search(name).start()
+    if start < len(name):
+        name = name[:start]
+    return ' '.join(name.split())
+
+
+def is_valid_name(name: str) -> bool:
+    """Whether cleaned text looks like a company name rather than page chrome."""
+    if not name or len(name) < 2 or len(name) > 100:
+        return False
+    if STOPWORDS.search(name):
+        return False
+    # Must contain at least one letter
+    if not any(map(str.isalpha, name)):
+        return False
+    # Avoid names that are just numbers or single words
+    if name.replace(' ', '').isdigit() or len(name.split()) < 2:
+        return False
+    return True
+
+
+def clean_names(texts: Iterable[str], vectorized: Optional[bool] = None) -> Set[str]:
+    """Valid, cleaned names among a page's candidate texts.
+
+    Raw texts are deduplicated before cleaning and cleaned names before
+    validation, since directory pages repeat the same name in headings,
+    links and cards. Large pages take the vectorized path, which runs each
+    step as one regex pass over all names at once; vectorized forces it
+    on or off. Both give exactly what clean_name/is_valid_name would.
+    """
+    unique = [text for text in dict.fromkeys(texts) if text]
+    if vectorized is None:
+        vectorized = len(unique) >= VECTORIZE_MIN
+    if vectorized:
+        joined = _clean_joined(unique)
+        if joined is not None:
+            return joined
+    return {name for name in dict.fromkeys(map(clean_name, unique)) if is_valid_name(name)}
+
+
+def _clean_joined(texts: List[str]) -> Optional[Set[str]]:
+    blob = SEPARATOR + SEPARATOR.join(map(str, texts))
+    if blob.count(SEPARATOR) != len(texts):
+        # A text contains the separator itself
+        return None
+
+    blob = JOINED_STRIP.sub(SEPARATOR, blob).rstrip()
+    blob = JOINED_PREFIX.sub(SEPARATOR, blob)
+    blob = JOINED_SUFFIX.sub('', blob)
+    blob = JOINED_SPACE.sub(SEPARATOR, JOINED_WHITESPACE.sub(' ', blob)).rstrip(' ')
+    names = blob.split(SEPARATOR)
+
+    # Segment of every stopword hit, found in one scan of the page
+    starts, offset = [], 0
+    for name in names:
+        starts.append(offset)
+        offset += len(name) + 1
+    if blob.isascii():
+        hits = ASCII_STOPWORDS.finditer(blob.lower())
+    else:
+        hits = STOPWORDS.finditer(blob)
+    rejected = {bisect_right(starts, match.start()) - 1 for match in hits}
+
+    valid = set()
+    for index, name in enumerate(names):
+        if index in rejected or name in valid or not 2 <= len(name) <= 100 or ' ' not in name:
+            continue
+        if any(map(str.isalpha, name)) and not name.replace(' ', '').isdigit():
+            valid.add(name)
+    return valid
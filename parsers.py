@@ -0,0 +1,341 @@
+# parsers.py
+import re
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from webutil import parse_html
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxHTMLParser
+except ImportError:  # optional fast backend
+    SelectolaxHTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+# Elements whose strings BeautifulSoup's get_text() leaves out
+SKIPPED_TEXT_TAGS = {'script', 'style', 'template'}
+
+SELECTOR_TOKEN = re.compile(r"""
+    \s*(?P<combinator>>)\s*
+  | (?P<space>\s+)
+  | (?P<tag>[a-zA-Z][\w-]*|\*)
+  | \.(?P<cls>[\w-]+)
+  | \#(?P<id>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$]?=)\s*(?:'(?P<sq>[^']*)'|"(?P<dq>[^"]*)"|(?P<bare>[^\]\s]+))\s*)?\]
+""", re.VERBOSE)
+
+
+def _literal(value: str) -> str:
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
+
+
+def _selector_steps(selector: str) -> List[Tuple[str, str, List[str]]]:
+    """Parse a simple CSS selector into (axis, tag, predicates) XPath steps."""
+    steps: List[Tuple[str, str, List[str]]] = []
+    axis, tag, predicates = '//', '*', []
+    position, selector = 0, selector.strip()
+    pending = False
+
+    while position < len(selector):
+        match = SELECTOR_TOKEN.match(selector, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Unsupported selector: {selector!r}")
+        position = match.end()
+
+        if match.group('combinator') or match.group('space'):
+            if not pending:
+                raise ValueError(f"Unsupported selector: {selector!r}")
+            steps.append((axis, tag, predicates))
+            axis = '/' if match.group('combinator') else '//'
+            tag, predicates, pending = '*', [], False
+        elif match.group('tag'):
+            tag, pending = match.group('tag').lower(), True
+        elif match.group('cls'):
+            predicates.append(
+                f"contains(concat(' ', normalize-space(@class), ' '), ' {match.group('cls')} ')"
+            )
+            pending = True
+        elif match.group('id'):
+            predicates.append(f"@id={_literal(match.group('id'))}")
+            pending = True
+        else:
+            attr, op = match.group('attr'), match.group('op')
+            value = next((v for v in (match.group('sq'), match.group('dq'), match.group('bare'))
+                          if v is not None), None)
+            if op is None:
+                predicates.append(f"@{attr}")
+            elif not value:
+                # Substring operators never match an empty value in CSS
+                predicates.append(f"@{attr}=''" if op == '=' else 'false()')
+            elif op == '=':
+                predicates.append(f"@{attr}={_literal(value)}")
+            elif op == '*=':
+                predicates.append(f"contains(@{attr}, {_literal(value)})")
+            elif op == '^=':
+                predicates.append(f"starts-with(@{attr}, {_literal(value)})")
+            else:
+                predicates.append(
+                    f"substring(@{attr}, string-length(@{attr}) - {len(value) - 1}) = {_literal(value)}"
+                )
+            pending = True
+
+    if not pending:
+        raise ValueError(f"Unsupported selector: {selector!r}")
+    steps.append((axis, tag, predicates))
+    return steps
+
+
+def _required(selector: str) -> Tuple[Optional[str], Tuple[str, ...]]:
+    """Tag and attribute names an element needs before it can match selector."""
+    _, tag, predicates = _selector_steps(selector)[-1]
+    attributes = tuple(sorted(set(re.findall(r'@([\w-]+)', ' '.join(predicates)))))
+    return (None if tag == '*' else tag), attributes
+
+
+def _step(axis: str, tag: str, predicates: List[str]) -> str:
+    return axis + tag + ''.join(f'[{predicate}]' for predicate in predicates)
+
+
+def css_to_xpath(selector: str) -> str:
+    """Translate the simple CSS used for company selectors into XPath.
+
+    Supports tag, ``.class``, ``#id``, ``[attr]``, ``[attr=v]``, ``[attr*=v]``,
+    ``[attr^=v]`` and ``[attr$=v]`` with descendant and child combinators;
+    anything else raises ValueError so callers can fall back to soupsieve.
+    """
+    return ''.join(_step(*step) for step in _selector_steps(selector))
+
+
+def css_to_self_xpath(selector: str) -> str:
+    """XPath testing whether the context element itself matches selector.
+
+    Ancestor steps become nested ``parent::``/``ancestor::`` predicates, so
+    the test only needs the element's ancestors, not the rest of the page.
+    """
+    steps = _selector_steps(selector)
+    condition = ''
+    for index in range(1, len(steps)):
+        axis = 'parent::' if steps[index][0] == '/' else 'ancestor::'
+        _, tag, predicates = steps[index - 1]
+        condition = f"[{_step(axis, tag, predicates + ([condition[1:-1]] if condition else []))}]"
+    _, tag, predicates = steps[-1]
+    return f"boolean({_step('self::', tag, predicates)}{condition})"
+
+
+def element_text(element) -> str:
+    """Text of an lxml element the way BeautifulSoup's get_text() joins it.
+
+    BeautifulSoup tags every string with the innermost script, style or
+    template element around it and get_text() keeps only strings tagged
+    like the element it is called on, so e.g. a heading inside a template
+    has no text and a script's own text is its source.
+    """
+    wanted = element.tag if element.tag in SKIPPED_TEXT_TAGS else None
+    context = wanted
+    if context is None:
+        for ancestor in element.iterancestors():
+            if ancestor.tag in SKIPPED_TEXT_TAGS:
+                context = ancestor.tag
+                break
+    parts = []
+    _collect_text(element, context, wanted, parts)
+    return ''.join(parts)
+
+
+def _collect_text(element, context, wanted, parts: List[str]):
+    if element.text and context == wanted:
+        parts.append(element.text)
+    for child in element:
+        # Comments and processing instructions have a non-string tag
+        if isinstance(child.tag, str):
+            child_context = child.tag if child.tag in SKIPPED_TEXT_TAGS else context
+            _collect_text(child, child_context, wanted, parts)
+        if child.tail and context == wanted:
+            parts.append(child.tail)
+
+
+class ParsedPage:
+    """Texts of the elements matched by a parser's selectors, plus every link's text."""
+
+    def __init__(self, matches: Callable[[], List[str]], links: Callable[[], List[str]]):
+        self._matches = matches
+        self._links = links
+
+    def matches(self) -> List[str]:
+        return self._matches()
+
+    def links(self) -> List[str]:
+        return self._links()
+
+
+class SoupParser:
+    """Reference backend: a full BeautifulSoup tree queried with soupsieve."""
+
+    name = 'soup'
+
+    def __init__(self, selectors: Sequence[str]):
+        self.selectors = list(selectors)
+
+    def parse(self, html: str) -> ParsedPage:
+        soup = BeautifulSoup(html, 'lxml')
+        return ParsedPage(
+            lambda: [elem.get_text() for selector in self.selectors for elem in soup.select(selector)],
+            lambda: [link.get_text() for link in soup.find_all('a')]
+        )
+
+    def hrefs(self, html: str, selector: str) -> List[Optional[str]]:
+        """href of every element matching selector, in document order."""
+        return [link.get('href') for link in BeautifulSoup(html, 'lxml').select(selector)]
+
+
+class LxmlParser:
+    """lxml tree queried with selectors compiled once to XPath."""
+
+    name = 'lxml'
+
+    def __init__(self, selectors: Sequence[str]):
+        self.selectors = list(selectors)
+        self._xpaths = [etree.XPath(css_to_xpath(selector)) for selector in self.selectors]
+        self._links = etree.XPath('//a')
+        self._compiled: Dict[str, etree.XPath] = {}
+
+    def parse(self, html: str) -> ParsedPage:
+        root = parse_html(html)
+        if root is None:
+            return ParsedPage(list, list)
+        return ParsedPage(
+            lambda: [element_text(elem) for xpath in self._xpaths for elem in xpath(root)],
+            lambda: [element_text(link) for link in self._links(root)]
+        )
+
+    def hrefs(self, html: str, selector: str) -> List[Optional[str]]:
+        """href of every element matching selector, in document order."""
+        xpath = self._compiled.get(selector)
+        if xpath is None:
+            xpath = self._compiled[selector] = etree.XPath(css_to_xpath(selector))
+        root = parse_html(html)
+        if root is None:
+            return []
+        return [link.get('href') for link in xpath(root)]
+
+
+class StreamingParser(LxmlParser):
+    """Incremental lxml parse that keeps only the subtrees being matched.
+
+    The page is fed to a pull parser in chunks. Each element is tested
+    against the selectors when it opens, using only its ancestors; finished
+    subtrees that are neither a match, a link nor inside one are cleared
+    straight away, so memory stays bounded on very large directory pages.
+    """
+
+    name = 'streaming'
+
+    def __init__(self, selectors: Sequence[str], chunk_size: int = 64 * 1024):
+        super().__init__(selectors)
+        self.chunk_size = chunk_size
+        # Cheap tag/attribute checks skip most XPath evaluations
+        self._self_xpaths = [
+            (_required(selector), etree.XPath(css_to_self_xpath(selector))) for selector in self.selectors
+        ]
+
+    def parse(self, html: str) -> ParsedPage:
+        if not html or not html.strip():
+            return ParsedPage(list, list)
+
+        matches, links = [], []
+        parser = etree.HTMLPullParser(events=('start', 'end'), encoding='utf-8')
+        data = html.encode('utf-8')
+        # Per open element: (number of selectors it matched, is a link)
+        stack: List[Tuple[int, bool]] = []
+        keep_depth = 0
+
+        def drain():
+            nonlocal keep_depth
+            for event, element in parser.read_events():
+                if not isinstance(element.tag, str):
+                    continue
+                if event == 'start':
+                    attrib = element.attrib
+                    matched = sum(
+                        1 for (tag, attributes), xpath in self._self_xpaths
+                        if (tag is None or tag == element.tag)
+                        and all(name in attrib for name in attributes)
+                        and xpath(element)
+                    )
+                    is_link = element.tag == 'a'
+                    stack.append((matched, is_link))
+                    if matched or is_link:
+                        keep_depth += 1
+                    continue
+
+                matched, is_link = stack.pop()
+                if matched or is_link:
+                    text = element_text(element)
+                    matches.extend([text] * matched)
+                    if is_link:
+                        links.append(text)
+                    keep_depth -= 1
+                if keep_depth == 0 and element.getparent() is not None:
+                    element.clear(keep_tail=True)
+                    # Earlier siblings are finished and no longer needed
+                    while element.getprevious() is not None:
+                        del element.getparent()[0]
+
+        for offset in range(0, len(data), self.chunk_size):
+            parser.feed(data[offset:offset + self.chunk_size])
+            drain()
+        parser.close()
+        drain()
+
+        return ParsedPage(lambda: matches, lambda: links)
+
+
+class SelectolaxParser:
+    """Lexbor-based selectolax backend, used when selectolax is installed."""
+
+    name = 'selectolax'
+
+    def __init__(self, selectors: Sequence[str]):
+        if SelectolaxHTMLParser is None:
+            raise ImportError("selectolax is not installed")
+        self.selectors = list(selectors)
+
+    def parse(self, html: str) -> ParsedPage:
+        tree = SelectolaxHTMLParser(html or '')
+        for node in tree.css(', '.join(sorted(SKIPPED_TEXT_TAGS))):
+            node.decompose()
+        return ParsedPage(
+            lambda: [node.text(deep=True) for selector in self.selectors for node in tree.css(selector)],
+            lambda: [node.text(deep=True) for node in tree.css('a')]
+        )
+
+    def hrefs(self, html: str, selector: str) -> List[Optional[str]]:
+        """href of every element matching selector, in document order."""
+        return [node.attributes.get('href') for node in SelectolaxHTMLParser(html or '').css(selector)]
+
+
+PARSERS = {
+    'soup': SoupParser,
+    'lxml': LxmlParser,
+    'streaming': StreamingParser,
+    'selectolax': SelectolaxParser
+}
+
+
+def make_parser(name: str, selectors: Sequence[str]):
+    """Build the named parser backend, falling back to BeautifulSoup if it can't be used."""
+    try:
+        return PARSERS[name](selectors)
+    except KeyError:
+        raise ValueError(f"Unknown parser backend {name!r}; choose from {', '.join(PARSERS)}")
+    except (ImportError, ValueError) as e:
+        logger.warning(f"Parser backend {name} unavailable ({str(e)}), using BeautifulSoup")
+        return SoupParser(selectors)
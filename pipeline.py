@@ -0,0 +1,120 @@
+# pipeline.py
+import queue
+import threading
+import time
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from engine import EnrichmentEngine, StageMetrics
+from throttle import interleave_by_host
+from metrics import QUEUE_WAIT
+from webutil import registered_domain
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingPipeline:
+    """Scrape sites and enrich companies at the same time.
+
+    Scrape workers pull sites from a queue, save the names they find and
+    push newly saved companies straight into the enrichment engine's bounded
+    queue. When enrichment falls behind, scrape workers block on that queue,
+    so memory stays bounded and neither stage idles while the other runs.
+
+    Without an engine the pipeline only scrapes, leaving new companies in
+    the jobs table for sharded workers to enrich.
+    """
+
+    def __init__(self, scraper, engine: Optional[EnrichmentEngine], db_manager, scrape_workers: int = 2):
+        self.scraper = scraper
+        self.engine = engine
+        self.db_manager = db_manager
+        self.scrape_workers = max(1, scrape_workers)
+
+        self.scrape_metrics = StageMetrics('scrape')
+        self.total_companies = 0
+        self._sites = queue.Queue()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._started_at = None
+
+    def run(self, sites: List[str], pending_companies: Iterable[Tuple[int, str]] = ()):
+        """Scrape every site while enriching, then wait for both stages to drain."""
+        self._started_at = time.time()
+        self.scrape_metrics.started_at = self._started_at
+        if self.engine:
+            self.engine.start()
+
+        # Alternate hosts so concurrent scrape workers don't queue on one throttle
+        for url in interleave_by_host(sites):
+            self._sites.put((url, time.time()))
+
+        threads = []
+        for i in range(self.scrape_workers):
+            thread = threading.Thread(target=self._scrape_worker, name=f"scraper-{i}", daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        # Companies left over from earlier runs go in alongside the new ones
+        for startup_id, company_name in pending_companies if self.engine else ():
+            if not self.engine.submit(startup_id, company_name):
+                break
+
+        for thread in threads:
+            thread.join()
+        logger.info(f"Scraping completed. Total companies collected: {self.total_companies}")
+
+        if self.engine:
+            self.engine.join()
+        logger.info(f"Pipeline finished: {self.summary()}")
+
+    def stop(self):
+        """Stop taking new sites and shut the enrichment workers down cleanly."""
+        self._stop_event.set()
+        if self.engine:
+            self.engine.stop()
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-stage metrics plus overall wall time."""
+        summary = {
+            'wall_seconds': round(time.time() - self._started_at, 3) if self._started_at else 0.0,
+            'scrape': self.scrape_metrics.summary(self._started_at)
+        }
+        if self.engine:
+            summary['enrich'] = self.engine.metrics.summary(self._started_at)
+        return summary
+
+    def _scrape_worker(self):
+        while not self._stop_event.is_set():
+            try:
+                url, queued_at = self._sites.get_nowait()
+            except queue.Empty:
+                return
+
+            self.scrape_metrics.record_input(self._sites.qsize())
+            start = time.time()
+            QUEUE_WAIT.observe(start - queued_at, stage='scrape')
+            try:
+                companies = self.scraper.scrape_site(url)
+                # Feeds the ranking of future discovery results
+                self.db_manager.record_source_yield(registered_domain(url), len(companies))
+                if not companies:
+                    self.db_manager.mark_job_failed('site', url, "No companies found")
+                    self.scrape_metrics.record_error(time.time() - start)
+                    continue
+
+                new_startups = self.db_manager.save_startups(companies, url)
+                self.db_manager.mark_site_scraped(url)
+                with self._lock:
+                    self.total_companies += len(companies)
+                self.scrape_metrics.record_output(time.time() - start, len(new_startups))
+
+                for startup_id, company_name in new_startups if self.engine else ():
+                    # Blocks while the enrichment queue is full (backpressure)
+                    if not self.engine.submit(startup_id, company_name):
+                        break
+
+            except Exception as e:
+                logger.error(f"Error processing {url}: {str(e)}")
+                self.db_manager.mark_job_failed('site', url, str(e))
+                self.scrape_metrics.record_error(time.time() - start)
@@ -0,0 +1,133 @@
+# readiness.py
+import threading
+import time
+import logging
+from typing import Dict
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from metrics import WAIT
+
+logger = logging.getLogger(__name__)
+
+# Installs a MutationObserver once per document and reports how long the DOM
+# and the resource timeline (a stand-in for network activity) have been quiet.
+QUIET_PROBE = """
+var state = window.__readiness;
+if (!state) {
+    state = window.__readiness = {last: performance.now(), resources: 0};
+    new MutationObserver(function () {
+        state.last = performance.now();
+    }).observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+}
+var resources = performance.getEntriesByType('resource').length;
+if (resources !== state.resources) {
+    state.resources = resources;
+    state.last = performance.now();
+}
+return {
+    complete: document.readyState === 'complete',
+    quiet: (performance.now() - state.last) / 1000
+};
+"""
+
+
+class WaitStats:
+    """Thread-safe totals of the time actually spent waiting, per wait kind."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.timeouts: Dict[str, int] = {}
+
+    def record(self, kind: str, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            self.seconds[kind] = self.seconds.get(kind, 0.0) + seconds
+            if timed_out:
+                self.timeouts[kind] = self.timeouts.get(kind, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Calls, total and mean seconds waited for each kind."""
+        with self._lock:
+            return {
+                kind: {
+                    'calls': calls,
+                    'seconds': round(self.seconds[kind], 3),
+                    'mean': round(self.seconds[kind] / calls, 3),
+                    'timeouts': self.timeouts.get(kind, 0)
+                }
+                for kind, calls in self.calls.items()
+            }
+
+
+class PageReadiness:
+    """Readiness-based waits that replace fixed sleeps after navigation.
+
+    A page counts as ready once ``document.readyState`` is complete and
+    neither the DOM nor the resource timeline has changed for
+    ``quiet_period`` seconds, bounded by ``max_wait``.
+    """
+
+    def __init__(self, max_wait: float = 10.0, quiet_period: float = 0.5,
+                 poll_frequency: float = 0.1, max_scrolls: int = 10):
+        self.max_wait = max_wait
+        self.quiet_period = quiet_period
+        self.poll_frequency = poll_frequency
+        self.max_scrolls = max_scrolls
+        self.stats = WaitStats()
+
+    def wait_until_ready(self, driver, max_wait: float = None) -> float:
+        """Wait for the page to settle; return the seconds actually waited."""
+        return self._wait_quiet(driver, 'ready', max_wait or self.max_wait)
+
+    def scroll_until_stable(self, driver, max_scrolls: int = None) -> float:
+        """Scroll down a viewport at a time until no new content arrives."""
+        start = time.time()
+        last_height = -1
+        scrolls = 0
+
+        try:
+            for scrolls in range(1, (max_scrolls or self.max_scrolls) + 1):
+                driver.execute_script("window.scrollBy(0, window.innerHeight);")
+                self._wait_quiet(driver, 'scroll_step', self.max_wait, record=False)
+                at_bottom = driver.execute_script(
+                    "return window.innerHeight + window.scrollY >= document.body.scrollHeight - 2;"
+                )
+                height = driver.execute_script(
+                    "return document.body ? document.body.scrollHeight : 0;"
+                )
+                # Stop once reaching the bottom no longer loads anything
+                if at_bottom and height == last_height:
+                    break
+                last_height = height
+        except WebDriverException as e:
+            logger.debug(f"Scrolling stopped early: {str(e)}")
+
+        waited = time.time() - start
+        self.stats.record('scroll', waited)
+        WAIT.observe(waited, kind='scroll')
+        logger.debug(f"Scrolled {scrolls} times in {waited:.2f}s")
+        return waited
+
+    def _wait_quiet(self, driver, kind: str, max_wait: float, record: bool = True) -> float:
+        start = time.time()
+        timed_out = False
+
+        def settled(d):
+            state = d.execute_script(QUIET_PROBE)
+            return bool(state) and state['complete'] and state['quiet'] >= self.quiet_period
+
+        try:
+            WebDriverWait(driver, max_wait, poll_frequency=self.poll_frequency).until(settled)
+        except TimeoutException:
+            timed_out = True
+
+        waited = time.time() - start
+        if record:
+            self.stats.record(kind, waited, timed_out)
+            WAIT.observe(waited, kind=kind)
+            logger.debug(f"Waited {waited:.2f}s for page {kind}{' (timed out)' if timed_out else ''}")
+        return waited
@@ -0,0 +1,188 @@
+# refresh.py
+import re
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from db1 import DEFAULT_REFRESH_INTERVAL
+from fetcher import SCRIPT_OR_STYLE, TAG
+from metrics import FAILURES, REFRESHES
+
+logger = logging.getLogger(__name__)
+
+# Page chrome that changes independently of the company's own content
+BOILERPLATE = re.compile(r'<(nav|header|footer|aside|form)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+
+
+def content_hash(html: str) -> str:
+    """SHA-256 of a page's normalized main text.
+
+    Scripts, styles, comments and navigation/header/footer blocks are dropped
+    and whitespace and case folded, so rotating nonces, tracking snippets and
+    menu tweaks don't count as a change but edits to the copy do.
+    """
+    text = SCRIPT_OR_STYLE.sub(' ', COMMENT.sub(' ', html or ''))
+    text = TAG.sub(' ', BOILERPLATE.sub(' ', text))
+    normalized = ' '.join(text.lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class PageFingerprint:
+    """What a company page looked like when it was last enriched."""
+
+    def __init__(self, content_hash: Optional[str], etag: Optional[str] = None,
+                 last_modified: Optional[str] = None):
+        self.content_hash = content_hash
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @classmethod
+    def from_result(cls, result) -> 'PageFingerprint':
+        return cls(
+            content_hash(result.html),
+            _header(result.headers, 'etag'),
+            _header(result.headers, 'last-modified')
+        )
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class RefreshPolicy:
+    """How long to wait before checking a company page again.
+
+    Every page starts at ``initial_interval``. A check that finds the page
+    unchanged stretches its interval by ``backoff`` up to ``max_interval``;
+    a change shrinks it by the same factor down to ``min_interval``, so
+    volatile sites are checked often and static ones rarely.
+    """
+
+    def __init__(self, min_interval: float = 86400, initial_interval: float = DEFAULT_REFRESH_INTERVAL,
+                 max_interval: float = 90 * 86400, backoff: float = 2.0):
+        self.min_interval = min_interval
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def next_interval(self, interval: Optional[float], changed: bool) -> float:
+        interval = interval or self.initial_interval
+        if changed:
+            return max(self.min_interval, interval / self.backoff)
+        return min(self.max_interval, interval * self.backoff)
+
+
+class Refresher:
+    """Re-enriches companies whose pages changed, on a priority schedule.
+
+    Due companies come from the database oldest-relative-to-interval first,
+    so volatile and long-unchecked pages lead. Each stored homepage is
+    fetched with its saved validators; a 304 or an identical content hash
+    ends the check there, with no parsing, extraction or enriched_data
+    write. Only changed pages go through the enricher's extraction,
+    subpages included. The stored URL is reused, so refreshing never costs
+    a search.
+    """
+
+    def __init__(self, enricher, db_manager, fetcher, policy: Optional[RefreshPolicy] = None,
+                 workers: int = 4):
+        self.enricher = enricher
+        self.db_manager = db_manager
+        self.fetcher = fetcher
+        self.policy = policy or RefreshPolicy()
+        self.workers = max(1, workers)
+
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.outcomes: Dict[str, int] = {}
+
+    def run(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """Check every due company (at most limit); returns counts by outcome."""
+        due = self.db_manager.get_companies_to_refresh(limit=limit)
+        logger.info(f"Found {len(due)} companies due for a refresh")
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='refresh') as pool:
+            list(pool.map(lambda company: self._refresh(*company), (
+                (startup_id, name, url,
+                 PageFingerprint(content, etag, last_modified) if interval else None, interval)
+                for startup_id, name, url, content, etag, last_modified, interval in due
+            )))
+        self.db_manager.flush()
+        logger.info(f"Refresh outcomes: {self.outcomes}")
+        return dict(self.outcomes)
+
+    def stop(self):
+        """Skip companies not yet started; checks in flight finish."""
+        self._stop_event.set()
+
+    def _refresh(self, startup_id: int, company_name: str, url: str,
+                 previous: Optional[PageFingerprint], interval: Optional[float]):
+        if self._stop_event.is_set():
+            return
+        try:
+            outcome, fingerprint = self._check(startup_id, company_name, url, previous)
+        except Exception as e:
+            logger.error(f"Error refreshing {company_name}: {str(e)}")
+            outcome, fingerprint = 'failed', None
+            FAILURES.inc(stage='refresh')
+
+        if outcome == 'failed':
+            # Try again after the same interval rather than on every run
+            self.db_manager.save_page_fingerprint(
+                startup_id, url, previous or PageFingerprint(None), False,
+                interval or self.policy.initial_interval
+            )
+        else:
+            changed = outcome == 'changed'
+            self.db_manager.save_page_fingerprint(
+                startup_id, url, fingerprint, changed, self.policy.next_interval(interval, changed)
+            )
+        REFRESHES.inc(outcome=outcome)
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def _check(self, startup_id: int, company_name: str, url: str,
+               previous: Optional[PageFingerprint]):
+        validators = previous.validators() if previous else None
+        result = self.fetcher.fetch_http(url, source='company', validators=validators)
+        if result is not None and result.status == 304:
+            # Keep the old hash; the server may have sent fresher validators
+            etag = _header(result.headers, 'etag') or previous.etag
+            last_modified = _header(result.headers, 'last-modified') or previous.last_modified
+            return 'not_modified', PageFingerprint(previous.content_hash, etag, last_modified)
+
+        # An error status or bot check is a failed check, not a change;
+        # only a 200 that needs JavaScript is rendered
+        if result is None:
+            return 'failed', None
+        if self.fetcher.looks_js_rendered(result.html) and self.fetcher.browser_fallback:
+            result = self.fetcher.render(url, source='company')
+            if self.fetcher.looks_blocked(result.html):
+                return 'failed', None
+
+        fingerprint = PageFingerprint.from_result(result)
+        if previous and fingerprint.content_hash == previous.content_hash:
+            return 'unchanged', fingerprint
+
+        logger.info(f"Page of {company_name} changed, re-extracting")
+        fields = self.enricher.extract_company(url, result)
+        # A field that vanished from the page keeps its last known value
+        stored = next(self.db_manager.iter_enriched_data(batch_size=1, ids=[startup_id]), None)
+        if stored:
+            fields = {field: value or stored.get(field, '') for field, value in fields.items()}
+        self.db_manager.save_enriched_data(startup_id, {'company_url': url, **fields})
+        return 'changed', fingerprint
@@ -0,0 +1,118 @@
+# resolver.py
+import re
+import socket
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from dedup import normalize_name
+from fetcher import SCRIPT_OR_STYLE, TAG
+from metrics import RESOLUTIONS
+
+logger = logging.getLogger(__name__)
+
+GUESS_TLDS = ('com', 'io', 'ai', 'co')
+TITLE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+# Confidence of each way of finding a homepage
+CONFIDENCE_TITLE = 0.9
+CONFIDENCE_SEARCH = 0.7
+CONFIDENCE_BODY = 0.6
+
+
+class CompanyResolver:
+    """Finds a company's homepage, remembering the answer in the database.
+
+    Lookups go cheapest first: the resolution cache, then guessed domains
+    built from the normalized name (``brightlabs.com``, ``bright-labs.io``,
+    ...) that resolve in DNS and serve a page naming the company, and only
+    then the search engine. Hits are cached for ``ttl`` seconds with a
+    confidence score; misses are cached for ``miss_ttl`` so a company nobody
+    can find isn't searched for on every retry.
+    """
+
+    def __init__(self, db_manager, fetcher, search: Callable[[str], Optional[str]],
+                 ttl: int = 30 * 86400, miss_ttl: int = 86400, guess_domains: bool = True,
+                 min_confidence: float = 0.5):
+        self.db_manager = db_manager
+        self.fetcher = fetcher
+        self.search = search
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.guess_domains = guess_domains
+        self.min_confidence = min_confidence
+
+    def resolve(self, company_name: str) -> Optional[str]:
+        """Homepage URL of a company, or None if it can't be found."""
+        cached = self.db_manager.get_company_url(company_name)
+        if cached is not None:
+            url, confidence, method = cached
+            if url is None or confidence >= self.min_confidence:
+                RESOLUTIONS.inc(method='cache')
+                return url
+
+        if self.guess_domains:
+            guessed = self._guess(company_name)
+            if guessed:
+                url, confidence = guessed
+                self.db_manager.save_company_url(company_name, url, confidence, 'guess', self.ttl)
+                RESOLUTIONS.inc(method='guess')
+                return url
+
+        url = self.search(company_name)
+        if url:
+            self.db_manager.save_company_url(company_name, url, CONFIDENCE_SEARCH, 'search', self.ttl)
+            RESOLUTIONS.inc(method='search')
+        else:
+            self.db_manager.save_company_url(company_name, None, 0.0, 'miss', self.miss_ttl)
+            RESOLUTIONS.inc(method='miss')
+        return url
+
+    def forget(self, company_name: str):
+        """Drop a cached answer that turned out to be wrong."""
+        self.db_manager.forget_company_url(company_name)
+
+    def candidate_domains(self, company_name: str) -> List[str]:
+        """Likely domains for a company, most likely first."""
+        tokens = normalize_name(company_name).split()
+        if not tokens:
+            return []
+        stems = [''.join(tokens)]
+        if len(tokens) > 1:
+            stems.append('-'.join(tokens))
+        return [f"{stem}.{tld}" for tld in GUESS_TLDS for stem in stems]
+
+    def _guess(self, company_name: str) -> Optional[Tuple[str, float]]:
+        key = normalize_name(company_name)
+        for domain in self.candidate_domains(company_name):
+            if not self._resolves(domain):
+                continue
+            result = self.fetcher.fetch_http(f"https://{domain}/", source='company')
+            if result is None:
+                continue
+            confidence = self._confidence(key, result.html)
+            if confidence >= self.min_confidence:
+                # The page names the company, so follow any redirect it made
+                logger.info(f"Resolved {company_name} to {result.url} from its domain name")
+                return result.url, confidence
+        return None
+
+    def _resolves(self, domain: str) -> bool:
+        try:
+            socket.getaddrinfo(domain, 443, type=socket.SOCK_STREAM)
+            return True
+        except (socket.gaierror, UnicodeError, OSError):
+            return False
+
+    def _confidence(self, key: str, html: str) -> float:
+        """How sure we are that a page is the homepage of the company with this key."""
+        if not key or not html:
+            return 0.0
+        # Match whole words only, so "acme" doesn't match "acmesoft"
+        needle = f" {key} "
+        title = TITLE.search(html)
+        if title and needle in f" {normalize_name(title.group(1))} ":
+            return CONFIDENCE_TITLE
+        text = TAG.sub(' ', SCRIPT_OR_STYLE.sub(' ', html[:200000]))
+        if needle in f" {normalize_name(text)} ":
+            return CONFIDENCE_BODY
+        return 0.0
@@ -1,19 +1,21 @@
 # scraper.py
 import logging
-import time
-from typing import List, Set
-from bs4 import BeautifulSoup
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from typing import List, Set, Tuple
+from metrics import COMPANIES, EXTRACT, FAILURES, PARSE
+from parsers import make_parser
+from fetcher import FetchResult
+from frontier import BloomFilter, SiteCrawler
+from names import clean_name, clean_names, is_valid_name
+from tracing import hot_path, traced_page
 
 logger = logging.getLogger(__name__)
 
 class StartupScraper:
-    def __init__(self, search_engine):
+    def __init__(self, search_engine, parser='lxml', max_pages=20, max_depth=2, crawl_workers=4):
         self.search_engine = search_engine
         self.timeout = 15  # Reduced timeout
+        # Fewer names than this over plain HTTP triggers a browser render
+        self.min_http_companies = 5
 
         # Simplified selectors for better reliability
         self.company_selectors = [
@@ -25,100 +27,69 @@ class StartupScraper:
             "a[href*='/startup/']"
         ]
 
-    def scrape_site(self, url: str) -> List[str]:
-        """Scrape a website for startup names with improved reliability."""
-        companies = set()
-        driver = None
+        # Compiled once; 'soup' keeps the original BeautifulSoup path
+        self.parser = make_parser(parser, self.company_selectors)
+
+        # Follows pagination, load-more and category links on each site; the
+        # seen-set is shared so pages reached from two sites are crawled once
+        self.crawler = SiteCrawler(self, max_depth=max_depth, max_pages=max_pages,
+                                   workers=crawl_workers, seen=BloomFilter())
 
+    def scrape_site(self, url: str) -> List[str]:
+        """Scrape a directory site for startup names, following its listing pages."""
         try:
             logger.info(f"Starting scrape of {url}")
-            driver = self.search_engine.get_chrome_driver()
-            driver.set_page_load_timeout(self.timeout)
-            
-            # Load the page
-            driver.get(url)
-            
-            # Wait for any dynamic content
-            time.sleep(3)
-            
-            # Scroll down a bit to trigger lazy loading
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight / 2);")
-            time.sleep(2)
-            
-            # Get page content
-            soup = BeautifulSoup(driver.page_source, 'lxml')
-            
-            # Try multiple extraction methods
-            for selector in self.company_selectors:
-                elements = soup.select(selector)
-                for elem in elements:
-                    name = self._clean_company_name(elem.get_text())
-                    if self._validate_company_name(name):
-                        companies.add(name)
-            
-            # If no companies found, try extracting from all links
-            if not companies:
-                links = soup.find_all('a')
-                for link in links:
-                    name = self._clean_company_name(link.get_text())
-                    if self._validate_company_name(name):
-                        companies.add(name)
+            if self.crawler.max_pages > 1:
+                companies = self.crawler.crawl(url)
+            else:
+                companies, _ = self.scrape_page(url)
 
             logger.info(f"Found {len(companies)} companies from {url}")
+            COMPANIES.inc(len(companies), outcome='found')
             return sorted(list(companies))
 
         except Exception as e:
             logger.error(f"Error scraping {url}: {str(e)}")
+            FAILURES.inc(stage='scrape')
             return []
-        finally:
-            if driver:
-                driver.quit()
 
-    def _clean_company_name(self, name: str) -> str:
-        """Improved company name cleaning."""
-        if not name:
-            return ""
-        
-        # Convert to string and clean
-        name = str(name).strip()
-        
-        # Remove common prefixes/suffixes
-        prefixes = ['About ', 'The ', 'Company: ', 'Name: ']
-        for prefix in prefixes:
-            if name.lower().startswith(prefix.lower()):
-                name = name[len(prefix):]
-        
-        # Remove common suffixes
-        suffixes = [' Inc', ' LLC', ' Ltd', ' Limited', ' Corp']
-        for suffix in suffixes:
-            if name.lower().endswith(suffix.lower()):
-                name = name[:-len(suffix)]
-        
-        # Clean extra whitespace
-        name = ' '.join(name.split())
+    @traced_page
+    def scrape_page(self, url: str) -> Tuple[Set[str], FetchResult]:
+        """Company names on a single page, plus the page they were read from."""
+        fetcher = self.search_engine.fetcher
+        result = fetcher.fetch(url, source='directory', scroll=True, timeout=self.timeout)
+        companies = self._extract_companies(result.html)
         
-        return name.strip()
+        # Static HTML may hold only a shell of the listing
+        if result.via == 'http' and len(companies) < self.min_http_companies:
+            logger.info(f"Only {len(companies)} companies over HTTP, rendering {url}")
+            try:
+                rendered = fetcher.render(url, source='directory', scroll=True, timeout=self.timeout)
+                companies = self._extract_companies(rendered.html) or companies
+                result = rendered
+            except Exception as e:
+                logger.warning(f"Browser render failed for {url}, keeping HTTP results: {str(e)}")
+        return companies, result
 
-    def _validate_company_name(self, name: str) -> bool:
-        """Enhanced validation of company names."""
-        if not name or len(name) < 2 or len(name) > 100:
-            return False
-
-        # Skip invalid names
-        invalid_patterns = [
-            'login', 'sign in', 'register', 'about', 'contact',
-            'privacy', 'terms', 'cookie', 'menu', 'home'
-        ]
+    @hot_path
+    def _extract_companies(self, html: str) -> Set[str]:
+        """Extract validated company names from page HTML."""
+        with PARSE.time(stage='scrape'):
+            page = self.parser.parse(html)
         
-        if any(pattern in name.lower() for pattern in invalid_patterns):
-            return False
+        with EXTRACT.time(stage='scrape'):
+            companies = clean_names(page.matches())
 
-        # Must contain at least one letter
-        if not any(c.isalpha() for c in name):
-            return False
+            # If no companies found, try extracting from all links
+            if not companies:
+                companies = clean_names(page.links())
 
-        # Avoid names that are just numbers or single words
-        if name.replace(' ', '').isdigit() or len(name.split()) < 2:
-            return False
+        return companies
 
-        return True
\ No newline at end of file
+    def _clean_company_name(self, name: str) -> str:
+        """Improved company name cleaning."""
+        return clean_name(name)
+
+    def _validate_company_name(self, name: str) -> bool:
+        """Enhanced validation of company names."""
+        return is_valid_name(name)
\ No newline at end of file
@@ -1,19 +1,23 @@
 # search.py
 from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-import random
-import time
 import logging
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
+from driver_pool import DriverPool
+from throttle import DomainThrottle
+from fetcher import PageFetcher
+from readiness import PageReadiness
+from discovery import SiteDiscovery, make_backend
+from browser_profile import BrowserProfile
+from metrics import DRIVER_SPAWN, NAVIGATION
 
 logger = logging.getLogger(__name__)
 
 class SearchEngine:
-    def __init__(self):
+    def __init__(self, pool_size=1, max_driver_uses=50, max_driver_memory_mb=1024,
+                 host_interval=2.0, search_interval=8.0, max_render_wait=10.0,
+                 cache=None, search_url="https://www.bing.com/search?q=", browser_fallback=True,
+                 browser_profile=None, search_backends=None, discovery_pages=2, discovery_workers=4):
         self.search_queries = [
             "directory of technology startups",
             "list of software companies",
@@ -27,98 +31,80 @@ class SearchEngine:
             'instagram.com', 'youtube.com', 'wikipedia.org'
         }
 
+        # Domains containing these terms are likely business listings
+        self.preferred_domain_terms = ['company', 'business', 'tech', 'startup']
+
+        # Use a simpler search engine - Bing tends to be more reliable
+        self.search_url = search_url
+
+        # Chrome flags, request blocking and optional profile template
+        self.browser_profile = browser_profile or BrowserProfile()
+
+        # Reusable browsers shared by the search, scrape and enrich stages
+        self.driver_pool = DriverPool(
+            self.get_chrome_driver,
+            size=pool_size,
+            max_uses=max_driver_uses,
+            max_memory_mb=max_driver_memory_mb
+        )
+
+        # Politeness is an adaptive token bucket per host; search engines get
+        # the strictest spacing and fetchers report 429s and CAPTCHAs back to it
+        self.throttle = DomainThrottle(
+            default_interval=host_interval,
+            intervals={'bing.com': search_interval, 'google.com': search_interval,
+                       'duckduckgo.com': search_interval}
+        )
+
+        # Readiness-based waits after navigation, bounded by max_render_wait
+        self.readiness = PageReadiness(max_wait=max_render_wait)
+
+        # HTTP-first page loading with the driver pool as fallback, behind
+        # an optional on-disk PageCache
+        self.fetcher = PageFetcher(self, cache=cache, browser_fallback=browser_fallback)
+
+        # Concurrent discovery over every query, result page and backend
+        self.discovery = SiteDiscovery(
+            self,
+            search_backends or [make_backend('bing', search_url)],
+            pages=discovery_pages,
+            workers=discovery_workers
+        )
+
+    def navigate(self, driver, url):
+        """Load a URL in a driver once the host's politeness delay allows it."""
+        self.throttle.wait(url)
+        with NAVIGATION.time(via='browser'):
+            driver.get(url)
+
+    def lease_driver(self, timeout=None):
+        """Lease a pooled Chrome driver; use as a context manager."""
+        return self.driver_pool.lease(timeout)
+
+    def close(self):
+        """Shut down all pooled drivers and HTTP connections."""
+        self.fetcher.close()
+        self.driver_pool.close()
+
     def get_chrome_driver(self):
-        """Initialize Chrome driver with Docker-compatible settings."""
-        options = Options()
-        options.add_argument('--headless=new')  # Use new headless mode
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        
-        # Required for running in Docker
-        options.add_argument('--disable-software-rasterizer')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--single-process')  # Important for Docker
-        options.add_argument('--remote-debugging-port=9222')
-        
-        # Set window size
-        options.add_argument('--window-size=1920,1080')
-        
-        # Set a stable user agent
-        options.add_argument('--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        # Create service with increased timeout
-        service = Service(log_output=":stderr")
-        
-        return webdriver.Chrome(options=options, service=service)
+        """Initialize a Chrome driver with the configured browser profile."""
+        def start(options):
+            # Create service with increased timeout
+            service = Service(log_output=":stderr")
+            with DRIVER_SPAWN.time():
+                return webdriver.Chrome(options=options, service=service)
 
-    def find_potential_sites(self):
-        """Discover potential startup listing sites with improved reliability."""
-        potential_sites = []
-        
+        return self.browser_profile.create(start)
+
+    def find_potential_sites(self, max_sites=20, source_yields=None):
+        """Discover potential startup listing sites across all queries and search backends."""
         try:
-            # Create a new driver instance
-            driver = self.get_chrome_driver()
-            
-            try:
-                # Use a simpler search engine - Bing tends to be more reliable
-                base_url = "https://www.bing.com/search?q="
-                
-                # Try each query
-                for query in random.sample(self.search_queries, 2):
-                    logger.info(f"Searching with query: {query}")
-                    
-                    try:
-                        # Construct search URL
-                        search_url = base_url + query.replace(' ', '+')
-                        driver.get(search_url)
-                        
-                        # Wait for results
-                        WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.TAG_NAME, "body"))
-                        )
-                        
-                        # Let the page settle
-                        time.sleep(3)
-                        
-                        # Get all links
-                        links = driver.find_elements(By.TAG_NAME, "a")
-                        urls = []
-                        
-                        for link in links:
-                            try:
-                                url = link.get_attribute('href')
-                                if url and url.startswith('http'):
-                                    urls.append(url)
-                            except:
-                                continue
-                        
-                        # Filter and add valid URLs
-                        for url in urls:
-                            if self.is_valid_source(url):
-                                potential_sites.append(url)
-                        
-                        # Small delay between searches
-                        time.sleep(2)
-                        
-                    except Exception as e:
-                        logger.error(f"Error in search iteration: {str(e)}")
-                        continue
-                    
-            finally:
-                # Make sure to quit the driver
-                try:
-                    driver.quit()
-                except:
-                    pass
-                    
+            sites = self.discovery.discover(self.search_queries, max_sites, source_yields)
         except Exception as e:
             logger.error(f"Error in finding sites: {str(e)}")
-        
-        # Return unique, filtered sites
-        filtered_sites = list(set(potential_sites))
-        logger.info(f"Found {len(filtered_sites)} potential sites")
-        return filtered_sites[:3]
+            sites = []
+        logger.info(f"Found {len(sites)} potential sites")
+        return sites
 
     def is_valid_source(self, url):
         """Validate potential startup listing sources."""
@@ -134,8 +120,7 @@ class SearchEngine:
                 return False
                 
             # Prefer business-related URLs
-            preferred_terms = ['company', 'business', 'tech', 'startup']
-            if any(term in domain.lower() for term in preferred_terms):
+            if any(term in domain.lower() for term in self.preferred_domain_terms):
                 return True
                 
             return False
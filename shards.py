@@ -0,0 +1,162 @@
+# shards.py
+import os
+import socket
+import threading
+import time
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from db1 import LeaseLostError
+from engine import EnrichmentEngine
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardWorker:
+    """Enriches the company backlog one leased shard at a time.
+
+    Any number of worker processes, local or in other containers sharing the
+    database volume, can run side by side. Each claims a free shard, enriches
+    the companies due in it with its own driver pool, and renews the lease
+    from a heartbeat thread while it works. Every write happens under the
+    lease's fencing token, so if a lease expires and another worker claims
+    the shard, the stale worker's results are rejected rather than saved a
+    second time, and it stops at the next heartbeat.
+    """
+
+    def __init__(self, enricher, db_manager, shards: int, worker_id: Optional[str] = None,
+                 lease_seconds: float = 300.0, idle_timeout: float = 60.0, poll_interval: float = 5.0,
+                 engine_factory: Optional[Callable[[], EnrichmentEngine]] = None):
+        self.enricher = enricher
+        self.db_manager = db_manager
+        self.shards = shards
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.engine_factory = engine_factory or (lambda: EnrichmentEngine(enricher, db_manager))
+
+        self.shards_processed = 0
+        self.enriched = 0
+        self.failed = 0
+        self._engine = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Claim and process shards until none has due work for idle_timeout seconds."""
+        self.db_manager.init_shards(self.shards)
+        idle_since = time.time()
+        while not self._stop_event.is_set():
+            due = self.db_manager.count_due_by_shard()
+            lease = self.db_manager.claim_shard(self.worker_id, due.keys(), self.lease_seconds)
+            if lease is None:
+                if time.time() - idle_since >= self.idle_timeout:
+                    logger.info(f"Worker {self.worker_id}: no claimable shards, exiting")
+                    break
+                self._stop_event.wait(self.poll_interval)
+                continue
+
+            shard, token = lease
+            # Re-read after claiming: another worker may have finished it meanwhile
+            companies = self.db_manager.get_companies_to_enrich(shard=shard)
+            self._process(shard, token, companies)
+            idle_since = time.time()
+
+        logger.info(f"Worker {self.worker_id} processed {self.shards_processed} shards: "
+                    f"{self.enriched} enriched, {self.failed} failed")
+
+    def stop(self):
+        """Finish in-flight companies, then stop claiming shards."""
+        self._stop_event.set()
+        if self._engine:
+            self._engine.stop()
+
+    def _process(self, shard: int, token: int, companies: List[Tuple[int, str]]):
+        logger.info(f"Worker {self.worker_id} leased shard {shard} (token {token}) "
+                    f"with {len(companies)} companies")
+        self.db_manager.write_fence = (shard, token)
+        engine = self._engine = self.engine_factory()
+        lost = threading.Event()
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(shard, token, engine, lost, done),
+            name=f"lease-{shard}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            engine.run(companies)
+            self.db_manager.flush()
+            # A fenced flush from a worker thread only shows up as failed companies
+            if not self.db_manager.renew_shard(shard, token, self.lease_seconds):
+                lost.set()
+        except LeaseLostError:
+            lost.set()
+        finally:
+            done.set()
+            heartbeat.join()
+            self.db_manager.write_fence = None
+            self._engine = None
+
+        self.enriched += engine.enriched
+        self.failed += engine.failed
+        if lost.is_set():
+            logger.warning(f"Worker {self.worker_id} lost shard {shard}; its results were discarded")
+            return
+        self.db_manager.release_shard(shard, token)
+        self.shards_processed += 1
+        logger.info(f"Worker {self.worker_id} finished shard {shard}: "
+                    f"{engine.enriched} enriched, {engine.failed} failed")
+
+    def _heartbeat(self, shard: int, token: int, engine: EnrichmentEngine,
+                   lost: threading.Event, done: threading.Event):
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                renewed = self.db_manager.renew_shard(shard, token, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Failed to renew lease on shard {shard}: {str(e)}")
+                continue
+            if not renewed:
+                lost.set()
+                engine.stop()
+                return
+
+
+class ShardCoordinator:
+    """Splits the backlog into shards and reports progress until workers drain it.
+
+    The coordinator itself never enriches: it prepares the lease rows, runs
+    discovery and scraping (new companies fall into shards by id hash), and
+    then waits until no company is due and no lease is held.
+    """
+
+    def __init__(self, db_manager, shards: int, poll_interval: float = 30.0):
+        self.db_manager = db_manager
+        self.shards = shards
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    def prepare(self):
+        self.db_manager.init_shards(self.shards)
+        due = self.db_manager.count_due_by_shard()
+        logger.info(f"Backlog split into {self.shards} shards: {dict(sorted(due.items()))}")
+
+    def wait(self):
+        """Block until every shard is drained and released."""
+        while not self._stop_event.is_set():
+            due = sum(self.db_manager.count_due_by_shard().values())
+            now = time.time()
+            leased = [row for row in self.db_manager.get_shard_status()
+                      if row['owner'] and row['expires_at'] >= now]
+            if not due and not leased:
+                logger.info("All shards drained")
+                return
+            logger.info(f"{due} companies due, shards leased: "
+                        f"{ {row['shard']: row['owner'] for row in leased} }")
+            self._stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop_event.set()
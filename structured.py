@@ -0,0 +1,210 @@
+# structured.py
+import re
+import json
+import html
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Confidence of a value by where it came from. Values a site publishes for
+# machines beat anything the heuristics guess; page descriptions are only
+# a summary, so they fill mission when nothing better is found.
+SOURCE_CONFIDENCE = {
+    'jsonld': 0.95,
+    'microdata': 0.9,
+    'mailto': 0.85,
+    'description': 0.4
+}
+# Fields at or above this are final and skip the heuristic extractor
+TRUSTED_CONFIDENCE = 0.8
+
+# schema.org types that describe the company itself
+ORGANIZATION_TYPES = {
+    'Organization', 'Corporation', 'LocalBusiness', 'OnlineBusiness',
+    'OnlineStore', 'ProfessionalService', 'NGO'
+}
+# Inboxes for general enquiries, preferred over personal or sales addresses
+GENERAL_INBOXES = ('contact', 'info', 'hello', 'support')
+
+JSONLD = re.compile(
+    r'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+META = re.compile(r'<meta\b[^>]*>', re.IGNORECASE)
+MAILTO = re.compile(r'mailto:([^"\'?>\s]+)')
+ORGANIZATION_ITEMTYPE = re.compile(r'schema\.org/(?:' + '|'.join(ORGANIZATION_TYPES) + r')\b')
+ITEMPROP = re.compile(
+    r'<[a-z][^>]*\bitemprop\s*=\s*["\']?(email|numberOfEmployees)["\']?[^>]*>([^<]*)', re.IGNORECASE
+)
+ATTRIBUTE = re.compile(r'([a-z_:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+# Addresses are found from their '@', which the regex engine skips to
+# quickly, and kept when the local part before it is a general inbox
+ADDRESS_DOMAIN = re.compile(r'@[a-zA-Z0-9-]+(?:\.[a-zA-Z0-9-]+)*\.[a-zA-Z]{2,}')
+GENERAL_LOCAL = re.compile(r'(?:^|[^\w.+-])(' + '|'.join(GENERAL_INBOXES) + r')\Z', re.IGNORECASE)
+EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[a-z]{2,}$', re.IGNORECASE)
+
+
+def _attributes(tag: str) -> Dict[str, str]:
+    return {
+        name.lower(): html.unescape(next(value for value in values if value is not None))
+        for name, *values in ATTRIBUTE.findall(tag)
+    }
+
+
+def _email(value) -> str:
+    if not isinstance(value, str):
+        return ''
+    value = html.unescape(value).strip()
+    if value.lower().startswith('mailto:'):
+        value = value[7:]
+    value = value.split('?', 1)[0]
+    return value if EMAIL.match(value) else ''
+
+
+def _employees(value) -> str:
+    """Employee count from a number, a string or a QuantitativeValue."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        if value.get('value') not in (None, ''):
+            return _employees(value['value'])
+        low, high = value.get('minValue'), value.get('maxValue')
+        if low not in (None, '') and high not in (None, ''):
+            return f"{_employees(low)}-{_employees(high)}"
+        return _employees(low if low not in (None, '') else high)
+    if isinstance(value, bool) or value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return ' '.join(str(value).split())
+
+
+def _types(item: dict) -> List[str]:
+    types = item.get('@type', [])
+    types = types if isinstance(types, list) else [types]
+    # "https://schema.org/Organization" and "schema:Organization" both count
+    return [str(t).rsplit('/', 1)[-1].rsplit(':', 1)[-1] for t in types]
+
+
+def _items(data) -> Iterator[dict]:
+    """Every JSON-LD node in a document, @graph and nested nodes included."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _items(item)
+    elif isinstance(data, dict):
+        yield data
+        for value in data.values():
+            if isinstance(value, (list, dict)):
+                yield from _items(value)
+
+
+def _names(value) -> List[str]:
+    """Names of the products or services an offer, catalog or list refers to."""
+    names = []
+    for item in _items(value):
+        if 'itemOffered' in item or 'itemListElement' in item:
+            continue
+        name = item.get('name')
+        if isinstance(name, str) and name.strip() and name.strip() not in names:
+            names.append(' '.join(name.split()))
+    return names
+
+
+def _from_jsonld(page: str, found: Dict[str, Tuple[str, float]]):
+    confidence = SOURCE_CONFIDENCE['jsonld']
+    products: List[str] = []
+    for block in JSONLD.findall(page):
+        try:
+            data = json.loads(block.strip())
+        except ValueError:
+            logger.debug("Skipping unparseable JSON-LD block")
+            continue
+        for item in _items(data):
+            types = _types(item)
+            if 'Product' in types or 'Service' in types:
+                products.extend(name for name in _names([{'name': item.get('name')}]) if name not in products)
+            if not ORGANIZATION_TYPES.intersection(types):
+                continue
+            email = _email(item.get('email'))
+            if email and 'email' not in found:
+                found['email'] = (email, confidence)
+            employees = _employees(item.get('numberOfEmployees'))
+            if employees and 'employees' not in found:
+                found['employees'] = (employees, confidence)
+            for key in ('makesOffer', 'hasOfferCatalog', 'owns'):
+                products.extend(name for name in _names(item.get(key)) if name not in products)
+            description = item.get('description')
+            if isinstance(description, str) and description.strip() and 'mission' not in found:
+                found['mission'] = (' '.join(description.split()), SOURCE_CONFIDENCE['description'])
+    if products and 'product' not in found:
+        found['product'] = (', '.join(products), confidence)
+
+
+def _from_microdata(page: str, found: Dict[str, Tuple[str, float]]):
+    if not ORGANIZATION_ITEMTYPE.search(page):
+        return
+    confidence = SOURCE_CONFIDENCE['microdata']
+    for match in ITEMPROP.finditer(page):
+        prop = match.group(1).lower()
+        attributes = _attributes(match.group(0).split('>', 1)[0])
+        value = attributes.get('content') or attributes.get('href') or html.unescape(match.group(2))
+        if prop == 'email' and 'email' not in found:
+            email = _email(value)
+            if email:
+                found['email'] = (email, confidence)
+        elif prop == 'numberofemployees' and 'employees' not in found:
+            employees = _employees(value)
+            if employees:
+                found['employees'] = (employees, confidence)
+
+
+def _from_mailto(page: str, found: Dict[str, Tuple[str, float]]):
+    """A mailto address, preferring general inboxes, including ones only shown as text."""
+    if 'email' in found:
+        return
+    emails = [email for email in map(_email, MAILTO.findall(page)) if email]
+    general = [email for email in emails if email.split('@', 1)[0].lower() in GENERAL_INBOXES]
+    if not general and emails:
+        general = [
+            local.group(1) + match.group(0)
+            for match in ADDRESS_DOMAIN.finditer(page)
+            for local in [GENERAL_LOCAL.search(page, max(0, match.start() - 9), match.start())]
+            if local
+        ]
+    if general or emails:
+        found['email'] = ((general or emails)[0], SOURCE_CONFIDENCE['mailto'])
+
+
+def _from_meta(page: str, found: Dict[str, Tuple[str, float]]):
+    if 'mission' in found:
+        return
+    descriptions = {}
+    for tag in META.findall(page):
+        attributes = _attributes(tag)
+        key = (attributes.get('property') or attributes.get('name') or '').lower()
+        if key in ('og:description', 'description') and attributes.get('content', '').strip():
+            descriptions.setdefault(key, ' '.join(attributes['content'].split()))
+    description = descriptions.get('og:description') or descriptions.get('description')
+    if description:
+        found['mission'] = (description, SOURCE_CONFIDENCE['description'])
+
+
+def extract_structured(page: Optional[str]) -> Dict[str, Tuple[str, float]]:
+    """(text, confidence) of the fields a page publishes as structured data.
+
+    Reads schema.org Organization JSON-LD and microdata, ``mailto:`` links
+    and OpenGraph/meta descriptions with targeted regex scans, without
+    parsing the page. Fields the page doesn't publish are left out.
+    """
+    found: Dict[str, Tuple[str, float]] = {}
+    if not page:
+        return found
+    if 'ld+json' in page:
+        _from_jsonld(page, found)
+    if 'itemprop' in page:
+        _from_microdata(page, found)
+    if 'mailto:' in page:
+        _from_mailto(page, found)
+    _from_meta(page, found)
+    return found
@@ -0,0 +1,98 @@
+# subpages.py
+import re
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+from lxml import etree
+
+from cache import normalize_url
+from parsers import element_text
+from webutil import parse_html, registered_domain
+
+logger = logging.getLogger(__name__)
+
+# Subpages companies keep their details on: how to recognise a link to one
+# (by URL path or link text) and which fields it usually fills
+SUBPAGE_KINDS = {
+    'about': (re.compile(r'about|company|who-we-are|our-story|mission', re.IGNORECASE),
+              {'mission', 'vision', 'product', 'funding'}),
+    'team': (re.compile(r'team|people|leadership|founders', re.IGNORECASE), {'employees'}),
+    'careers': (re.compile(r'careers?|jobs|join-us|hiring', re.IGNORECASE), {'employees'}),
+    'contact': (re.compile(r'contact', re.IGNORECASE), {'email'}),
+    'product': (re.compile(r'products?|solutions|platform|features', re.IGNORECASE), {'product'})
+}
+
+# Confidence adjustments for a field found on a subpage about it, or on an
+# unrelated one (footers repeat the same boilerplate on every page)
+ON_TOPIC_BONUS = 0.1
+OFF_TOPIC_FACTOR = 0.8
+
+ANCHORS = etree.XPath('//a[@href]')
+
+
+def find_subpages(html: str, base_url: str) -> Dict[str, str]:
+    """First same-site link of each subpage kind on a company page, by kind."""
+    root = parse_html(html)
+    if root is None:
+        return {}
+    site = registered_domain(base_url)
+    home = normalize_url(base_url)
+    found: Dict[str, str] = {}
+    for anchor in ANCHORS(root):
+        href = anchor.get('href', '').strip()
+        if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+            continue
+        url = urljoin(base_url, href)
+        if not url.startswith('http') or registered_domain(url) != site or normalize_url(url) == home:
+            continue
+        path = urlparse(url).path
+        text = ' '.join(element_text(anchor).split())
+        for kind, (pattern, _) in SUBPAGE_KINDS.items():
+            if kind not in found and (pattern.search(path) or pattern.search(text)):
+                found[kind] = url
+                break
+    return found
+
+
+def plan_subpages(subpages: Dict[str, str], missing: Set[str], limit: int) -> List[Tuple[str, str]]:
+    """(kind, url) of up to limit subpages that could fill missing fields, most useful first."""
+    useful = [
+        (len(SUBPAGE_KINDS[kind][1] & missing), kind, url)
+        for kind, url in subpages.items()
+        if SUBPAGE_KINDS[kind][1] & missing
+    ]
+    # Most missing fields covered first; ties keep SUBPAGE_KINDS order
+    order = list(SUBPAGE_KINDS)
+    useful.sort(key=lambda item: (-item[0], order.index(item[1])))
+    return [(kind, url) for _, kind, url in useful[:limit]]
+
+
+def adjust_confidence(scored: Dict[str, Tuple[str, float]], kind: Optional[str]) -> Dict[str, Tuple[str, float]]:
+    """Weigh a page's field confidences by whether the page is about those fields."""
+    if kind is None:
+        return scored
+    fields = SUBPAGE_KINDS[kind][1]
+    return {
+        field: (text, round(min(1.0, confidence + ON_TOPIC_BONUS) if field in fields
+                            else confidence * OFF_TOPIC_FACTOR, 3))
+        for field, (text, confidence) in scored.items()
+    }
+
+
+class FieldMerger:
+    """Keeps the most confident value seen so far for every field."""
+
+    def __init__(self, fields: Iterable[str]):
+        self.best: Dict[str, Tuple[str, float]] = {field: ('', 0.0) for field in fields}
+
+    def merge(self, scored: Dict[str, Tuple[str, float]]):
+        for field, (text, confidence) in scored.items():
+            if text and confidence > self.best[field][1]:
+                self.best[field] = (text, confidence)
+
+    def missing(self) -> Set[str]:
+        return {field for field, (text, _) in self.best.items() if not text}
+
+    def values(self) -> Dict[str, str]:
+        return {field: text for field, (text, _) in self.best.items()}
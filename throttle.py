@@ -0,0 +1,174 @@
+# throttle.py
+import random
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from metrics import HOST_BACKOFFS, THROTTLE_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Status codes that mean the host wants us to slow down
+BACKOFF_STATUSES = {429, 503}
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def interleave_by_host(urls: Iterable[str]) -> List[str]:
+    """Order URLs round-robin across hosts so consecutive requests rarely share one."""
+    by_host: Dict[str, List[str]] = OrderedDict()
+    for url in urls:
+        by_host.setdefault(host_of(url), []).append(url)
+
+    ordered = []
+    queues = [list(reversed(host_urls)) for host_urls in by_host.values()]
+    while queues:
+        for host_urls in queues:
+            ordered.append(host_urls.pop())
+        queues = [host_urls for host_urls in queues if host_urls]
+    return ordered
+
+
+class _HostState:
+    def __init__(self, base_interval: float, min_interval: float, burst: float):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.interval = base_interval
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.time()
+        self.blocked_until = 0.0
+        self.successes = 0
+
+
+class DomainThrottle:
+    """Adaptive per-host token buckets.
+
+    Each host refills one token every ``interval`` seconds, up to ``burst``
+    tokens, so requests to different hosts never wait on each other and an
+    idle host can take a short burst. Hosts listed in ``intervals`` (e.g.
+    search engines) get their own spacing and no burst.
+
+    Fetchers report every response through ``report``: a 429/503 or a
+    CAPTCHA page multiplies the host's interval by ``backoff_factor`` (and
+    honours Retry-After), while a run of ``speedup_after`` healthy responses
+    shrinks it again, down to ``min_ratio`` of the default for ordinary
+    hosts. Listed hosts never go faster than their configured interval.
+    """
+
+    def __init__(self, default_interval: float = 2.0, jitter: float = 0.5,
+                 intervals: Optional[Dict[str, float]] = None, burst: float = 2.0,
+                 backoff_factor: float = 2.0, max_interval: float = 300.0,
+                 speedup_after: int = 5, speedup_factor: float = 0.8, min_ratio: float = 0.25):
+        self.default_interval = default_interval
+        self.jitter = jitter
+        self.intervals = intervals or {}
+        self.burst = max(1.0, burst)
+        self.backoff_factor = backoff_factor
+        self.max_interval = max_interval
+        self.speedup_after = speedup_after
+        self.speedup_factor = speedup_factor
+        self.min_ratio = min_ratio
+
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def interval_for(self, host: str) -> float:
+        """Current spacing for a host, matching parent domains too."""
+        with self._lock:
+            return self._state(host).interval
+
+    def _configured_interval(self, host: str) -> Optional[float]:
+        for domain, interval in self.intervals.items():
+            if host == domain or host.endswith('.' + domain):
+                return interval
+        return None
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            configured = self._configured_interval(host)
+            if configured is not None:
+                state = _HostState(configured, configured, 1.0)
+            else:
+                state = _HostState(self.default_interval, self.default_interval * self.min_ratio, self.burst)
+            self._hosts[host] = state
+        return state
+
+    def wait(self, url: str) -> float:
+        """Block until a request to the URL's host is allowed; return seconds waited."""
+        host = host_of(url)
+        if not host:
+            return 0.0
+
+        with self._lock:
+            state = self._state(host)
+            now = time.time()
+            if state.interval > 0:
+                elapsed = now - state.updated
+                state.tokens = min(state.burst, state.tokens + elapsed / state.interval)
+            else:
+                state.tokens = state.burst
+            state.updated = now
+
+            # Take a token now even if it goes negative, so concurrent callers
+            # queue up behind each other instead of all waking at once
+            delay = max(0.0, state.blocked_until - now)
+            if state.tokens < 1:
+                delay = max(delay, (1 - state.tokens) * state.interval)
+                delay += random.uniform(0, self.jitter * state.interval)
+            state.tokens -= 1
+
+        THROTTLE_WAIT.observe(delay)
+        if delay > 0:
+            logger.debug(f"Throttling {host} for {delay:.2f}s")
+            time.sleep(delay)
+        return delay
+
+    def report(self, url: str, status: Optional[int] = None, blocked: bool = False,
+               retry_after: Optional[str] = None):
+        """Feed a response back so the host's rate adapts to how it is coping."""
+        host = host_of(url)
+        if not host:
+            return
+
+        with self._lock:
+            state = self._state(host)
+            if blocked or status in BACKOFF_STATUSES:
+                state.successes = 0
+                state.interval = min(self.max_interval,
+                                     max(state.interval, state.base_interval, 0.5) * self.backoff_factor)
+                pause = self._retry_after_seconds(retry_after)
+                state.blocked_until = max(state.blocked_until, time.time() + max(pause, state.interval))
+                # Drop any banked burst so the next request really waits
+                state.tokens = 0.0
+                interval = state.interval
+            elif status is None or status < 500:
+                state.successes += 1
+                if state.successes >= self.speedup_after and state.interval > state.min_interval:
+                    state.successes = 0
+                    state.interval = max(state.min_interval, state.interval * self.speedup_factor)
+                return
+            else:
+                return
+
+        HOST_BACKOFFS.inc(reason='captcha' if blocked else str(status))
+        logger.warning(f"Backing off {host}: {'captcha' if blocked else status}, "
+                       f"interval now {interval:.1f}s")
+
+    def _retry_after_seconds(self, value: Optional[str]) -> float:
+        """Retry-After given as delta seconds; HTTP dates are ignored."""
+        try:
+            return min(self.max_interval, max(0.0, float(value)))
+        except (TypeError, ValueError):
+            return 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Current interval per host."""
+        with self._lock:
+            return {host: round(state.interval, 3) for host, state in sorted(self._hosts.items())}
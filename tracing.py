@@ -0,0 +1,251 @@
+# tracing.py
+import io
+import os
+import json
+import time
+import random
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+from metrics import set_observer
+from webutil import registered_domain
+
+logger = logging.getLogger(__name__)
+
+# Events kept before the trace stops growing; a long run's trace is still
+# readable, and the report covers every page regardless
+MAX_EVENTS = 1_000_000
+
+_active: Optional['Tracer'] = None
+_context = threading.local()
+
+
+class Tracer:
+    """Per-URL timeline of a crawl in Chrome trace-event format.
+
+    Every metrics histogram observation (queue wait, driver lease,
+    navigation, render wait, parse, extract, DB write...) becomes a span on
+    the thread it happened on, tagged with the URL that thread is working
+    on. ``page_scope`` marks that URL and adds a span covering all the
+    work done for it. The trace opens in chrome://tracing or Perfetto.
+
+    With ``cpu`` or ``memory``, a ``sample`` fraction of calls to
+    ``hot_path`` functions (page parsing and extraction) also run under
+    cProfile and/or tracemalloc, one call at a time. Peak memory of a
+    sampled call includes whatever other threads allocated meanwhile.
+    """
+
+    def __init__(self, sample: float = 0.1, cpu: bool = False, memory: bool = False,
+                 max_events: int = MAX_EVENTS):
+        self.sample = sample if cpu or memory else 0.0
+        self.cpu = cpu
+        self.memory = memory
+        self.max_events = max_events
+        self.events: List[Dict] = []
+        self.dropped = 0
+        self.pid = os.getpid()
+
+        # url -> [total seconds, slowest scope]; kept even when events are dropped
+        self.pages: Dict[str, List[float]] = {}
+        self.stats: Optional[pstats.Stats] = None
+        # hot path -> [sampled calls, total peak bytes, max peak bytes]
+        self.peaks: Dict[str, List[int]] = {}
+
+        self._origin = time.perf_counter()
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        # cProfile and tracemalloc are process-wide, so one sample at a time
+        self._sample_lock = threading.Lock()
+
+    def start(self) -> 'Tracer':
+        global _active
+        self._origin = time.perf_counter()
+        _active = self
+        set_observer(self._observe)
+        return self
+
+    def stop(self):
+        global _active
+        if _active is self:
+            _active = None
+            set_observer(None)
+
+    def add(self, name: str, category: str, start: float, duration: float, **args):
+        """Record a span that started at start (perf_counter) and lasted duration seconds."""
+        url = getattr(_context, 'url', None)
+        if url and 'url' not in args:
+            args['url'] = url
+        thread = threading.current_thread()
+        event = {
+            'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid, 'tid': thread.ident,
+            'ts': round((start - self._origin) * 1e6, 1), 'dur': round(duration * 1e6, 1), 'args': args
+        }
+        with self._lock:
+            if thread.ident not in self._threads:
+                self._threads[thread.ident] = thread.name
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+            else:
+                self.dropped += 1
+
+    def _observe(self, histogram, seconds: float, labels: Dict[str, str]):
+        # crawler_navigation_seconds{via=http} -> "navigation http"
+        category = histogram.name.replace('crawler_', '', 1).rsplit('_seconds', 1)[0]
+        name = ' '.join([category, *map(str, labels.values())])
+        self.add(name, category, time.perf_counter() - seconds, seconds, **labels)
+
+    def _add_page(self, url: str, duration: float):
+        with self._lock:
+            page = self.pages.setdefault(url, [0.0, 0.0])
+            page[0] += duration
+            page[1] = max(page[1], duration)
+
+    @contextmanager
+    def _sampled(self, name: str):
+        if not self._sample_lock.acquire(blocking=False):
+            yield
+            return
+        profiler = cProfile.Profile() if self.cpu else None
+        try:
+            if self.memory:
+                tracemalloc.start()
+            if profiler:
+                profiler.enable()
+            try:
+                yield
+            finally:
+                if profiler:
+                    profiler.disable()
+                peak = tracemalloc.get_traced_memory()[1] if self.memory else 0
+                if self.memory:
+                    tracemalloc.stop()
+            with self._lock:
+                if profiler and self.stats is None:
+                    self.stats = pstats.Stats(profiler)
+                elif profiler:
+                    self.stats.add(profiler)
+                if self.memory:
+                    entry = self.peaks.setdefault(name, [0, 0, 0])
+                    entry[0] += 1
+                    entry[1] += peak
+                    entry[2] = max(entry[2], peak)
+        finally:
+            self._sample_lock.release()
+
+    def write(self, path: str):
+        """Write the trace as Chrome trace-event JSON."""
+        with self._lock:
+            names = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                for tid, name in self._threads.items()
+            ]
+            trace = {'traceEvents': names + self.events, 'displayTimeUnit': 'ms'}
+            if self.dropped:
+                trace['otherData'] = {'dropped_events': self.dropped}
+        with open(path, 'w') as f:
+            json.dump(trace, f)
+        logger.info(f"Wrote {len(trace['traceEvents'])} trace events to {path}")
+
+    def slowest_domains(self, top: Optional[int] = 10) -> List[Dict]:
+        """Domains by total time spent on their pages, slowest first."""
+        with self._lock:
+            pages = dict(self.pages)
+        domains: Dict[str, Dict] = {}
+        for url, (total, slowest) in pages.items():
+            domain = registered_domain(url) or url
+            entry = domains.setdefault(domain, {'domain': domain, 'pages': 0, 'seconds': 0.0,
+                                                'slowest_url': url, 'slowest_seconds': 0.0})
+            entry['pages'] += 1
+            entry['seconds'] += total
+            if slowest > entry['slowest_seconds']:
+                entry['slowest_url'], entry['slowest_seconds'] = url, slowest
+        ranked = sorted(domains.values(), key=lambda entry: entry['seconds'], reverse=True)
+        return ranked[:top]
+
+    def report(self, top: int = 10) -> str:
+        """Plain-text summary of the slowest domains and sampled hot functions."""
+        out = io.StringIO()
+        domains = self.slowest_domains(None)
+        out.write(f"Slowest {min(top, len(domains))} of {len(domains)} domains:\n")
+        out.write(f"{'domain':<40}{'pages':>7}{'total s':>10}{'slowest s':>11}  slowest page\n")
+        for entry in domains[:top]:
+            out.write(f"{entry['domain'][:39]:<40}{entry['pages']:>7}{entry['seconds']:>10.3f}"
+                      f"{entry['slowest_seconds']:>11.3f}  {entry['slowest_url']}\n")
+
+        if self.stats is not None:
+            out.write(f"\nTop {top} functions in sampled hot-path calls, by cumulative time:\n")
+            self.stats.stream = out
+            self.stats.sort_stats('cumulative').print_stats(top)
+
+        if self.peaks:
+            out.write("\nPeak traced memory of sampled hot-path calls:\n")
+            out.write(f"{'function':<48}{'calls':>7}{'mean KiB':>10}{'max KiB':>10}\n")
+            ranked = sorted(self.peaks.items(), key=lambda item: item[1][2], reverse=True)
+            for name, (calls, total, peak) in ranked[:top]:
+                out.write(f"{name[:47]:<48}{calls:>7}{total / calls / 1024:>10.1f}{peak / 1024:>10.1f}\n")
+        return out.getvalue()
+
+
+@contextmanager
+def span(name: str, category: str = 'stage', **args):
+    """Record the ``with`` block as a span, when tracing."""
+    tracer = _active
+    if tracer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.add(name, category, start, time.perf_counter() - start, **args)
+
+
+@contextmanager
+def page_scope(url: Optional[str]):
+    """Attribute spans recorded on this thread inside the block to url.
+
+    Nested scopes for the same URL (a scrape around its fetch) count once.
+    """
+    tracer = _active
+    previous = getattr(_context, 'url', None)
+    if tracer is None or not url or url == previous:
+        yield
+        return
+    _context.url = url
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        _context.url = previous
+        tracer.add('page', 'page', start, duration, url=url, domain=registered_domain(url))
+        tracer._add_page(url, duration)
+
+
+def traced_page(method: Callable) -> Callable:
+    """Decorate a method taking a URL first so its work is traced under that page."""
+    @wraps(method)
+    def wrapper(self, url, *args, **kwargs):
+        with page_scope(url):
+            return method(self, url, *args, **kwargs)
+    return wrapper
+
+
+def hot_path(func: Callable) -> Callable:
+    """Mark a function whose calls the tracer may sample with cProfile and tracemalloc."""
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        tracer = _active
+        if tracer is None or not tracer.sample or random.random() >= tracer.sample:
+            return func(*args, **kwargs)
+        with tracer._sampled(name):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,31 @@
+# webutil.py
+from urllib.parse import urlparse
+
+from lxml import etree
+
+# Second-level labels under which companies register their own names
+# (example.co.uk, example.com.au), for a registered-domain guess without
+# shipping the full public suffix list
+SECOND_LEVEL_SUFFIXES = {
+    'co', 'com', 'net', 'org', 'gov', 'edu', 'ac', 'ltd', 'plc', 'or', 'ne', 'go'
+}
+
+
+def registered_domain(url: str) -> str:
+    """Best guess at the domain a site was registered under, e.g. news.example.co.uk -> example.co.uk."""
+    host = urlparse(url).hostname or ''
+    labels = [label for label in host.lower().split('.') if label]
+    if not labels or all(label.isdigit() for label in labels):
+        # IP addresses and bare hosts have no registrable part
+        return urlparse(url).netloc.lower()
+    if len(labels) > 2 and labels[-2] in SECOND_LEVEL_SUFFIXES and len(labels[-1]) == 2:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def parse_html(html: str):
+    """lxml element tree of a page, or None for an empty one."""
+    if not html or not html.strip():
+        return None
+    parser = etree.HTMLParser(encoding='utf-8')
+    return etree.fromstring(html.encode('utf-8'), parser)